@@ -0,0 +1,364 @@
+"""Throughput benchmarks for zipping and unzipping synthetic corpora.
+
+Each corpus is generated once (deterministically) into --corpus-dir and
+reused by later runs. Every zip and unzip runs in a fresh process, so
+its peak RSS is its own, and the results can be saved as JSON and
+compared with an earlier run:
+
+    python benchmarks/run.py --output before.json
+    python benchmarks/run.py --baseline before.json
+
+Needs a POSIX system (os.wait4 reports the resources of each run).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+
+METHODS = ["store", "deflate", "bzip2", "lzma"]
+PASSWORD = "benchmark"
+MiB = 1024 * 1024
+
+# name: (description, files, bytes per file, content) at scale 1
+CORPORA = {
+    "tiny": ("many tiny files", 20000, 512, "text"),
+    "huge": ("a few huge files", 3, 128 * MiB, "mixed"),
+    "text": ("compressible text", 200, MiB, "text"),
+    "random": ("incompressible data", 200, MiB, "random"),
+    "deep": ("deep directory trees", 2000, 4096, "text"),
+}
+# Directories per level and levels of the deep corpus
+DEEP_FANOUT = 2
+DEEP_LEVELS = 10
+
+WORDS = (
+    "archive member header central directory deflate stored encrypted "
+    "password window block stream offset length checksum record extra "
+    "entry folder file path name size time date method level ratio data"
+).split()
+
+
+def generate(corpus: str, path: str, scale: float, seed: int = 0) -> None:
+    """Write the files of a corpus below path"""
+    _, count, size, content = CORPORA[corpus]
+    # Huge files stay few and get smaller, other corpora get fewer files
+    if corpus == "huge":
+        size = max(1, round(size * scale))
+    else:
+        count = max(1, round(count * scale))
+    rng = random.Random(f"{corpus}-{seed}")
+    for index in range(count):
+        if corpus == "deep":
+            directory = _deep_directory(path, index, rng)
+        else:
+            directory = os.path.join(path, f"d{index // 1000:03d}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"f{index:06d}.dat"), "wb") as f:
+            for start in range(0, size, MiB):
+                length = min(MiB, size - start)
+                kind = content
+                if content == "mixed":
+                    kind = "text" if (start // MiB) % 2 else "random"
+                if kind == "random":
+                    f.write(rng.randbytes(length))
+                else:
+                    f.write(_text(rng, length))
+
+
+def _deep_directory(path: str, index: int, rng: random.Random) -> str:
+    parts = [f"l{rng.randrange(DEEP_FANOUT)}" for _ in range(DEEP_LEVELS)]
+    return os.path.join(path, *parts[: 1 + index % DEEP_LEVELS])
+
+
+def _text(rng: random.Random, length: int) -> bytes:
+    text = " ".join(rng.choices(WORDS, k=length // 5 + 1)).encode()
+    return text[:length]
+
+
+def prepare(corpus_dir: str, corpus: str, scale: float) -> str:
+    """The corpus directory, generated unless a previous run left it"""
+    path = os.path.join(corpus_dir, f"{corpus}-{scale:g}")
+    marker = path + ".done"
+    if not os.path.exists(marker):
+        shutil.rmtree(path, ignore_errors=True)
+        print(f"Generating {CORPORA[corpus][0]} in {path}", file=sys.stderr)
+        generate(corpus, path, scale)
+        open(marker, "w").close()
+    return path
+
+
+def corpus_size(path: str) -> Tuple[int, int]:
+    """Files and bytes below path"""
+    files = size = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            files += 1
+            size += os.path.getsize(os.path.join(root, name))
+    return files, size
+
+
+def measure(argv: List[str]) -> Dict:
+    """Run this script's measure mode in a fresh process and return what
+    it reported along with its CPU time and peak RSS
+    """
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "_measure", *argv],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+    )
+    output = process.stdout.read()
+    process.stdout.close()
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode:
+        raise RuntimeError(f"Benchmark failed: {' '.join(argv)}")
+    result = json.loads(output) if output else {}
+    result["cpu_seconds"] = usage.ru_utime + usage.ru_stime
+    # Linux reports KiB, macOS bytes
+    rss = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    result["peak_rss_mb"] = round(rss / MiB, 1)
+    return result
+
+
+def _run_measure(
+    operation: str, source: str, target: str, method: str, aes: str
+) -> None:
+    sys.path.insert(0, SRC)
+    from zipper.unzip import unzip_file
+    from zipper.utils import navigate
+    from zipper.zip import zip_files
+
+    password = PASSWORD if aes == "aes" else None
+    start = time.perf_counter()
+    if operation == "zip":
+        zip_files(navigate(source, []), target, password, source, method)
+    elif operation == "unzip":
+        passwords = [password.encode()] if password else []
+        unzip_file(source, target, passwords=passwords, prompt=False)
+    print(json.dumps({"seconds": time.perf_counter() - start}))
+
+
+def startup(repeat: int) -> Dict:
+    """Best wall time of `zipper.py zip --help`, as a script sees it"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, os.path.join(SRC, "zipper.py"), "zip", "--help"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {"seconds": round(best, 4)}
+
+
+def run(args: argparse.Namespace) -> Dict:
+    results = []
+    work = tempfile.mkdtemp(prefix="zipper-bench-")
+    try:
+        for corpus in args.corpus:
+            source = prepare(args.corpus_dir, corpus, args.scale)
+            for method in args.method:
+                for aes in args.aes:
+                    for result in _run_case(
+                        corpus, source, work, method, aes, args.repeat
+                    ):
+                        results.append(result)
+                        print(_format(result), file=sys.stderr)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "scale": args.scale,
+            "repeat": args.repeat,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "startup": startup(args.repeat * 3),
+        "results": results,
+    }
+
+
+def _run_case(
+    corpus: str, source: str, work: str, method: str, aes: str, repeat: int
+) -> List[Dict]:
+    """Zip a corpus and unzip the archive again, best of repeat runs each"""
+    files, size = corpus_size(source)
+    archive = os.path.join(work, "bench.zip")
+    extract_to = os.path.join(work, "out")
+    results = []
+    for operation, argv in (
+        ("zip", [source, archive]),
+        ("unzip", [archive, extract_to]),
+    ):
+        best = None
+        for _ in range(repeat):
+            if operation == "zip" and os.path.exists(archive):
+                os.remove(archive)
+            shutil.rmtree(extract_to, ignore_errors=True)
+            result = measure([operation, *argv, method, aes])
+            if best is None or result["seconds"] < best["seconds"]:
+                best = result
+        best.update(
+            _rates(best["seconds"], files, size),
+            corpus=corpus,
+            operation=operation,
+            method=method,
+            aes=aes == "aes",
+            files=files,
+            bytes=size,
+            archive_bytes=os.path.getsize(archive),
+            seconds=round(best["seconds"], 4),
+            cpu_seconds=round(best["cpu_seconds"], 4),
+        )
+        results.append(best)
+    os.remove(archive)
+    shutil.rmtree(extract_to, ignore_errors=True)
+    return results
+
+
+def _rates(seconds: float, files: int, size: int) -> Dict:
+    seconds = max(seconds, 1e-9)
+    return {
+        "mb_per_s": round(size / MiB / seconds, 2),
+        "files_per_s": round(files / seconds, 1),
+    }
+
+
+def _name(result: Dict) -> str:
+    aes = "+aes" if result["aes"] else ""
+    return f"{result['corpus']} {result['operation']} {result['method']}{aes}"
+
+
+def _format(result: Dict) -> str:
+    aes = "+aes" if result["aes"] else ""
+    return (
+        f"{result['corpus']:<7} {result['operation']:<6}"
+        f" {result['method'] + aes:<12}"
+        f" {result['mb_per_s']:>9.2f} MB/s {result['files_per_s']:>10.1f}"
+        f" files/s {result['peak_rss_mb']:>7.1f} MB RSS"
+    )
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Regressions of current against baseline beyond the tolerance: lower
+    throughput, higher peak RSS or slower startup
+    """
+    regressions = []
+    before = {_key(result): result for result in baseline["results"]}
+    for result in current["results"]:
+        old = before.get(_key(result))
+        if old is None:
+            continue
+        name = _name(result)
+        if result["mb_per_s"] < old["mb_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {old['mb_per_s']} -> {result['mb_per_s']} MB/s"
+            )
+        if result["peak_rss_mb"] > old["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: {old['peak_rss_mb']} -> {result['peak_rss_mb']}"
+                " MB peak RSS"
+            )
+    old_startup = baseline.get("startup", {}).get("seconds")
+    new_startup = current["startup"]["seconds"]
+    if old_startup and new_startup > old_startup * (1 + tolerance):
+        regressions.append(f"startup: {old_startup} -> {new_startup} s")
+    return regressions
+
+
+def _key(result: Dict) -> Tuple:
+    return (
+        result["corpus"],
+        result["operation"],
+        result["method"],
+        result["aes"],
+    )
+
+
+def main() -> None:
+    if sys.argv[1:2] == ["_measure"]:
+        _run_measure(*sys.argv[2:])
+        return
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--corpus",
+        nargs="+",
+        choices=list(CORPORA),
+        default=list(CORPORA),
+        help="Corpora to run",
+    )
+    parser.add_argument(
+        "--method",
+        nargs="+",
+        choices=METHODS,
+        default=METHODS,
+        help="Compression methods to run",
+    )
+    parser.add_argument(
+        "--aes",
+        nargs="+",
+        choices=["plain", "aes"],
+        default=["plain", "aes"],
+        help="Run without and/or with AES encryption",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Grow or shrink the corpora (0.1 for a quick run)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Runs per case, best is kept"
+    )
+    parser.add_argument(
+        "--corpus-dir",
+        default=os.path.join(tempfile.gettempdir(), "zipper-corpora"),
+        help="Where generated corpora are kept between runs",
+    )
+    parser.add_argument("--output", help="Save the results as JSON here")
+    parser.add_argument(
+        "--baseline", help="Results of an earlier run to compare against"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Fraction by which a result may be worse than the baseline",
+    )
+    args = parser.parse_args()
+
+    results = run(args)
+    print(f"startup {results['startup']['seconds']} s", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,83 @@
 import logging
+import os
 
 __app_name__ = "Zipper"
 __version__ = "0.1.0"
 
 # Static configuration
 CONFIG = {
-    "preferred_parser": "typer",  # Valid choice typer, argparse
+    # Valid choice typer, argparse or auto: typer in a terminal, argparse
+    # (which starts much faster) in scripts and pipelines
+    "preferred_parser": "auto",
+    # Hand log records to a background thread, keeping log I/O off the
+    # threads that compress and extract
+    "log_queue": False,
 }
 
 LOG_FORMAT = "%(asctime)s:%(levelname)s:%(filename)s:%(lineno)d:%(message)s"
-logging.basicConfig(level=logging.DEBUG, format=LOG_FORMAT)
+# Per-file lines, between INFO and DEBUG: shown with -v, debug with -vv
+VERBOSE = 15
+logging.addLevelName(VERBOSE, "VERBOSE")
 
 logger = logging.getLogger(__name__)
+
+_handler = None
+_listener = None
+
+
+def setup_logging(verbosity: int = 0) -> None:
+    """Log to stderr at the level for the -v/-q count: summaries by
+    default, per-file lines from -v, debugging from -vv, warnings only
+    with -q and errors only with -qq
+    """
+    global _handler, _listener
+    levels = {
+        -2: logging.ERROR,
+        -1: logging.WARNING,
+        0: logging.INFO,
+        1: VERBOSE,
+        2: logging.DEBUG,
+    }
+    logger.setLevel(levels[max(-2, min(verbosity, 2))])
+    stop_logging()
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(LOG_FORMAT))
+    if CONFIG.get("log_queue"):
+        import atexit
+        import queue
+
+        from logging.handlers import QueueHandler, QueueListener
+
+        records = queue.SimpleQueue()
+        _listener = QueueListener(records, stream)
+        _listener.start()
+        _handler = QueueHandler(records)
+        atexit.register(stop_logging)
+    else:
+        _handler = stream
+    logger.addHandler(_handler)
+
+
+def stop_logging() -> None:
+    """Flush queued records and remove the handler setup_logging added"""
+    global _handler, _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+    if _handler:
+        logger.removeHandler(_handler)
+        _handler = None
+
+
+def _log_directly_in_child() -> None:
+    # A forked process has no listener thread to drain the queue
+    global _handler, _listener
+    if _listener:
+        logger.removeHandler(_handler)
+        _handler = _listener.handlers[0]
+        _listener = None
+        logger.addHandler(_handler)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_log_directly_in_child)
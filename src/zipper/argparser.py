@@ -1,7 +1,9 @@
 import argparse
+import sys
+
+from zipper import setup_logging
+from zipper.commands import lister, unzipper, verifier, zipper
 from zipper.preprocessor import argparse_preprocessor
-from zipper.unzip import unzipper
-from zipper.zip import zipper
 
 
 def main():
@@ -10,16 +12,34 @@ def main():
         description="(Un)zip files/folders with optional AES encryption"
     )
     subparsers = parser.add_subparsers(dest="mode", required=False)
+    # Shared by every mode
+    logging_options = argparse.ArgumentParser(add_help=False)
+    logging_options.add_argument(
+        "--verbose",
+        "-v",
+        action="count",
+        default=0,
+        help="List each file (-vv for debugging output)",
+    )
+    logging_options.add_argument(
+        "--quiet",
+        "-q",
+        action="count",
+        default=0,
+        help="Only report warnings (-qq for errors only)",
+    )
 
     # --- ZIP MODE ---
-    zip_parser = subparsers.add_parser("zip", help="Zip files and folders")
+    zip_parser = subparsers.add_parser(
+        "zip", help="Zip files and folders", parents=[logging_options]
+    )
+    zip_parser.add_argument("inputs", nargs="*", help="File(s) to zip")
     zip_parser.add_argument(
-        "inputs", nargs="*", default=["*"], help="File(s) to zip"
+        "--exclude", "-e", nargs="*", default=[], help="Exclude patterns"
     )
     zip_parser.add_argument(
-        "--exclude", nargs="*", default=[], help="Exclude patterns"
+        "--output", "-o", help="Archive to create (- for stdout)"
     )
-    zip_parser.add_argument("--output", "-o", help="File(s) to zip")
     zip_parser.add_argument(
         "--password", action="store_true", help="Prompt for password"
     )
@@ -28,34 +48,234 @@ def main():
     )
     zip_parser.add_argument(
         "--compression",
-        choices=["deflate", "store", "bzip2", "lzma"],
+        choices=["deflate", "store", "bzip2", "lzma", "auto"],
         default="deflate",
         help="Compression algorithm",
     )
+    zip_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for compression (0 = one per CPU)",
+    )
+    zip_parser.add_argument(
+        "--update",
+        action="store_true",
+        help="Refresh an existing archive, recompressing only changed files",
+    )
+    zip_parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="With --update, also compare CRC-32 of files",
+    )
+    zip_parser.add_argument(
+        "--buffer-size",
+        type=int,
+        default=64,
+        help="MiB of file data to read ahead and buffer while compressing",
+    )
+    zip_parser.add_argument(
+        "--files-from",
+        help="Also zip the paths listed in this file, one per line "
+        "(- for stdin); needs --output",
+    )
+    zip_parser.add_argument(
+        "--null",
+        action="store_true",
+        help="Paths in --files-from end with NUL, as find -print0 writes",
+    )
+    zip_parser.add_argument(
+        "--stats",
+        choices=["text", "json"],
+        help="Report time per stage, sizes per method and the slowest "
+        "files to stderr (--stats=json for JSON)",
+    )
 
     # --- UNZIP MODE ---
-    unzip_parser = subparsers.add_parser("unzip", help="Unzip file(s)")
+    unzip_parser = subparsers.add_parser(
+        "unzip", help="Unzip file(s)", parents=[logging_options]
+    )
     unzip_parser.add_argument(
-        "inputs", nargs="*", default=["*"], help="Zip file(s) to extract"
+        "inputs",
+        nargs="*",
+        default=["*"],
+        help="Zip file(s) to extract (- for stdin)",
     )
     unzip_parser.add_argument("--output", "-o", help="Folder to extract to")
     unzip_parser.add_argument(
         "--base", default=".", help="Base input path for files to unzip"
     )
+    unzip_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for extraction (0 = one per CPU)",
+    )
+    unzip_parser.add_argument(
+        "--include",
+        "-i",
+        nargs="*",
+        default=[],
+        help="Extract only the members matching these patterns",
+    )
+    unzip_parser.add_argument(
+        "--exclude",
+        "-e",
+        nargs="*",
+        default=[],
+        help="Members to leave out",
+    )
+    overwrite = unzip_parser.add_mutually_exclusive_group()
+    overwrite.add_argument(
+        "--skip-existing",
+        dest="overwrite",
+        action="store_const",
+        const="never",
+        default="always",
+        help="Leave files that already exist alone",
+    )
+    overwrite.add_argument(
+        "--if-changed",
+        dest="overwrite",
+        action="store_const",
+        const="if-changed",
+        help="Only rewrite files whose size, mtime or CRC-32 differ",
+    )
+    unzip_parser.add_argument(
+        "--password-fd",
+        type=int,
+        help="Read passwords, one per line, from this file descriptor "
+        "instead of prompting (ZIPPER_PASSWORD works too)",
+    )
+    unzip_parser.add_argument(
+        "--stats",
+        choices=["text", "json"],
+        help="Report time per stage, sizes per method and the slowest "
+        "files to stderr (--stats=json for JSON)",
+    )
+
+    # --- LIST MODE ---
+    list_parser = subparsers.add_parser(
+        "list",
+        help="List the members of zip file(s)",
+        parents=[logging_options],
+    )
+    list_parser.add_argument("inputs", nargs="+", help="Zip file(s) to list")
+    list_parser.add_argument(
+        "--base", default=".", help="Base input path for files to list"
+    )
+    list_parser.add_argument(
+        "--include",
+        "-i",
+        nargs="*",
+        default=[],
+        help="List only the members matching these patterns",
+    )
+    list_parser.add_argument(
+        "--exclude",
+        "-e",
+        nargs="*",
+        default=[],
+        help="Members to leave out",
+    )
+    list_parser.add_argument(
+        "--index",
+        action="store_true",
+        help="Save an index next to the archive to speed up later listings",
+    )
+
+    # --- TEST MODE ---
+    test_parser = subparsers.add_parser(
+        "test",
+        help="Check zip file(s) for errors without extracting",
+        parents=[logging_options],
+    )
+    test_parser.add_argument("inputs", nargs="+", help="Zip file(s) to test")
+    test_parser.add_argument(
+        "--base", default=".", help="Base input path for files to test"
+    )
+    test_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for testing (0 = one per CPU)",
+    )
+    test_parser.add_argument(
+        "--include",
+        "-i",
+        nargs="*",
+        default=[],
+        help="Test only the members matching these patterns",
+    )
+    test_parser.add_argument(
+        "--exclude",
+        "-e",
+        nargs="*",
+        default=[],
+        help="Members to leave out",
+    )
+    test_parser.add_argument(
+        "--password-fd",
+        type=int,
+        help="Read passwords, one per line, from this file descriptor "
+        "instead of prompting (ZIPPER_PASSWORD works too)",
+    )
 
     args = parser.parse_args()
+    setup_logging(getattr(args, "verbose", 0) - getattr(args, "quiet", 0))
 
     if args.mode == "unzip":
-        unzipper(args.inputs, output=args.output, base=args.base)
-    else:
-        zipper(
+        if not unzipper(
+            args.inputs,
+            output=args.output,
+            base=args.base,
+            jobs=args.jobs,
+            password_fd=args.password_fd,
+            include_members=args.include,
+            exclude_members=args.exclude,
+            overwrite=args.overwrite,
+            stats_format=args.stats,
+        ):
+            sys.exit(1)
+    elif args.mode == "test":
+        if not verifier(
+            args.inputs,
+            base=args.base,
+            jobs=args.jobs,
+            password_fd=args.password_fd,
+            include_members=args.include,
+            exclude_members=args.exclude,
+        ):
+            sys.exit(1)
+    elif args.mode == "list":
+        lister(
             args.inputs,
+            base=args.base,
+            include_members=args.include,
+            exclude_members=args.exclude,
+            index=args.index,
+        )
+    else:
+        if args.files_from:
+            inputs = args.inputs
+        else:
+            inputs = args.inputs or ["*"]
+        if not zipper(
+            inputs,
             exclude_patterns=args.exclude,
             output=args.output or "",
             base=args.base or ".",
             prompt=args.password or False,
             compression=args.compression or "deflate",
-        )
+            jobs=args.jobs,
+            update=args.update,
+            checksum=args.checksum,
+            buffer_size=args.buffer_size * 1024 * 1024,
+            files_from=args.files_from,
+            null=args.null,
+            stats_format=args.stats,
+        ):
+            sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,28 @@
+"""The commands behind the command line parsers. Each one imports its
+engine (and with it pyzipper and pycryptodomex) only when it runs, so
+that --help and usage errors return without loading them.
+"""
+
+
+def zipper(*args, **kwargs) -> bool:
+    from zipper.zip import zipper
+
+    return zipper(*args, **kwargs)
+
+
+def unzipper(*args, **kwargs) -> bool:
+    from zipper.unzip import unzipper
+
+    return unzipper(*args, **kwargs)
+
+
+def verifier(*args, **kwargs) -> bool:
+    from zipper.unzip import verifier
+
+    return verifier(*args, **kwargs)
+
+
+def lister(*args, **kwargs):
+    from zipper.listing import lister
+
+    return lister(*args, **kwargs)
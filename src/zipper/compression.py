@@ -0,0 +1,73 @@
+"""Per-member choice of compression method for ``--compression auto``"""
+import math
+import os
+
+from collections import Counter
+
+import pyzipper
+
+ZIP_AUTO = -1  # Not a real method: pick one per member
+
+METHOD_NAMES = {
+    pyzipper.ZIP_STORED: "Stored",
+    pyzipper.ZIP_DEFLATED: "Deflate",
+    pyzipper.ZIP_BZIP2: "BZip2",
+    pyzipper.ZIP_LZMA: "LZMA",
+}
+
+# Formats that are compressed already, deflating them gains next to nothing
+INCOMPRESSIBLE_EXTENSIONS = frozenset(
+    # Archives and compressed streams
+    ".7z .apk .br .bz2 .cab .gz .jar .lz4 .lzma .rar .tbz2 .tgz .txz .whl"
+    " .xz .z .zip .zst"
+    # Images, audio and video
+    " .avif .gif .heic .jpeg .jpg .png .webp"
+    " .aac .flac .m4a .m4v .mkv .mov .mp3 .mp4 .ogg .opus .webm .wmv"
+    # Documents and fonts stored in zip or deflate containers
+    " .docx .epub .odp .ods .odt .pptx .woff .woff2 .xlsx".split()
+)
+
+SAMPLE_SIZE = 16 * 1024
+# Shannon entropy (bits per byte) above which a sample looks compressed
+# or random; plain text is around 4-5, deflate output close to 8
+ENTROPY_THRESHOLD = 7.5
+
+# Salt (256-bit key), password verifier and HMAC added by WinZip AES
+AES_OVERHEAD = 16 + 2 + 10
+
+
+def choose_method(
+    file: str, st: os.stat_result, sample: bytes | None = None
+) -> int:
+    """Pick STORED or DEFLATED for a file from its extension and a sample
+    of its first block (read from the file unless given)
+    """
+    if st.st_size == 0:
+        return pyzipper.ZIP_STORED
+    if os.path.splitext(file)[1].lower() in INCOMPRESSIBLE_EXTENSIONS:
+        return pyzipper.ZIP_STORED
+    if sample is None:
+        with open(file, "rb") as src:
+            sample = src.read(SAMPLE_SIZE)
+    if entropy(sample) > ENTROPY_THRESHOLD:
+        return pyzipper.ZIP_STORED
+    return pyzipper.ZIP_DEFLATED
+
+
+def entropy(data: bytes) -> float:
+    """Shannon entropy of data in bits per byte"""
+    if not data:
+        return 0.0
+    total = len(data)
+    return -sum(
+        count / total * math.log2(count / total)
+        for count in Counter(data).values()
+    )
+
+
+def pays_off(zinfo: pyzipper.ZipInfo) -> bool:
+    """Whether a written member came out smaller than storing it would"""
+    stored_size = zinfo.file_size
+    if zinfo.flag_bits & 0x1:  # Encrypted
+        stored_size += AES_OVERHEAD
+    return zinfo.compress_size < stored_size
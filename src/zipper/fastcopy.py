@@ -0,0 +1,109 @@
+"""Kernel-side copies and mmap CRC-32 for members stored without compression
+"""
+import errno
+import mmap
+import os
+import zlib
+
+from typing import BinaryIO
+
+# Upper bound per system call; Linux caps a single copy just below 2 GiB
+COPY_CHUNK = 1024 * 1024 * 1024
+READ_CHUNK = 1024 * 1024
+
+# Errors meaning "not for these files", as opposed to an I/O failure
+UNSUPPORTED = {
+    errno.EBADF,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+    errno.EXDEV,
+}
+
+
+def fileno(fp: BinaryIO) -> int | None:
+    """File descriptor behind a file object, None when there is none"""
+    try:
+        return fp.fileno()
+    except (AttributeError, OSError):
+        return None
+
+
+def copy_range(
+    src_fd: int,
+    dst_fd: int,
+    count: int,
+    src_offset: int = 0,
+    dst_offset: int = 0,
+) -> None:
+    """Copy count bytes between file descriptors at the given offsets,
+    inside the kernel when the platform and file systems allow it
+    """
+    methods = [_read_write]
+    if hasattr(os, "sendfile"):
+        methods.insert(0, _sendfile)
+    if hasattr(os, "copy_file_range"):
+        methods.insert(0, _copy_file_range)
+    while count > 0:
+        size = min(count, COPY_CHUNK)
+        try:
+            copied = methods[0](src_fd, dst_fd, size, src_offset, dst_offset)
+        except OSError as e:
+            if e.errno in UNSUPPORTED and len(methods) > 1:
+                methods.pop(0)
+                continue
+            raise
+        if not copied:
+            raise EOFError("File is shorter than expected")
+        count -= copied
+        src_offset += copied
+        dst_offset += copied
+
+
+def _copy_file_range(
+    src_fd: int, dst_fd: int, size: int, src_offset: int, dst_offset: int
+) -> int:
+    return os.copy_file_range(src_fd, dst_fd, size, src_offset, dst_offset)
+
+
+def _sendfile(
+    src_fd: int, dst_fd: int, size: int, src_offset: int, dst_offset: int
+) -> int:
+    os.lseek(dst_fd, dst_offset, os.SEEK_SET)
+    return os.sendfile(dst_fd, src_fd, src_offset, size)
+
+
+def _read_write(
+    src_fd: int, dst_fd: int, size: int, src_offset: int, dst_offset: int
+) -> int:
+    if hasattr(os, "pread"):
+        # Leaves the offset alone, which forked processes may share
+        data = os.pread(src_fd, min(size, READ_CHUNK), src_offset)
+    else:
+        os.lseek(src_fd, src_offset, os.SEEK_SET)
+        data = os.read(src_fd, min(size, READ_CHUNK))
+    if not data:
+        return 0
+    os.lseek(dst_fd, dst_offset, os.SEEK_SET)
+    return os.write(dst_fd, data)
+
+
+def file_crc(fd: int, size: int, offset: int = 0) -> int:
+    """CRC-32 of size bytes of a file, read through a memory mapping"""
+    if size == 0:
+        return 0
+    # mmap offsets have to be aligned to the allocation granularity
+    start = offset - offset % mmap.ALLOCATIONGRANULARITY
+    skip = offset - start
+    with mmap.mmap(
+        fd, skip + size, access=mmap.ACCESS_READ, offset=start
+    ) as mapping:
+        if hasattr(mapping, "madvise"):
+            mapping.madvise(mmap.MADV_SEQUENTIAL)
+        crc = 0
+        with memoryview(mapping) as view:
+            for position in range(skip, skip + size, COPY_CHUNK):
+                with view[position : position + COPY_CHUNK] as chunk:
+                    crc = zlib.crc32(chunk, crc)
+        return crc
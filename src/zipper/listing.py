@@ -0,0 +1,235 @@
+"""List archive members from the central directory, without extracting.
+
+With --index, an archive gets an index sidecar (an SQLite database next
+to the archive) holding what the listing needs, so that listing it
+again skips the central directory and looking up members by full name
+is a keyed query. It is never written unasked: a file left next to the
+archive would be picked up by the next `zip "*"` or `unzip "*"`.
+"""
+import glob
+import os
+import sqlite3
+import tempfile
+
+from contextlib import closing
+from typing import Iterable, Iterator, List, NamedTuple, Tuple
+
+import pyzipper
+
+from zipper import logger
+from zipper.compression import METHOD_NAMES
+from zipper.matcher import member_filter
+from zipper.members import MASK_ENCRYPTED
+from zipper.reader import close_archives, open_archive
+from zipper.utils import get_absolute_path, get_base_path
+
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+
+
+class Entry(NamedTuple):
+    """What a listing shows of one member"""
+
+    name: str
+    size: int
+    compress_size: int
+    method: int
+    date_time: str
+    encrypted: bool
+
+
+def lister(
+    include_patterns: List[str],
+    *,
+    base: str = ".",
+    include_members: List[str] | None = None,
+    exclude_members: List[str] | None = None,
+    index: bool = False,
+) -> None:
+    base = get_base_path(base)
+    for file_input in include_patterns:
+        matches = glob.glob(file_input, recursive=False)
+        if not matches:
+            logger.error("Zip file not found: %s", file_input)
+        for zipped_file in matches:
+            zip_path = get_absolute_path(zipped_file, base)
+            try:
+                entries = list_members(
+                    zip_path, include_members, exclude_members, index
+                )
+            except (pyzipper.BadZipFile, OSError):
+                logger.warning("Not a valid zip file: %s", zip_path)
+                continue
+            print(format_listing(zip_path, entries))
+    close_archives()
+
+
+def list_members(
+    zip_path: str,
+    include_members: List[str] | None = None,
+    exclude_members: List[str] | None = None,
+    index: bool = False,
+) -> List[Entry]:
+    """Entries of the members of an archive (those matching the member
+    patterns), from its index sidecar when one is up to date. A sidecar
+    is only written when index is set.
+    """
+    st = os.stat(zip_path)
+    key = (st.st_mtime_ns, st.st_size)
+    sidecar = zip_path + INDEX_SUFFIX
+    entries = _query_index(sidecar, key, include_members)
+    if entries is None:
+        members = open_archive(zip_path).members
+        entries = [_entry(member) for member in members]
+        if index:
+            _write_index(sidecar, key, entries)
+    selected = member_filter(include_members, exclude_members)
+    if selected is None:
+        return list(entries)
+    return [entry for entry in entries if selected(entry.name)]
+
+
+def format_listing(zip_path: str, entries: List[Entry]) -> str:
+    """The listing of one archive, like `unzip -v` prints it"""
+    lines = [
+        f"Archive: {zip_path}",
+        f"{'Length':>12}  {'Size':>12}  {'Ratio':>5}  {'Method':<11}"
+        f"  {'Date':<10} {'Time':<5}  Name",
+        f"{'-' * 12}  {'-' * 12}  {'-' * 5}  {'-' * 11}  {'-' * 16}  ----",
+    ]
+    total_size = total_compressed = 0
+    for entry in entries:
+        total_size += entry.size
+        total_compressed += entry.compress_size
+        method = METHOD_NAMES.get(entry.method, str(entry.method))
+        if entry.encrypted:
+            method += "+AES" if entry.method in METHOD_NAMES else "+Enc"
+        lines.append(
+            f"{entry.size:>12}  {entry.compress_size:>12}"
+            f"  {_ratio(entry.size, entry.compress_size):>5}  {method:<11}"
+            f"  {entry.date_time}  {entry.name}"
+        )
+    lines.append(f"{'-' * 12}  {'-' * 12}  {'-' * 5}  {' ' * 29}  ----")
+    lines.append(
+        f"{total_size:>12}  {total_compressed:>12}"
+        f"  {_ratio(total_size, total_compressed):>5}  {' ' * 29}"
+        f"  {len(entries)} file(s)"
+    )
+    return "\n".join(lines)
+
+
+def _ratio(size: int, compress_size: int) -> str:
+    if not size:
+        return "0%"
+    return f"{round(100 * (1 - compress_size / size))}%"
+
+
+def _entry(member: pyzipper.ZipInfo) -> Entry:
+    return Entry(
+        member.filename,
+        member.file_size,
+        member.compress_size,
+        member.compress_type,
+        "{:04d}-{:02d}-{:02d} {:02d}:{:02d}".format(*member.date_time[:5]),
+        bool(member.flag_bits & MASK_ENCRYPTED),
+    )
+
+
+def _query_index(
+    sidecar: str, key: Tuple[int, int], include_members: List[str] | None
+) -> List[Entry] | None:
+    """Entries from an index sidecar that describes the archive as it is
+    now, or None. Members named in full are looked up by key.
+    """
+    if not os.path.exists(sidecar):
+        return None
+    try:
+        db = sqlite3.connect(f"file:{sidecar}?mode=ro", uri=True)
+        with closing(db):
+            meta = dict(db.execute("SELECT key, value FROM meta"))
+            if meta != {
+                "version": INDEX_VERSION,
+                "mtime_ns": key[0],
+                "size": key[1],
+            }:
+                logger.debug("Index %s is out of date", sidecar)
+                return None
+            query = "SELECT * FROM members"
+            names = _full_names(include_members)
+            if names:
+                # A name also selects the members below it
+                query += " WHERE " + " OR ".join(
+                    ["name = ? OR (name >= ? AND name < ?)"] * len(names)
+                )
+                params = [p for n in names for p in (n, n + "/", n + "0")]
+            else:
+                params = []
+            query += " ORDER BY position"
+            return [
+                Entry(*row[1:6], bool(row[6]))
+                for row in db.execute(query, params)
+            ]
+    except sqlite3.Error as e:
+        logger.debug("Ignoring index %s: %s", sidecar, e)
+        return None
+
+
+def _full_names(include_members: List[str] | None) -> List[str] | None:
+    """The member names if every include pattern is an anchored path
+    without wildcards, else None (patterns need a full scan)
+    """
+    if not include_members:
+        return None
+    names = []
+    for pattern in include_members:
+        name = pattern.rstrip("/")
+        if glob.has_magic(name) or "/" not in name or name.startswith("/"):
+            return None
+        names.append(name)
+    return names
+
+
+def _write_index(
+    sidecar: str, key: Tuple[int, int], entries: Iterable[Entry]
+) -> None:
+    """Write the index sidecar, skipping it where that is not possible"""
+    directory = os.path.dirname(sidecar)
+    try:
+        fd, temp_path = tempfile.mkstemp(
+            dir=directory, prefix=".", suffix=INDEX_SUFFIX
+        )
+    except OSError as e:
+        logger.debug("Not indexing to %s: %s", sidecar, e)
+        return
+    os.close(fd)
+    try:
+        with closing(sqlite3.connect(temp_path)) as db, db:
+            db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value)")
+            db.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [
+                    ("version", INDEX_VERSION),
+                    ("mtime_ns", key[0]),
+                    ("size", key[1]),
+                ],
+            )
+            db.execute(
+                "CREATE TABLE members (position INTEGER PRIMARY KEY,"
+                " name TEXT, size INTEGER, compress_size INTEGER,"
+                " method INTEGER, date_time TEXT, encrypted INTEGER)"
+            )
+            db.executemany(
+                "INSERT INTO members VALUES (?, ?, ?, ?, ?, ?, ?)",
+                _rows(entries),
+            )
+            db.execute("CREATE INDEX members_name ON members (name)")
+        os.replace(temp_path, sidecar)
+        logger.debug("Indexed members to %s", sidecar)
+    except (OSError, sqlite3.Error) as e:
+        logger.debug("Not indexing to %s: %s", sidecar, e)
+        os.remove(temp_path)
+
+
+def _rows(entries: Iterable[Entry]) -> Iterator[Tuple]:
+    for position, entry in enumerate(entries):
+        yield (position, *entry)
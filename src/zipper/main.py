@@ -1,5 +1,7 @@
 """Utility to un(zip) files and folders
-Prefers to use typer to provide cli functionality and fallbacks to argparse
+Prefers to use typer to provide cli functionality and fallbacks to argparse.
+Left to choose, it takes argparse when not run from a terminal: importing
+typer (with click and rich) costs scripts more than the rest of startup.
 """
 from zipper import CONFIG
 import os
@@ -8,7 +10,7 @@ import sys
 sys.path.insert(0, os.path.abspath("src"))
 
 def run():
-    if CONFIG.get("preferred_parser", "typer") == "typer":
+    if _parser() == "typer":
         try:
             from zipper.preprocessor import typer_preprocessor
             from zipper.typer_parser import app
@@ -23,5 +25,14 @@ def run():
         return main()
 
 
+def _parser() -> str:
+    parser = CONFIG.get("preferred_parser", "auto")
+    if parser != "auto":
+        return parser
+    if sys.stdin.isatty() and sys.stdout.isatty():
+        return "typer"
+    return "argparse"
+
+
 if __name__ == "__main__":
     run()
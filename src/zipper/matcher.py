@@ -0,0 +1,158 @@
+"""Exclude patterns compiled once into a single matcher.
+
+Patterns follow gitignore conventions where they differ from fnmatch:
+  - without a slash, a pattern matches the last path component at any
+    depth (``*.pyc``, ``node_modules``)
+  - a relative pattern with a slash (``build/out``) is anchored at the base
+    directory; a pattern starting with a wildcard (``**/cache/*``) or an
+    absolute one is matched against the whole path as before
+  - a trailing slash (``build/``) only matches directories
+Matching a directory lets walkers prune the whole subtree before descent.
+The same patterns select archive members on extraction.
+"""
+import fnmatch
+import glob
+import os
+import re
+
+from typing import Callable, Iterable, List
+
+
+class _Rules:
+    """Patterns for one subject (name or full path) split by fast path"""
+
+    def __init__(self):
+        self.literals = set()
+        self.prefixes = []
+        self.suffixes = []
+        self.regexes = []
+
+    def add(self, pattern: str) -> None:
+        rest = pattern.lstrip("*")
+        head = pattern.rstrip("*")
+        if not glob.has_magic(pattern):
+            self.literals.add(pattern)
+        # "*" matches any run of characters, separators included, so a
+        # single leading or trailing run of stars is a suffix or prefix test
+        elif rest != pattern and rest and not glob.has_magic(rest):
+            self.suffixes.append(rest)
+        elif head != pattern and head and not glob.has_magic(head):
+            self.prefixes.append(head)
+        else:
+            self.regexes.append(fnmatch.translate(pattern))
+
+    def compile(self) -> Callable[[str], bool]:
+        literals = frozenset(self.literals)
+        prefixes = tuple(self.prefixes)
+        suffixes = tuple(self.suffixes)
+        regex = None
+        if self.regexes:
+            regex = re.compile("|".join(self.regexes)).match
+
+        def match(subject: str) -> bool:
+            return (
+                subject in literals
+                or bool(prefixes and subject.startswith(prefixes))
+                or bool(suffixes and subject.endswith(suffixes))
+                or (regex is not None and regex(subject) is not None)
+            )
+
+        return match
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.literals or self.prefixes or self.suffixes or self.regexes
+        )
+
+
+class PathMatcher:
+    """Compiled set of exclude patterns, see compile_patterns"""
+
+    def __init__(self, patterns: Iterable[str], base: str):
+        names, paths = _Rules(), _Rules()
+        dir_names, dir_paths = _Rules(), _Rules()
+        for pattern in patterns:
+            dir_only = pattern.endswith(("/", os.sep))
+            pattern = pattern.rstrip("/" + os.sep)
+            if not pattern:
+                continue
+            if "/" not in pattern and os.sep not in pattern:
+                rules = dir_names if dir_only else names
+            else:
+                if not (os.path.isabs(pattern) or pattern.startswith("*")):
+                    pattern = os.path.join(base, pattern)
+                if os.path.isabs(pattern):
+                    # Paths being matched are normalised, so ./a, a//b
+                    # and a/b/../b must be too
+                    pattern = os.path.normpath(pattern)
+                rules = dir_paths if dir_only else paths
+            rules.add(os.path.normcase(pattern))
+        # (dir_only, by_name, match) in cheapest-first order
+        self._rules = [
+            (dir_only, by_name, rules.compile())
+            for dir_only, by_name, rules in (
+                (False, True, names),
+                (False, False, paths),
+                (True, True, dir_names),
+                (True, False, dir_paths),
+            )
+            if rules
+        ]
+
+    def match(self, path: str, is_dir: bool = False) -> bool:
+        """Whether an (absolute) path is excluded"""
+        path = os.path.normcase(path)
+        name = path.rpartition(os.sep)[2]
+        for dir_only, by_name, match in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if match(name if by_name else path):
+                return True
+        return False
+
+    def match_member(self, arcname: str) -> bool:
+        """Whether an archive member, or a directory above it, matches;
+        for matchers from compile_member_patterns
+        """
+        parts = arcname.strip("/").split("/")
+        path = ""
+        for depth, part in enumerate(parts, 1):
+            path += os.sep + part
+            is_dir = depth < len(parts) or arcname.endswith("/")
+            if self.match(path, is_dir):
+                return True
+        return False
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+
+def compile_patterns(patterns: List[str], base: str = "") -> PathMatcher:
+    """Compile exclude patterns; anchored ones are relative to base
+    (the current directory by default)
+    """
+    return PathMatcher(patterns, os.path.abspath(base or os.getcwd()))
+
+
+def compile_member_patterns(patterns: List[str]) -> PathMatcher:
+    """Compile patterns for archive member names; anchored ones are
+    relative to the root of the archive
+    """
+    return PathMatcher(patterns, os.sep)
+
+
+def member_filter(
+    include_members: List[str] | None, exclude_members: List[str] | None
+) -> Callable[[str], bool] | None:
+    """Whether to take a member, by name, or None to take them all"""
+    if not include_members and not exclude_members:
+        return None
+    include = compile_member_patterns(include_members or [])
+    exclude = compile_member_patterns(exclude_members or [])
+
+    def selected(arcname: str) -> bool:
+        if include and not include.match_member(arcname):
+            return False
+        return not exclude.match_member(arcname)
+
+    return selected
@@ -0,0 +1,264 @@
+"""Encode archive members outside of ZipFile.write so they can be
+compressed elsewhere (e.g. worker processes) and appended afterwards
+"""
+import bz2
+import copy
+import os
+import struct
+import time
+import zlib
+
+from typing import BinaryIO, Iterable, Iterator, List, Tuple
+
+import pyzipper
+from pyzipper.zipfile import (
+    LZMACompressor,
+    sizeFileHeader,
+    stringFileHeader,
+)
+from pyzipper.zipfile_aes import AESZipEncrypter, AESZipInfo
+from zipper import stats
+from zipper.compression import SAMPLE_SIZE, ZIP_AUTO, choose_method, pays_off
+from zipper.fastcopy import copy_range, file_crc, fileno
+
+MASK_ENCRYPTED = 1 << 0
+MASK_COMPRESS_OPTION_1 = 1 << 1
+MASK_USE_DATA_DESCRIPTOR = 1 << 3
+
+READ_SIZE = 1024 * 1024
+
+
+def get_compressor(compression_method: int):
+    if compression_method == pyzipper.ZIP_DEFLATED:
+        return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    if compression_method == pyzipper.ZIP_BZIP2:
+        return bz2.BZ2Compressor()
+    if compression_method == pyzipper.ZIP_LZMA:
+        return LZMACompressor()
+    return None
+
+
+def new_zipinfo(arcname: str, st: os.stat_result) -> AESZipInfo:
+    """ZipInfo for a regular file from a stat result already at hand
+    (the same fields ZipInfo.from_file fills in after its own stat)
+    """
+    arcname = os.path.normpath(os.path.splitdrive(arcname)[1])
+    arcname = arcname.lstrip(os.sep + (os.altsep or ""))
+    zinfo = AESZipInfo(arcname, time.localtime(st.st_mtime)[0:6])
+    zinfo.external_attr = (st.st_mode & 0xFFFF) << 16
+    zinfo.file_size = st.st_size
+    return zinfo
+
+
+def compress_member(
+    file: str,
+    arcname: str,
+    compression_method: int,
+    password: str | None,
+    st: os.stat_result | None = None,
+    data: bytes | None = None,
+) -> Tuple[AESZipInfo, bytes]:
+    """Compress (and encrypt) a file into the bytes that follow its local
+    header, returning them with the ZipInfo describing the member. data
+    is the file's contents when they were read already.
+    """
+    st = st or os.stat(file)
+    if compression_method == ZIP_AUTO:
+        sample = None if data is None else data[:SAMPLE_SIZE]
+        method = choose_method(file, st, sample)
+        zinfo, payload = compress_member(
+            file, arcname, method, password, st, data
+        )
+        if method != pyzipper.ZIP_STORED and not pays_off(zinfo):
+            return compress_member(
+                file, arcname, pyzipper.ZIP_STORED, password, st, data
+            )
+        return zinfo, payload
+
+    zinfo = new_zipinfo(arcname, st)
+    zinfo.compress_type = compression_method
+    zinfo.flag_bits = 0
+    if compression_method == pyzipper.ZIP_LZMA:
+        # Compressed data includes an end-of-stream (EOS) marker
+        zinfo.flag_bits |= MASK_COMPRESS_OPTION_1
+    compressor = get_compressor(compression_method)
+    compress = compressor.compress if compressor else None
+    encrypter = encrypt = None
+    chunks = []
+    if password:
+        encrypter = AESZipEncrypter(password.encode(), nbits=256)
+        encrypter.update_zipinfo(zinfo)
+        zinfo.flag_bits |= MASK_ENCRYPTED
+        chunks.append(encrypter.encryption_header())
+        encrypt = encrypter.encrypt
+    if stats.current:
+        if compress:
+            compress = stats.current.timed("compress", compress)
+        if encrypt:
+            encrypt = stats.current.timed("encrypt", encrypt)
+
+    crc = 0
+    file_size = 0
+    for chunk in _file_chunks(file, data):
+        crc = zlib.crc32(chunk, crc)
+        file_size += len(chunk)
+        if compress:
+            chunk = compress(chunk)
+        if encrypt:
+            chunk = encrypt(chunk)
+        chunks.append(chunk)
+    tail = compressor.flush() if compressor else b""
+    if encrypter:
+        tail = encrypt(tail) + encrypter.flush()
+    chunks.append(tail)
+
+    payload = b"".join(chunks)
+    zinfo.CRC = crc
+    zinfo.file_size = file_size
+    zinfo.compress_size = len(payload)
+    return zinfo, payload
+
+
+def _file_chunks(file: str, data: bytes | None) -> Iterator[bytes]:
+    if data is not None:
+        view = memoryview(data)
+        for start in range(0, len(view), READ_SIZE):
+            yield view[start : start + READ_SIZE]
+        return
+    with open(file, "rb") as src:
+        read = src.read
+        if stats.current:
+            read = stats.current.timed("read", read)
+        while chunk := read(READ_SIZE):
+            yield chunk
+
+
+def compress_members(
+    batch: List[Tuple[str, str, os.stat_result]],
+    compression_method: int,
+    password: str | None,
+) -> List[Tuple[AESZipInfo, bytes]]:
+    """Process pool entry point: compress a batch of (file, arcname, stat)"""
+    members = []
+    for file, arcname, st in batch:
+        with stats.measure(None, arcname):
+            member = compress_member(
+                file, arcname, compression_method, password, st
+            )
+        members.append(member)
+    return members
+
+
+def append_member(
+    zf: pyzipper.AESZipFile, zinfo: AESZipInfo, payload: bytes
+) -> None:
+    """Append an already compressed member to an archive open for writing"""
+    _append(zf, zinfo, [payload])
+
+
+def store_member(
+    zf: pyzipper.AESZipFile, file: str, arcname: str, st: os.stat_result
+) -> AESZipInfo:
+    """Append a file as an unencrypted STORED member: the CRC comes from
+    a mapping of the file and the data is copied by the kernel
+    """
+    zinfo = new_zipinfo(arcname, st)
+    zinfo.compress_type = pyzipper.ZIP_STORED
+    zinfo.flag_bits = 0
+    zinfo.compress_size = zinfo.file_size
+    with open(file, "rb") as src:
+        zinfo.CRC = file_crc(src.fileno(), zinfo.file_size)
+        _append_range(zf, zinfo, src.fileno(), 0)
+    return zinfo
+
+
+def can_copy_range(zf: pyzipper.AESZipFile) -> bool:
+    """Whether zf writes to a seekable OS-level file"""
+    return zf._seekable and fileno(zf.fp) is not None
+
+
+def data_offset(src: BinaryIO, zinfo: pyzipper.ZipInfo) -> int:
+    """Offset of a member's data, past its local header, in src"""
+    src.seek(zinfo.header_offset)
+    header = src.read(sizeFileHeader)
+    if len(header) != sizeFileHeader or header[0:4] != stringFileHeader:
+        raise pyzipper.BadZipFile(f"Bad local header for {zinfo.filename}")
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    return zinfo.header_offset + sizeFileHeader + name_length + extra_length
+
+
+def copy_member(
+    zf: pyzipper.AESZipFile, zinfo: AESZipInfo, src: BinaryIO
+) -> None:
+    """Append a member of another archive (src is its file object) to zf,
+    copying the compressed and encrypted bytes as they are
+    """
+    offset = data_offset(src, zinfo)
+    zinfo = copy.copy(zinfo)
+    # Sizes and CRC go in the new local header, not a trailing descriptor
+    zinfo.flag_bits &= ~MASK_USE_DATA_DESCRIPTOR
+    src_fd = fileno(src)
+    if src_fd is not None and can_copy_range(zf):
+        _append_range(zf, zinfo, src_fd, offset)
+        return
+    src.seek(offset)
+    _append(zf, zinfo, _read_chunks(src, zinfo.compress_size))
+
+
+def discard_member(zf: pyzipper.AESZipFile, zinfo: AESZipInfo) -> None:
+    """Drop the member just written to a seekable archive"""
+    with zf._lock:
+        zf.fp.seek(zinfo.header_offset)
+        zf.fp.truncate()
+        zf.start_dir = zinfo.header_offset
+        zf.filelist.remove(zinfo)
+        del zf.NameToInfo[zinfo.filename]
+
+
+def _read_chunks(src: BinaryIO, size: int) -> Iterable[bytes]:
+    while size > 0:
+        chunk = src.read(min(size, READ_SIZE))
+        if not chunk:
+            raise EOFError("Truncated archive member")
+        size -= len(chunk)
+        yield chunk
+
+
+def _append(
+    zf: pyzipper.AESZipFile, zinfo: AESZipInfo, chunks: Iterable[bytes]
+) -> None:
+    with zf._lock:
+        _write_header(zf, zinfo)
+        for chunk in chunks:
+            zf.fp.write(chunk)
+        _add_entry(zf, zinfo)
+
+
+def _append_range(
+    zf: pyzipper.AESZipFile, zinfo: AESZipInfo, src_fd: int, offset: int
+) -> None:
+    """_append with compress_size bytes copied from src_fd at offset"""
+    with zf._lock:
+        _write_header(zf, zinfo)
+        zf.fp.flush()
+        position = zf.fp.tell()
+        copy_range(
+            src_fd, zf.fp.fileno(), zinfo.compress_size, offset, position
+        )
+        zf.fp.seek(position + zinfo.compress_size)
+        _add_entry(zf, zinfo)
+
+
+def _write_header(zf: pyzipper.AESZipFile, zinfo: AESZipInfo) -> None:
+    if zf._seekable:
+        zf.fp.seek(zf.start_dir)
+    zinfo.header_offset = zf.fp.tell()
+    zf._writecheck(zinfo)
+    zf._didModify = True
+    zf.fp.write(zinfo.FileHeader())
+
+
+def _add_entry(zf: pyzipper.AESZipFile, zinfo: AESZipInfo) -> None:
+    zf.start_dir = zf.fp.tell()
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
@@ -0,0 +1,156 @@
+"""Worker pool helpers shared by the zip and unzip engines
+"""
+import os
+import time
+import zlib
+
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Iterable, List, NamedTuple, Tuple
+
+from zipper import logger, stats
+
+DEFLATE_BLOCK_SIZE = 1024 * 1024
+DEFLATE_DICTIONARY_SIZE = 32 * 1024  # Size of the deflate sliding window
+
+
+def resolve_jobs(jobs: int) -> int:
+    """Map the --jobs value to a worker count (0 means one per CPU)"""
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+class Job(NamedTuple):
+    """An independent unit of batch work, e.g. one archive to create"""
+
+    name: str
+    weight: int  # Estimated cost, used to start the biggest jobs first
+    fn: Callable[..., Any]
+    args: Tuple[Any, ...]
+
+
+class JobResult(NamedTuple):
+    name: str
+    error: str | None
+    seconds: float
+    value: Any = None  # What the job's function returned
+
+
+def run_jobs(jobs: Iterable[Job], workers: int) -> List[JobResult]:
+    """Run independent jobs on a bounded process pool, largest first.
+
+    A failing job is reported in its result instead of aborting the rest.
+    With a single worker, jobs run in order as they are produced.
+    """
+    if workers <= 1:
+        results = [_run_job(job.name, job.fn, job.args) for job in jobs]
+    else:
+        ordered = sorted(jobs, key=lambda job: job.weight, reverse=True)
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                stats.submit(
+                    executor, _run_job, job.name, job.fn, job.args
+                ): job
+                for job in ordered
+            }
+            for future in as_completed(futures):
+                try:
+                    results.append(stats.result(future))
+                except Exception as e:  # e.g. a worker process died
+                    results.append(JobResult(futures[future].name, str(e), 0))
+    return results
+
+
+def report_jobs(results: List[JobResult]) -> bool:
+    """Log every failed job and, for batches, a summary line. Returns
+    whether every job succeeded.
+    """
+    failed = [result for result in results if result.error]
+    for result in failed:
+        logger.error("Failed %s: %s", result.name, result.error)
+    if len(results) > 1:
+        logger.info(
+            "Processed %d archive(s): %d succeeded, %d failed",
+            len(results),
+            len(results) - len(failed),
+            len(failed),
+        )
+    return not failed
+
+
+def _run_job(
+    name: str, fn: Callable[..., Any], args: Tuple[Any, ...]
+) -> JobResult:
+    start = time.perf_counter()
+    value = error = None
+    try:
+        value = fn(*args)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return JobResult(name, error, time.perf_counter() - start, value)
+
+
+def deflate_block(block: bytes, dictionary: bytes, last: bool) -> bytes:
+    """Raw-deflate one block, primed with the data preceding it.
+
+    Non-final blocks end on a sync flush (byte aligned, no final bit), so
+    the outputs of consecutive blocks concatenate into one deflate stream.
+    """
+    if dictionary:
+        compressor = zlib.compressobj(
+            zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15, zdict=dictionary
+        )
+    else:
+        compressor = zlib.compressobj(
+            zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15
+        )
+    mode = zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH
+    return compressor.compress(block) + compressor.flush(mode)
+
+
+class ParallelDeflater:
+    """Drop-in for a zlib compressobj that deflates blocks concurrently
+    (pigz style). zlib releases the GIL, so a thread pool is enough and
+    avoids copying blocks between processes.
+    """
+
+    def __init__(
+        self,
+        executor: Executor,
+        block_size: int = DEFLATE_BLOCK_SIZE,
+        window: int = 4,
+    ):
+        self._executor = executor
+        self._block_size = block_size
+        self._window = window
+        self._buffer = bytearray()
+        self._dictionary = b""
+        self._pending = deque()
+
+    def compress(self, data: bytes) -> bytes:
+        self._buffer += data
+        while len(self._buffer) >= self._block_size:
+            block = bytes(self._buffer[: self._block_size])
+            del self._buffer[: self._block_size]
+            self._submit(block, False)
+        return self._collect(self._window)
+
+    def flush(self) -> bytes:
+        self._submit(bytes(self._buffer), True)
+        self._buffer.clear()
+        return self._collect(0)
+
+    def _submit(self, block: bytes, last: bool) -> None:
+        self._pending.append(
+            self._executor.submit(deflate_block, block, self._dictionary, last)
+        )
+        history = self._dictionary + block
+        self._dictionary = history[-DEFLATE_DICTIONARY_SIZE:]
+
+    def _collect(self, limit: int) -> bytes:
+        done = []
+        while len(self._pending) > limit:
+            done.append(self._pending.popleft().result())
+        return b"".join(done)
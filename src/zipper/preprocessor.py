@@ -8,6 +8,22 @@ ESCAPE_MAP = {
     "?": "[mark]",
 }
 
+# Options whose value may be left out, and the values they take (the first
+# is the default). The default is filled in so that the argument after a
+# bare option is not taken for its value, unless it is one of them.
+OPTIONAL_VALUES = {
+    "--stats": ("text", "json"),
+}
+
+# Short options that take a value, and the long option each spells. Unlike
+# the long options, they take exactly one value, so that arguments after
+# it are not taken for more of them.
+SHORT_OPTIONS = {
+    "-e": "--exclude",
+    "-i": "--include",
+    "-o": "--output",
+}
+
 
 def escape_wildcards(val: Union[str, List[str]]) -> Union[str, List[str]]:
     def _escape(s: str) -> str:
@@ -31,20 +47,55 @@ def unescape_wildcards(val: Union[str, List[str]]) -> Union[str, List[str]]:
     return _unescape(val)
 
 
+def fill_optional_values(argv: List[str]) -> List[str]:
+    """--stats json as --stats=json, and --stats alone as --stats=text"""
+    filled = []
+    for arg in argv:
+        option = filled[-1] if filled else None
+        if option in OPTIONAL_VALUES and arg in OPTIONAL_VALUES[option]:
+            filled[-1] = f"{option}={arg}"
+        else:
+            filled.append(arg)
+    return [
+        f"{arg}={OPTIONAL_VALUES[arg][0]}" if arg in OPTIONAL_VALUES else arg
+        for arg in filled
+    ]
+
+
+def is_short_option(arg: str) -> bool:
+    """-v or -vv, but not - (stdin) or a negative number"""
+    return len(arg) > 1 and arg[0] == "-" and arg[1].isalpha()
+
+
 def typer_preprocessor() -> None:
     logger.debug("Sys.argv: %s", sys.argv)
     arguments = []  # Capture the main command
     options = []  # Capture the options
     option_name = ""  # Empty = Arguments and Non-Empty = Options
+    short_value = False  # The next arg is the value of a short option
 
-    for arg in sys.argv:
+    for arg in fill_optional_values(sys.argv):
+        if short_value:
+            short_value = False
+            options.extend([option_name, arg])
+            option_name = ""
+            continue
         # Empty the option_name to add next arg to arguments
         if arg == "--":
             option_name = ""
             continue
-        # Option name was read
+        if arg in SHORT_OPTIONS:
+            option_name = SHORT_OPTIONS[arg]
+            short_value = True
+            continue
+        # Short options (-v) stay where they are and end the option
+        if is_short_option(arg):
+            option_name = ""
+            arguments.append(arg)
+            continue
+        # Option name was read, with its value after = the option ends
         if arg.startswith("--"):
-            option_name = arg
+            option_name = "" if "=" in arg else arg
             options.append(arg)
         # Option value was read
         elif option_name:
@@ -55,8 +106,8 @@ def typer_preprocessor() -> None:
         # Argument was read
         else:
             arguments.append(arg)
-        logger.debug("Arguments: %s", arguments)
-        logger.debug("Options: %s", options)
+    logger.debug("Arguments: %s", arguments)
+    logger.debug("Options: %s", options)
 
     sys.argv = arguments + escape_wildcards(options)
     logger.debug("Processed argv: %s", sys.argv)
@@ -66,15 +117,30 @@ def argparse_preprocessor() -> None:
     arguments = []  # Capture the main command
     options = {}  # Capture the options
     option_name = ""  # Empty = Arguments and Non-Empty = Options
+    short_value = False  # The next arg is the value of a short option
 
-    for arg in sys.argv:
+    for arg in fill_optional_values(sys.argv):
+        if short_value:
+            short_value = False
+            options.setdefault(option_name, []).append(arg)
+            option_name = ""
+            continue
         # Empty the option_name to add next arg to arguments
         if arg == "--":
             option_name = ""
             continue
-        # Option name was read
+        if arg in SHORT_OPTIONS:
+            option_name = SHORT_OPTIONS[arg]
+            short_value = True
+            continue
+        # Short options (-v) stay where they are and end the option
+        if is_short_option(arg):
+            option_name = ""
+            arguments.append(arg)
+            continue
+        # Option name was read, with its value after = the option ends
         if arg.startswith("--"):
-            option_name = arg
+            option_name = "" if "=" in arg else arg
             options.setdefault(arg, [])
         # Option value was read
         elif option_name:
@@ -82,8 +148,8 @@ def argparse_preprocessor() -> None:
         # Argument was read
         else:
             arguments.append(arg)
-        logger.debug("Arguments: %s", arguments)
-        logger.debug("Options: %s", options)
+    logger.debug("Arguments: %s", arguments)
+    logger.debug("Options: %s", options)
 
     flattened_options = [item for k, v in options.items() for item in [k] + v]
     sys.argv = arguments + flattened_options
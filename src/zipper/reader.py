@@ -0,0 +1,384 @@
+"""Read-only access to an archive through a single memory mapping.
+
+The central directory and the local headers are parsed in place, and
+member data is handed to the decoders as slices of the mapping, so no
+member costs more than the system calls that write it out. Forked worker
+processes inherit the mapping instead of opening the archive again.
+"""
+import mmap
+import os
+import struct
+import zlib
+
+from collections import OrderedDict
+from typing import BinaryIO, List, Tuple
+
+import pyzipper
+from pyzipper.zipfile import (
+    MAX_EXTRACT_VERSION,
+    _ECD_LOCATION,
+    _ECD_OFFSET,
+    _ECD_SIGNATURE,
+    _ECD_SIZE,
+    _EndRecData,
+    sizeCentralDir,
+    sizeEndCentDir64,
+    sizeEndCentDir64Locator,
+    sizeFileHeader,
+    stringCentralDir,
+    stringEndArchive64,
+    stringFileHeader,
+    structCentralDir,
+)
+from pyzipper.zipfile_aes import WZ_AES_V2, AESZipDecrypter, AESZipInfo
+
+from zipper import stats
+from zipper.fastcopy import copy_range
+from zipper.members import MASK_ENCRYPTED, READ_SIZE
+from zipper.stream import MemberDecoder
+from zipper.utils import get_member_path
+
+MASK_UTF_FILENAME = 1 << 11
+
+# Archives kept open (with their parsed central directory) by open_archive
+ARCHIVE_CACHE_SIZE = 16
+
+# Methods decoded here, anything else is left to pyzipper
+DECODED_METHODS = (
+    pyzipper.ZIP_STORED,
+    pyzipper.ZIP_DEFLATED,
+    pyzipper.ZIP_BZIP2,
+    pyzipper.ZIP_LZMA,
+)
+
+
+class MappedArchive:
+    """An archive opened for reading through a memory mapping"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._zf = None
+        self._zf_pid = None
+        # Directories already created by extract
+        self._directories = set()
+        try:
+            st = os.fstat(self._file.fileno())
+            # What the cache compares to tell whether the file changed
+            self.key = (st.st_mtime_ns, st.st_size)
+            if st.st_size == 0:
+                raise pyzipper.BadZipFile("File is not a zip file")
+            self._mapping = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+            self.view = memoryview(self._mapping)
+            self.members = _read_central_directory(self._mapping, self.view)
+        except BaseException:
+            self.close()
+            raise
+
+    def __reduce__(self):
+        # Only processes that are not forked need this: they map the
+        # archive on their own
+        return MappedArchive, (self.path,)
+
+    def __enter__(self) -> "MappedArchive":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if getattr(self, "view", None) is not None:
+            self.view.release()
+            self.view = None
+        if getattr(self, "_mapping", None) is not None:
+            self._mapping.close()
+            self._mapping = None
+        if self._zf:
+            self._zf.close()
+            self._zf = None
+        self._file.close()
+
+    @property
+    def encrypted(self) -> bool:
+        return any(m.flag_bits & MASK_ENCRYPTED for m in self.members)
+
+    def data_range(self, member: AESZipInfo) -> slice:
+        """Where a member's data, past its local header, lies in the
+        mapping
+        """
+        offset = member.header_offset
+        if self.view[offset : offset + 4] != stringFileHeader:
+            raise pyzipper.BadZipFile(
+                f"Bad local header for {member.filename}"
+            )
+        name_length, extra_length = struct.unpack_from(
+            "<HH", self.view, offset + 26
+        )
+        start = offset + sizeFileHeader + name_length + extra_length
+        end = start + member.compress_size
+        if end > len(self.view):
+            raise EOFError(f"Truncated archive member {member.filename}")
+        return slice(start, end)
+
+    def extract(
+        self,
+        member: AESZipInfo,
+        extract_to: str,
+        password: bytes | None = None,
+    ) -> None:
+        """Extract a member the way ZipFile.extract does"""
+        target = get_member_path(extract_to, member.filename)
+        if member.is_dir():
+            os.makedirs(target, exist_ok=True)
+            return
+        encrypted = member.flag_bits & MASK_ENCRYPTED
+        if member.compress_type not in DECODED_METHODS or (
+            encrypted and member.wz_aes_strength is None
+        ):
+            # Legacy ZipCrypto and rare methods
+            self._zipfile().extract(member, extract_to, password)
+            return
+
+        parent = os.path.dirname(target)
+        if parent not in self._directories:
+            os.makedirs(parent, exist_ok=True)
+            self._directories.add(parent)
+        data_range = self.data_range(member)
+        if not encrypted and member.compress_type == pyzipper.ZIP_STORED:
+            with open(target, "wb") as dst, stats.measure("write"):
+                copy_range(
+                    self._file.fileno(),
+                    dst.fileno(),
+                    member.compress_size,
+                    data_range.start,
+                )
+            size = member.compress_size
+            crc = zlib.crc32(self.view[data_range])
+        else:
+            with open(target, "wb") as dst:
+                size, crc = self._decode(member, data_range, password, dst)
+        _check_member(member, size, crc)
+
+    def verify(
+        self, member: AESZipInfo, password: bytes | None = None
+    ) -> None:
+        """Decode a member to nowhere and check its CRC-32 or HMAC, raising
+        what extract would
+        """
+        if member.is_dir():
+            return
+        encrypted = member.flag_bits & MASK_ENCRYPTED
+        if member.compress_type not in DECODED_METHODS or (
+            encrypted and member.wz_aes_strength is None
+        ):
+            # ZipExtFile checks the CRC-32 once it is read to the end
+            with self._zipfile().open(member, pwd=password) as src:
+                while src.read(READ_SIZE):
+                    pass
+            return
+        data_range = self.data_range(member)
+        if not encrypted and member.compress_type == pyzipper.ZIP_STORED:
+            size = member.compress_size
+            crc = zlib.crc32(self.view[data_range])
+        else:
+            size, crc = self._decode(member, data_range, password, None)
+        _check_member(member, size, crc)
+
+    def check_password(self, password: bytes | None) -> bool:
+        """Whether password opens the archive, tried on its smallest
+        encrypted member (decoded to nowhere) before anything is written.
+        A member that fails its HMAC or CRC-32 check does not open either.
+        """
+        encrypted = [m for m in self.members if m.flag_bits & MASK_ENCRYPTED]
+        if not encrypted:
+            return True
+        if not password:
+            return False
+        member = min(encrypted, key=lambda m: m.compress_size)
+        if member.wz_aes_strength is None:
+            # ZipCrypto's one verifier byte lets 1 in 256 wrong passwords
+            # through, the CRC of the decoded member has the final say
+            try:
+                with self._zipfile().open(member, pwd=password) as src:
+                    while src.read(READ_SIZE):
+                        pass
+            except (RuntimeError, pyzipper.BadZipFile, zlib.error):
+                return False
+            return True
+        try:
+            # The AES verifier rejects almost every wrong password before
+            # any data is decrypted, the HMAC catches the rest
+            size, crc = self._decode(
+                member, self.data_range(member), password, None
+            )
+            _check_member(member, size, crc)
+        except (RuntimeError, pyzipper.BadZipFile, zlib.error):
+            return False
+        return True
+
+    def _decode(
+        self,
+        member: AESZipInfo,
+        data_range: slice,
+        password: bytes | None,
+        dst: BinaryIO | None,
+    ) -> Tuple[int, int]:
+        """Decrypt and decompress a member into dst, returning the size and
+        CRC-32 of its contents
+        """
+        data = self.view[data_range]
+        decrypter = None
+        if member.flag_bits & MASK_ENCRYPTED:
+            if not password:
+                raise RuntimeError(
+                    f"File {member.filename!r} is encrypted, password "
+                    "required for extraction"
+                )
+            header_size = AESZipDecrypter.encryption_header_length(member)
+            hmac_size = AESZipDecrypter.hmac_size
+            decrypter = AESZipDecrypter(
+                member, password, bytes(data[:header_size])
+            )
+            hmac = bytes(data[len(data) - hmac_size :])
+            data = data[header_size : len(data) - hmac_size]
+        decoder = MemberDecoder(member, decrypter)
+        write = dst.write if dst else None
+        if write and stats.current:
+            write = stats.current.timed("write", write)
+        for start in range(0, len(data), READ_SIZE):
+            plain = decoder.feed(data[start : start + READ_SIZE])
+            if write:
+                write(plain)
+        if decrypter:
+            decrypter.check_hmac(hmac)
+        return decoder.size, decoder.crc
+
+    def _zipfile(self) -> pyzipper.AESZipFile:
+        # A forked process would share the file offset of its parent's
+        # ZipFile, so it opens its own
+        if self._zf is None or self._zf_pid != os.getpid():
+            self._zf = pyzipper.AESZipFile(self.path, "r")
+            self._zf_pid = os.getpid()
+        return self._zf
+
+
+def _check_member(member: AESZipInfo, size: int, crc: int) -> None:
+    if size != member.file_size:
+        raise pyzipper.BadZipFile(f"Bad size for file {member.filename!r}")
+    # AE-2 members store no CRC, their HMAC covers integrity instead
+    if member.wz_aes_version != WZ_AES_V2 and crc != member.CRC:
+        raise pyzipper.BadZipFile(f"Bad CRC-32 for file {member.filename!r}")
+
+
+_archives: "OrderedDict[str, MappedArchive]" = OrderedDict()
+
+
+def open_archive(path: str) -> MappedArchive:
+    """MappedArchive for path from a least recently used cache, so that
+    checking, listing and extracting an archive parse it only once. It
+    is mapped again when the file's mtime or size changed since.
+    The archive belongs to the cache: close_archives closes it.
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    archive = _archives.pop(path, None)
+    if archive and archive.key != (st.st_mtime_ns, st.st_size):
+        archive.close()
+        archive = None
+    if archive is None:
+        archive = MappedArchive(path)
+    _archives[path] = archive
+    while len(_archives) > ARCHIVE_CACHE_SIZE:
+        _, evicted = _archives.popitem(last=False)
+        evicted.close()
+    return archive
+
+
+def close_archives() -> None:
+    """Close every archive held by the open_archive cache"""
+    while _archives:
+        _, archive = _archives.popitem()
+        archive.close()
+
+
+def _read_central_directory(
+    mapping: mmap.mmap, view: memoryview
+) -> List[AESZipInfo]:
+    """Parse the central directory like ZipFile does, slicing the mapping
+    instead of reading it
+    """
+    try:
+        endrec = _EndRecData(mapping)
+    except ValueError:
+        # mmap.seek's answer to seeking before the start of a short file
+        endrec = None
+    if not endrec:
+        raise pyzipper.BadZipFile("File is not a zip file")
+    size_cd = endrec[_ECD_SIZE]
+    offset_cd = endrec[_ECD_OFFSET]
+    # Non-zero when the archive was appended to something else
+    concat = endrec[_ECD_LOCATION] - size_cd - offset_cd
+    if endrec[_ECD_SIGNATURE] == stringEndArchive64:
+        concat -= sizeEndCentDir64 + sizeEndCentDir64Locator
+    position = offset_cd + concat
+    end = position + size_cd
+    if position < 0 or end > len(view):
+        raise pyzipper.BadZipFile("Truncated central directory")
+
+    members = []
+    while position < end:
+        if end - position < sizeCentralDir:
+            raise pyzipper.BadZipFile("Truncated central directory")
+        centdir = struct.unpack_from(structCentralDir, view, position)
+        if centdir[0] != stringCentralDir:
+            raise pyzipper.BadZipFile(
+                "Bad magic number for central directory"
+            )
+        name_length, extra_length, comment_length = centdir[12:15]
+        position += sizeCentralDir
+        filename = view[position : position + name_length]
+        position += name_length
+        if centdir[5] & MASK_UTF_FILENAME:
+            member = AESZipInfo(str(filename, "utf-8"))
+        else:
+            member = AESZipInfo(str(filename, "cp437"))
+        member.extra = bytes(view[position : position + extra_length])
+        position += extra_length
+        member.comment = bytes(view[position : position + comment_length])
+        position += comment_length
+        (
+            member.create_version,
+            member.create_system,
+            member.extract_version,
+            member.reserved,
+            member.flag_bits,
+            member.compress_type,
+            time,
+            date,
+            member.CRC,
+            member.compress_size,
+            member.file_size,
+        ) = centdir[1:12]
+        if member.extract_version > MAX_EXTRACT_VERSION:
+            raise NotImplementedError(
+                f"zip file version {member.extract_version / 10:.1f}"
+            )
+        member.volume, member.internal_attr, member.external_attr = (
+            centdir[15:18]
+        )
+        member.header_offset = centdir[18]
+        member._raw_time = time
+        member.date_time = (
+            (date >> 9) + 1980,
+            (date >> 5) & 0xF,
+            date & 0x1F,
+            time >> 11,
+            (time >> 5) & 0x3F,
+            (time & 0x1F) * 2,
+        )
+        member._decodeExtra()
+        member.header_offset += concat
+        members.append(member)
+    return members
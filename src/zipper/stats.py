@@ -0,0 +1,332 @@
+"""Per-stage timings and counters for ``--stats``.
+
+Nothing is collected unless enable() was called. Blocks timed with
+measure() cost a shared no-op context otherwise, and the calls timed one
+chunk at a time (reads, compressor, cipher and writes) are only wrapped
+while collecting, so a run without --stats does no timing at all.
+
+Work sent to a process pool through submit() is collected in the worker
+and merged here when its result() is taken.
+"""
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager, nullcontext
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Tuple,
+)
+
+# Files listed as the slowest in a report
+SLOWEST_FILES = 10
+
+# Report order, stages that did not run are left out
+STAGES = (
+    "discover",
+    "open",
+    "read",
+    "compress",
+    "encrypt",
+    "decrypt",
+    "decompress",
+    "stream",
+    "write",
+)
+
+
+class Stats:
+    """Wall and CPU time per stage, byte and file counts per compression
+    method and the slowest files of a run. Stages are timed in the thread
+    that runs them, so the CPU time of one stage is its own even when the
+    stages overlap.
+    """
+
+    def __init__(self, slowest: int = SLOWEST_FILES):
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        self.children_cpu_started = _children_cpu()
+        # stage: [wall seconds, CPU seconds, calls]
+        self.stages: Dict[str, List[float]] = {}
+        # method name: [files, size, compressed size]
+        self.methods: Dict[str, List[int]] = {}
+        self.slowest: List[Tuple[float, str]] = []
+        self._slowest_count = slowest
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict:
+        # Workers send their stats back pickled, the lock stays behind
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, wall: float, cpu: float) -> None:
+        with self._lock:
+            totals = self.stages.setdefault(stage, [0.0, 0.0, 0])
+            totals[0] += wall
+            totals[1] += cpu
+            totals[2] += 1
+
+    @contextmanager
+    def measure(
+        self, stage: str | None, name: str | None = None
+    ) -> Iterator[None]:
+        """Count the block towards stage, and towards the time file name
+        took
+        """
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - wall
+            if stage:
+                self.add(stage, elapsed, time.thread_time() - cpu)
+            if name:
+                self.add_file(name, elapsed)
+
+    def timed(self, stage: str, func: Callable) -> Callable:
+        """func, with its calls counted towards stage"""
+
+        def call(*args):
+            wall, cpu = time.perf_counter(), time.thread_time()
+            try:
+                return func(*args)
+            finally:
+                self.add(
+                    stage,
+                    time.perf_counter() - wall,
+                    time.thread_time() - cpu,
+                )
+
+        return call
+
+    def iterate(self, stage: str, items: Iterable) -> Iterator:
+        """items, with the time spent producing them counted towards stage"""
+        next_item = self.timed(stage, next)
+        items = iter(items)
+        while True:
+            try:
+                yield next_item(items)
+            except StopIteration:
+                return
+
+    def add_file(self, name: str, seconds: float) -> None:
+        """Keep the time a file took if it is among the slowest"""
+        with self._lock:
+            if len(self.slowest) < self._slowest_count:
+                heapq.heappush(self.slowest, (seconds, name))
+            elif seconds > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, (seconds, name))
+
+    def add_members(self, members: Iterable) -> None:
+        """Count the sizes of archive members (ZipInfo) by method"""
+        # Only the engines call this, and they have pyzipper loaded
+        # already; utils imports this module and must not load it
+        from zipper.compression import METHOD_NAMES
+
+        with self._lock:
+            for member in members:
+                if member.is_dir():
+                    continue
+                method = METHOD_NAMES.get(
+                    member.compress_type, str(member.compress_type)
+                )
+                totals = self.methods.setdefault(method, [0, 0, 0])
+                totals[0] += 1
+                totals[1] += member.file_size
+                totals[2] += member.compress_size
+
+    def merge(self, other: "Stats") -> None:
+        """Add the stages, members and slowest files of other, e.g. what a
+        worker process collected
+        """
+        with self._lock:
+            for stage, (wall, cpu, calls) in other.stages.items():
+                totals = self.stages.setdefault(stage, [0.0, 0.0, 0])
+                totals[0] += wall
+                totals[1] += cpu
+                totals[2] += calls
+            for method, counts in other.methods.items():
+                totals = self.methods.setdefault(method, [0, 0, 0])
+                for index, count in enumerate(counts):
+                    totals[index] += count
+        for seconds, name in other.slowest:
+            self.add_file(name, seconds)
+
+    def report(self) -> Dict:
+        files = sum(totals[0] for totals in self.methods.values())
+        size = sum(totals[1] for totals in self.methods.values())
+        compressed = sum(totals[2] for totals in self.methods.values())
+        return {
+            "wall": time.perf_counter() - self.started,
+            # Worker processes count once the pool has waited for them
+            "cpu": time.process_time()
+            - self.cpu_started
+            + _children_cpu()
+            - self.children_cpu_started,
+            "files": files,
+            "size": size,
+            "compressed": compressed,
+            "ratio": _ratio(size, compressed),
+            "stages": {
+                stage: {
+                    "wall": self.stages[stage][0],
+                    "cpu": self.stages[stage][1],
+                    "calls": self.stages[stage][2],
+                }
+                for stage in STAGES
+                if stage in self.stages
+            },
+            "methods": {
+                method: {
+                    "files": totals[0],
+                    "size": totals[1],
+                    "compressed": totals[2],
+                    "ratio": _ratio(totals[1], totals[2]),
+                }
+                for method, totals in sorted(self.methods.items())
+            },
+            "slowest": [
+                {"name": name, "seconds": seconds}
+                for seconds, name in sorted(self.slowest, reverse=True)
+            ],
+        }
+
+
+def _children_cpu() -> float:
+    """CPU time of the child processes that ended and were waited for"""
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+def _ratio(size: int, compressed: int) -> float:
+    """Compressed size as a fraction of the size"""
+    return round(compressed / size, 4) if size else 0.0
+
+
+def format_report(report: Dict) -> str:
+    """The report as the text --stats prints"""
+    lines = [
+        f"Total: {report['wall']:.3f}s wall, {report['cpu']:.3f}s CPU,"
+        f" {report['files']} file(s), {report['size']} bytes,"
+        f" {report['compressed']} compressed ({report['ratio']:.1%})",
+        f"{'Stage':<12}{'Wall s':>10}{'CPU s':>10}{'Calls':>10}",
+    ]
+    for stage, totals in report["stages"].items():
+        lines.append(
+            f"{stage:<12}{totals['wall']:>10.3f}{totals['cpu']:>10.3f}"
+            f"{totals['calls']:>10}"
+        )
+    if report["methods"]:
+        lines.append(
+            f"{'Method':<12}{'Files':>10}{'Size':>14}{'Compressed':>14}"
+            f"{'Ratio':>8}"
+        )
+    for method, totals in report["methods"].items():
+        lines.append(
+            f"{method:<12}{totals['files']:>10}{totals['size']:>14}"
+            f"{totals['compressed']:>14}{totals['ratio']:>8.1%}"
+        )
+    if report["slowest"]:
+        lines.append("Slowest files:")
+    for entry in report["slowest"]:
+        lines.append(f"{entry['seconds']:>10.3f}s  {entry['name']}")
+    return "\n".join(lines)
+
+
+def dump_report(report: Dict, fmt: str = "text") -> str:
+    if fmt == "json":
+        return json.dumps(report, indent=2)
+    return format_report(report)
+
+
+current: Stats | None = None
+
+_NOT_COLLECTING = nullcontext()
+
+
+def measure(stage: str | None, name: str | None = None) -> ContextManager:
+    """Stats.measure of the current stats, or a no-op when not collecting"""
+    if current is None:
+        return _NOT_COLLECTING
+    return current.measure(stage, name)
+
+
+class Collected(NamedTuple):
+    """What a worker returns from submit(): the result and its stats"""
+
+    value: Any
+    stats: Stats
+
+
+def submit(executor: Executor, fn: Callable, *args) -> Future:
+    """executor.submit, with the stats of fn collected in the worker when
+    they are collected here
+    """
+    if current is None:
+        return executor.submit(fn, *args)
+    return executor.submit(_collect_call, fn, *args)
+
+
+def result(future: Future) -> Any:
+    """future.result() of submit, merging the stats of the worker"""
+    value = future.result()
+    if isinstance(value, Collected):
+        if current is not None:
+            current.merge(value.stats)
+        value = value.value
+    return value
+
+
+def _collect_call(fn: Callable, *args) -> Collected:
+    # A forked worker inherits the parent's stats: start from nothing
+    enable()
+    try:
+        return Collected(fn(*args), current)
+    finally:
+        disable()
+
+
+@contextmanager
+def collecting(fmt: str | None) -> Iterator[None]:
+    """Collect stats over the block when a report format (text or json) is
+    given, printing the report to stderr where it cannot mix with an
+    archive written to stdout
+    """
+    if not fmt:
+        yield
+        return
+    enable()
+    try:
+        yield
+    finally:
+        print(dump_report(disable().report(), fmt), file=sys.stderr)
+
+
+def enable(slowest: int = SLOWEST_FILES) -> Stats:
+    """Start collecting, into a new Stats that becomes current"""
+    global current
+    current = Stats(slowest)
+    return current
+
+
+def disable() -> Stats | None:
+    """Stop collecting, returning what was collected"""
+    global current
+    stats, current = current, None
+    return stats
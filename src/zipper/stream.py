@@ -0,0 +1,426 @@
+"""Extract an archive read sequentially from a pipe (``unzip -``).
+
+Members are decoded from their local headers as the bytes arrive, so the
+central directory at the end of the archive is never needed. A member
+written with a data descriptor doesn't record its size up front: the end
+of compressed data is found by its decompressor, and the end of STORED
+data by the descriptor that follows it, recording that very size.
+"""
+import bz2
+import os
+import struct
+import zlib
+
+from typing import BinaryIO, Callable, Iterator, List, Tuple
+
+from pyzipper.zipfile import (
+    EXTRA_ZIP64,
+    BadZipFile,
+    LZMADecompressor,
+    sizeFileHeader,
+    stringCentralDir,
+    stringEndArchive,
+    stringEndArchive64,
+    stringFileHeader,
+    structFileHeader,
+)
+from pyzipper.zipfile_aes import (
+    EXTRA_WZ_AES,
+    WZ_AES_V2,
+    AESZipDecrypter,
+    AESZipInfo,
+)
+import pyzipper
+
+from zipper import logger, stats
+from zipper.members import (
+    MASK_ENCRYPTED,
+    MASK_USE_DATA_DESCRIPTOR,
+    READ_SIZE,
+)
+from zipper.utils import get_member_path, get_password
+
+MASK_UTF_FILENAME = 1 << 11
+DATA_DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+ARCHIVE_TRAILERS = (stringCentralDir, stringEndArchive, stringEndArchive64)
+
+
+def unzip_stream(
+    src: BinaryIO,
+    extract_to: str,
+    passwords: List[bytes] | None = None,
+    prompt: bool = True,
+    selected: Callable[[str], bool] | None = None,
+) -> None:
+    """Extract every member (or the selected ones) of the archive read
+    from src into extract_to, prompting for a password none of passwords
+    matches only if prompt is set
+    """
+    passwords = [] if passwords is None else passwords
+    reader = _StreamReader(src)
+    while True:
+        try:
+            signature = reader.read_exact(4)
+        except EOFError:
+            raise EOFError("Archive ends before its central directory")
+        if signature in ARCHIVE_TRAILERS:
+            break
+        if signature != stringFileHeader:
+            raise BadZipFile(f"Bad local header signature: {signature!r}")
+        info, zip64 = _read_local_header(reader, signature)
+        # Members left out still have to be decoded to find where they end
+        write = selected is None or selected(info.filename)
+        _extract_member(
+            reader, info, zip64, extract_to, passwords, prompt, write
+        )
+    # Let the writer on the other end of the pipe finish cleanly
+    while reader.read(READ_SIZE):
+        pass
+    logger.info("Extracted to: %s", extract_to)
+
+
+class _StreamReader:
+    """Reads from a pipe, with room to push bytes back"""
+
+    def __init__(self, src: BinaryIO):
+        # read1 returns what has arrived instead of waiting for a full read
+        self._read = getattr(src, "read1", src.read)
+        self._pending = bytearray()
+
+    def read(self, size: int) -> bytes:
+        """Up to size bytes, empty only at the end of the stream"""
+        if self._pending:
+            data = bytes(self._pending[:size])
+            del self._pending[:size]
+            return data
+        return self._read(size)
+
+    def read_exact(self, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.read(size - len(data))
+            if not chunk:
+                raise EOFError("Archive ends in the middle of a member")
+            data += chunk
+        return bytes(data)
+
+    def unread(self, data: bytes) -> None:
+        self._pending[:0] = data
+
+
+def _read_local_header(
+    reader: _StreamReader, signature: bytes
+) -> Tuple[AESZipInfo, bool]:
+    """Parse a local file header into a ZipInfo, and whether it uses zip64"""
+    header = signature + reader.read_exact(sizeFileHeader - len(signature))
+    (
+        _,
+        _,
+        _,
+        flag_bits,
+        compress_type,
+        dostime,
+        dosdate,
+        crc,
+        compress_size,
+        file_size,
+        name_length,
+        extra_length,
+    ) = struct.unpack(structFileHeader, header)
+    name = reader.read_exact(name_length)
+    extra = reader.read_exact(extra_length)
+    encoding = "utf-8" if flag_bits & MASK_UTF_FILENAME else "cp437"
+    date_time = (
+        (dosdate >> 9) + 1980,
+        (dosdate >> 5) & 0xF,
+        dosdate & 0x1F,
+        dostime >> 11,
+        (dostime >> 5) & 0x3F,
+        (dostime & 0x1F) * 2,
+    )
+    info = AESZipInfo(name.decode(encoding), date_time)
+    info.flag_bits = flag_bits
+    info.compress_type = compress_type
+    info.CRC = crc
+    info.compress_size = compress_size
+    info.file_size = file_size
+
+    zip64 = False
+    while len(extra) >= 4:
+        kind, length = struct.unpack("<HH", extra[:4])
+        data, extra = extra[4 : 4 + length], extra[4 + length :]
+        if kind == EXTRA_ZIP64:
+            zip64 = True
+            # The local zip64 field holds both sizes, in this order
+            sizes = struct.unpack(f"<{len(data) // 8}Q", data[:16])
+            if info.file_size == 0xFFFFFFFF and len(sizes) > 0:
+                info.file_size = sizes[0]
+            if info.compress_size == 0xFFFFFFFF and len(sizes) > 1:
+                info.compress_size = sizes[1]
+        elif kind == EXTRA_WZ_AES and length >= 7:
+            (
+                info.wz_aes_version,
+                info.wz_aes_vendor_id,
+                info.wz_aes_strength,
+                info.compress_type,
+            ) = struct.unpack("<H2sBH", data[:7])
+    return info, zip64
+
+
+def _extract_member(
+    reader: _StreamReader,
+    info: AESZipInfo,
+    zip64: bool,
+    extract_to: str,
+    passwords: List[bytes],
+    prompt: bool,
+    write: bool = True,
+) -> None:
+    """Extract one member whose local header was just read (only checking
+    it unless write is set). The password that opens it moves to the
+    front of passwords for the members that follow.
+    """
+    decrypter = None
+    header_size = hmac_size = 0
+    if info.flag_bits & MASK_ENCRYPTED:
+        if info.wz_aes_strength is None:
+            raise NotImplementedError(
+                f"Cannot stream {info.filename}: only AES encryption is "
+                "supported"
+            )
+        header_size = AESZipDecrypter.encryption_header_length(info)
+        hmac_size = AESZipDecrypter.hmac_size
+        header = reader.read_exact(header_size)
+        decrypter = _open_decrypter(info, header, passwords, prompt)
+    decoder = MemberDecoder(info, decrypter)
+
+    target = get_member_path(extract_to, info.filename)
+    if not write:
+        dest = None
+    elif info.is_dir():
+        os.makedirs(target, exist_ok=True)
+        dest = None
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        dest = open(target, "wb")
+    try:
+        scanner = None
+        descriptor = info.flag_bits & MASK_USE_DATA_DESCRIPTOR
+        if not descriptor or info.compress_size:
+            remaining = info.compress_size - header_size - hmac_size
+            chunks = _read_chunks(reader, remaining)
+        elif decoder.compressed:
+            chunks = _read_compressed(reader, decoder)
+        else:
+            chunks = scanner = _DescriptorScanner(
+                reader, header_size, hmac_size, zip64
+            )
+        for chunk in chunks:
+            data = decoder.feed(chunk)
+            if dest:
+                dest.write(data)
+        if decrypter:
+            hmac = scanner.tail if scanner else reader.read_exact(hmac_size)
+            decrypter.check_hmac(hmac)
+    finally:
+        if dest:
+            dest.close()
+
+    if descriptor:
+        info.CRC, info.compress_size, info.file_size = _read_data_descriptor(
+            reader, zip64
+        )
+    if decoder.size != info.file_size:
+        raise BadZipFile(f"Bad size for file {info.filename!r}")
+    # AE-2 members store no CRC, their HMAC covers integrity instead
+    if info.wz_aes_version != WZ_AES_V2 and decoder.crc != info.CRC:
+        raise BadZipFile(f"Bad CRC-32 for file {info.filename!r}")
+
+
+def _open_decrypter(
+    info: AESZipInfo, header: bytes, passwords: List[bytes], prompt: bool
+) -> AESZipDecrypter:
+    """Check the known passwords against the member's verification value,
+    then prompt for another one (if allowed) while none matches
+    """
+    for password in passwords:
+        try:
+            decrypter = AESZipDecrypter(info, password, header)
+        except RuntimeError:
+            continue
+        passwords.remove(password)
+        passwords.insert(0, password)
+        return decrypter
+    if not prompt:
+        # Stdin is the archive itself, there is nobody to ask
+        raise RuntimeError(
+            f"None of the passwords given opens {info.filename!r}"
+        )
+    for _ in range(3):
+        password = get_password(True).encode()
+        try:
+            decrypter = AESZipDecrypter(info, password, header)
+        except RuntimeError:
+            logger.warning("Incorrect password. Try again.")
+            continue
+        passwords.insert(0, password)
+        return decrypter
+    raise RuntimeError(f"Bad password for file {info.filename!r}")
+
+
+class _LZMADecompressor(LZMADecompressor):
+    @property
+    def unused_data(self) -> bytes:
+        return self._decomp.unused_data if self._decomp else b""
+
+
+def _get_decompressor(compress_type: int):
+    if compress_type == pyzipper.ZIP_STORED:
+        return None
+    if compress_type == pyzipper.ZIP_DEFLATED:
+        return zlib.decompressobj(-15)
+    if compress_type == pyzipper.ZIP_BZIP2:
+        return bz2.BZ2Decompressor()
+    if compress_type == pyzipper.ZIP_LZMA:
+        return _LZMADecompressor()
+    raise NotImplementedError(f"Compression method {compress_type}")
+
+
+class MemberDecoder:
+    """Decrypts and decompresses a member's data as it is fed, keeping
+    track of the CRC-32 and size of the output
+    """
+
+    def __init__(self, info: AESZipInfo, decrypter: AESZipDecrypter | None):
+        self._decrypter = decrypter
+        self._decompressor = _get_decompressor(info.compress_type)
+        self.compressed = self._decompressor is not None
+        self._decrypt = decrypter.decypter.decrypt if decrypter else None
+        self._decompress = (
+            self._decompressor.decompress if self._decompressor else None
+        )
+        if stats.current:
+            if self._decrypt:
+                self._decrypt = stats.current.timed("decrypt", self._decrypt)
+            if self._decompress:
+                self._decompress = stats.current.timed(
+                    "decompress", self._decompress
+                )
+        self.eof = False
+        self.unused = b""
+        self.crc = 0
+        self.size = 0
+
+    def feed(self, data: bytes) -> bytes:
+        if self._decrypt:
+            # AES-CTR is byte aligned, so plain and cipher text line up
+            plain = self._decrypt(data)
+        else:
+            plain = data
+        if self._decompress:
+            plain = self._decompress(plain)
+            if self._decompressor.eof:
+                self.eof = True
+                unused = len(self._decompressor.unused_data)
+                if unused:
+                    data, self.unused = data[:-unused], data[-unused:]
+        if self._decrypter:
+            # The HMAC covers the member's cipher text only
+            self._decrypter.hmac.update(data)
+        self.crc = zlib.crc32(plain, self.crc)
+        self.size += len(plain)
+        return plain
+
+
+def _read_chunks(reader: _StreamReader, size: int) -> Iterator[bytes]:
+    while size > 0:
+        chunk = reader.read(min(size, READ_SIZE))
+        if not chunk:
+            raise EOFError("Archive ends in the middle of a member")
+        size -= len(chunk)
+        yield chunk
+
+
+def _read_compressed(
+    reader: _StreamReader, decoder: MemberDecoder
+) -> Iterator[bytes]:
+    """Feed chunks until the decompressor finds the end of its stream,
+    handing whatever follows it back to the reader
+    """
+    while not decoder.eof:
+        chunk = reader.read(READ_SIZE)
+        if not chunk:
+            raise EOFError("Archive ends in the middle of a member")
+        yield chunk
+    reader.unread(decoder.unused)
+
+
+class _DescriptorScanner:
+    """Yields the data of a STORED member of unknown size: it ends where a
+    data descriptor recording that very size begins. The last tail_size
+    bytes (the AES HMAC) are kept back in `tail`.
+    """
+
+    def __init__(
+        self,
+        reader: _StreamReader,
+        consumed: int,
+        tail_size: int,
+        zip64: bool,
+    ):
+        self._reader = reader
+        self._consumed = consumed  # Member bytes read before the data
+        self._tail_size = tail_size
+        self._sizes_format = "<QQ" if zip64 else "<LL"
+        self.tail = b""
+
+    def __iter__(self) -> Iterator[bytes]:
+        # Signature, CRC-32, then compressed and uncompressed sizes
+        descriptor_size = 8 + struct.calcsize(self._sizes_format)
+        keep = descriptor_size + self._tail_size
+        overhead = self._consumed + self._tail_size
+        buffer = bytearray()
+        emitted = 0
+        while True:
+            chunk = self._reader.read(READ_SIZE)
+            if not chunk:
+                raise EOFError("Archive ends in the middle of a member")
+            buffer += chunk
+            index = buffer.find(DATA_DESCRIPTOR_SIGNATURE)
+            while index != -1 and index + descriptor_size <= len(buffer):
+                sizes = buffer[index + 8 : index + descriptor_size]
+                compress_size, file_size = struct.unpack(
+                    self._sizes_format, sizes
+                )
+                size = self._consumed + emitted + index
+                if (
+                    compress_size == size
+                    and file_size == size - overhead
+                    and index >= self._tail_size
+                ):
+                    end = index - self._tail_size
+                    self.tail = bytes(buffer[end:index])
+                    self._reader.unread(buffer[index:])
+                    yield bytes(buffer[:end])
+                    return
+                index = buffer.find(DATA_DESCRIPTOR_SIGNATURE, index + 1)
+            if len(buffer) > keep:
+                # Whatever precedes a possible descriptor is member data
+                end = len(buffer) - keep
+                yield bytes(buffer[:end])
+                del buffer[:end]
+                emitted += end
+
+
+def _read_data_descriptor(
+    reader: _StreamReader, zip64: bool
+) -> Tuple[int, int, int]:
+    """Read (CRC-32, compressed size, size) from a data descriptor"""
+    crc = reader.read_exact(4)
+    if crc == DATA_DESCRIPTOR_SIGNATURE:  # The signature is optional
+        crc = reader.read_exact(4)
+    sizes_format = "<QQ" if zip64 else "<LL"
+    compress_size, file_size = struct.unpack(
+        sizes_format, reader.read_exact(struct.calcsize(sizes_format))
+    )
+    return struct.unpack("<L", crc)[0], compress_size, file_size
@@ -1,21 +1,50 @@
 from typing import List, Literal, Union
 
-from zipper import logger
+from zipper import logger, setup_logging
+from zipper.commands import lister, unzipper, verifier, zipper
 from zipper.preprocessor import unescape_wildcards, typer_preprocessor
-from zipper.unzip import unzipper
-from zipper.zip import zipper
 
 import typer
 
 app = typer.Typer()
 
+# Shared by every command
+verbose_option = typer.Option(
+    0,
+    "--verbose",
+    "-v",
+    count=True,
+    help="List each file (-vv for debugging output)",
+)
+quiet_option = typer.Option(
+    0,
+    "--quiet",
+    "-q",
+    count=True,
+    help="Only report warnings (-qq for errors only)",
+)
+stats_option = typer.Option(
+    None,
+    "--stats",
+    help="Report time per stage, sizes per method and the slowest files "
+    "to stderr (--stats=json for JSON)",
+)
+
+
+def check_stats_format(stats: str | None) -> None:
+    if stats not in (None, "text", "json"):
+        raise typer.BadParameter(f"Unsupported stats format: {stats}")
+
+
 @app.command("zip")
 def zip_it(
-    inputs: List[str],
+    inputs: List[str] = typer.Argument(None, help="File(s) to zip"),
     exclude: List[str] = typer.Option([], "--exclude", "-e", help="Excludes"),
     base: str = ".",
     password: bool = False,
-    output: str = "",
+    output: str = typer.Option(
+        "", "--output", "-o", help="Archive to create (- for stdout)"
+    ),
     compression: str = typer.Option(
         "deflate",
         "--compression",
@@ -29,27 +58,197 @@ def zip_it(
         # Instead of Literal:
         show_default=True,
     ),
+    jobs: int = typer.Option(
+        1, "--jobs", help="Worker processes for compression (0 = one per CPU)"
+    ),
+    update: bool = typer.Option(
+        False,
+        "--update",
+        help="Refresh an existing archive, recompressing only changed files",
+    ),
+    checksum: bool = typer.Option(
+        False, "--checksum", help="With --update, also compare CRC-32 of files"
+    ),
+    buffer_size: int = typer.Option(
+        64,
+        "--buffer-size",
+        help="MiB of file data to read ahead and buffer while compressing",
+    ),
+    files_from: str | None = typer.Option(
+        None,
+        "--files-from",
+        help="Also zip the paths listed in this file, one per line "
+        "(- for stdin); needs --output",
+    ),
+    null: bool = typer.Option(
+        False,
+        "--null",
+        help="Paths in --files-from end with NUL, as find -print0 writes",
+    ),
+    stats: str | None = stats_option,
+    verbose: int = verbose_option,
+    quiet: int = quiet_option,
 ):
+    setup_logging(verbose - quiet)
+    check_stats_format(stats)
+    if not inputs and not files_from:
+        raise typer.BadParameter("Give file(s) to zip or --files-from")
+    inputs = inputs or []
+    if files_from:
+        files_from = unescape_wildcards(files_from)
     exclude = unescape_wildcards(exclude)
     logger.debug("Inputs: %s", inputs)
     logger.debug("Excludes: %s", exclude)
-    if compression not in ["deflate", "store", "lzma", "bzip2"]:
+    if compression not in ["deflate", "store", "lzma", "bzip2", "auto"]:
         raise typer.BadParameter(
             f"Unsupported compression type: {compression}"
         )
-    zipper(
+    if not zipper(
         inputs,
         exclude_patterns=exclude,
         output=output,
         base=base,
         prompt=password,
         compression=compression,
-    )
+        jobs=jobs,
+        update=update,
+        checksum=checksum,
+        buffer_size=buffer_size * 1024 * 1024,
+        files_from=files_from,
+        null=null,
+        stats_format=stats,
+    ):
+        raise typer.Exit(1)
 
 
 @app.command("unzip")
-def unzip_it(inputs: List[str], base: str = ".", output: str = ""):
-    unzipper(inputs, base=base, output=output)
+def unzip_it(
+    inputs: List[str],
+    base: str = ".",
+    output: str = typer.Option(
+        "", "--output", "-o", help="Folder to extract to"
+    ),
+    include: List[str] = typer.Option(
+        [],
+        "--include",
+        "-i",
+        help="Extract only the members matching these patterns",
+    ),
+    exclude: List[str] = typer.Option(
+        [], "--exclude", "-e", help="Members to leave out"
+    ),
+    jobs: int = typer.Option(
+        1, "--jobs", help="Worker processes for extraction (0 = one per CPU)"
+    ),
+    skip_existing: bool = typer.Option(
+        False, "--skip-existing", help="Leave files that already exist alone"
+    ),
+    if_changed: bool = typer.Option(
+        False,
+        "--if-changed",
+        help="Only rewrite files whose size, mtime or CRC-32 differ",
+    ),
+    password_fd: int | None = typer.Option(
+        None,
+        "--password-fd",
+        help="Read passwords, one per line, from this file descriptor "
+        "instead of prompting (ZIPPER_PASSWORD works too)",
+    ),
+    stats: str | None = stats_option,
+    verbose: int = verbose_option,
+    quiet: int = quiet_option,
+):
+    setup_logging(verbose - quiet)
+    check_stats_format(stats)
+    if skip_existing and if_changed:
+        raise typer.BadParameter(
+            "--skip-existing and --if-changed are mutually exclusive"
+        )
+    overwrite = "always"
+    if skip_existing:
+        overwrite = "never"
+    elif if_changed:
+        overwrite = "if-changed"
+    if not unzipper(
+        inputs,
+        base=base,
+        output=output,
+        jobs=jobs,
+        password_fd=password_fd,
+        include_members=unescape_wildcards(include),
+        exclude_members=unescape_wildcards(exclude),
+        overwrite=overwrite,
+        stats_format=stats,
+    ):
+        raise typer.Exit(1)
+
+
+@app.command("test")
+def test_it(
+    inputs: List[str],
+    base: str = ".",
+    include: List[str] = typer.Option(
+        [],
+        "--include",
+        "-i",
+        help="Test only the members matching these patterns",
+    ),
+    exclude: List[str] = typer.Option(
+        [], "--exclude", "-e", help="Members to leave out"
+    ),
+    jobs: int = typer.Option(
+        1, "--jobs", help="Worker processes for testing (0 = one per CPU)"
+    ),
+    password_fd: int | None = typer.Option(
+        None,
+        "--password-fd",
+        help="Read passwords, one per line, from this file descriptor "
+        "instead of prompting (ZIPPER_PASSWORD works too)",
+    ),
+    verbose: int = verbose_option,
+    quiet: int = quiet_option,
+):
+    setup_logging(verbose - quiet)
+    if not verifier(
+        inputs,
+        base=base,
+        jobs=jobs,
+        password_fd=password_fd,
+        include_members=unescape_wildcards(include),
+        exclude_members=unescape_wildcards(exclude),
+    ):
+        raise typer.Exit(1)
+
+
+@app.command("list")
+def list_it(
+    inputs: List[str],
+    base: str = ".",
+    include: List[str] = typer.Option(
+        [],
+        "--include",
+        "-i",
+        help="List only the members matching these patterns",
+    ),
+    exclude: List[str] = typer.Option(
+        [], "--exclude", "-e", help="Members to leave out"
+    ),
+    index: bool = typer.Option(
+        False,
+        "--index",
+        help="Save an index next to the archive to speed up later listings",
+    ),
+    verbose: int = verbose_option,
+    quiet: int = quiet_option,
+):
+    setup_logging(verbose - quiet)
+    lister(
+        inputs,
+        base=base,
+        include_members=unescape_wildcards(include),
+        exclude_members=unescape_wildcards(exclude),
+        index=index,
+    )
 
 
 if __name__ == "__main__":
@@ -1,52 +1,613 @@
 import glob
-from typing import List
+import lzma
+import os
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Tuple
 
 import pyzipper
+from pyzipper.zipfile_aes import WZ_AES_V2
 
-from zipper import logger
+from zipper import logger, stats
+from zipper.fastcopy import file_crc
+from zipper.matcher import member_filter
+from zipper.members import MASK_ENCRYPTED
+from zipper.parallel import Job, report_jobs, resolve_jobs, run_jobs
+from zipper.reader import MappedArchive, close_archives, open_archive
+from zipper.stream import unzip_stream
 from zipper.utils import (
     get_absolute_path,
     get_base_path,
     get_extraction_path,
+    get_member_path,
     get_password,
-    is_valid_zip,
+    read_passwords,
 )
 
+# What _unzip_in_worker returns for archives left for the parent, and for
+# files that are not archives
+ENCRYPTED = "encrypted"
+NOT_AN_ARCHIVE = "not an archive"
+
 
 def unzipper(
-    include_patterns: List[str], *, output: str = "", base: str = "."
-) -> None:
-    base = get_base_path(base)
+    include_patterns: List[str],
+    *,
+    output: str = "",
+    base: str = ".",
+    jobs: int = 1,
+    password_fd: int | None = None,
+    include_members: List[str] | None = None,
+    exclude_members: List[str] | None = None,
+    overwrite: str = "always",
+    stats_format: str | None = None,
+) -> bool:
+    """Extract the archives the patterns match. Returns whether every
+    pattern matched and every archive was extracted; files that are not
+    archives are only warned about.
+    """
+    with stats.collecting(stats_format):
+        base = get_base_path(base)
+        include_members = include_members or []
+        exclude_members = exclude_members or []
+        jobs = resolve_jobs(jobs)
+        # Passwords that opened an archive, tried on the next ones first
+        passwords = [p.encode() for p in read_passwords(password_fd)]
+        # Passwords given up front make for an unattended run: never prompt
+        prompt = not passwords
+        streamed = []
+        if "-" in include_patterns:
+            # Stdin can only be read once, front to back, by this process
+            include_patterns = [p for p in include_patterns if p != "-"]
+            extract_to = os.path.abspath(output or base)
+            streamed = run_jobs(
+                [
+                    Job(
+                        "-",
+                        0,
+                        unzip_stream,
+                        (
+                            sys.stdin.buffer,
+                            extract_to,
+                            passwords,
+                            prompt,
+                            _stream_filter(
+                                include_members,
+                                exclude_members,
+                                extract_to,
+                                overwrite,
+                            ),
+                        ),
+                    )
+                ],
+                1,
+            )
+        # A batch spread over the pool leaves each archive to the worker
+        # extracting it: parsed here, it would be parsed again by every
+        # worker forked after the cache dropped it
+        missing = []
+        archives = _find_archives(
+            include_patterns, base, output, missing, parse=jobs == 1
+        )
+        workers = 1
+        member_jobs = jobs
+        if jobs > 1:
+            archives = list(archives)
+            if len(archives) > 1:
+                # Spread whole archives over the pool rather than their members
+                workers, member_jobs = jobs, 1
+            else:
+                archives = [
+                    a for a in archives if _check_archive(a[0], [], missing)
+                ]
+        job_args = (
+            passwords,
+            prompt,
+            include_members,
+            exclude_members,
+            overwrite,
+        )
+        results = run_jobs(
+            (
+                Job(
+                    zip_path,
+                    os.path.getsize(zip_path) if workers > 1 else 0,
+                    unzip_file if workers == 1 else _unzip_in_worker,
+                    (zip_path, extract_to, member_jobs, *job_args),
+                )
+                for zip_path, extract_to in archives
+            ),
+            workers,
+        )
+        # Skipped as the archives checked before extracting would be
+        for result in results:
+            if result.value == NOT_AN_ARCHIVE:
+                logger.warning("Not a valid zip file: %s", result.name)
+        results = [r for r in results if r.value != NOT_AN_ARCHIVE]
+        # Pool workers cannot prompt for passwords, so the encrypted
+        # archives they left are extracted here once the pool is done
+        deferred = {r.name for r in results if r.value == ENCRYPTED}
+        if deferred:
+            results = [r for r in results if r.name not in deferred]
+            results += run_jobs(
+                (
+                    Job(
+                        zip_path,
+                        0,
+                        unzip_file,
+                        (zip_path, extract_to, 1, *job_args),
+                    )
+                    for zip_path, extract_to in archives
+                    if zip_path in deferred
+                ),
+                1,
+            )
+        close_archives()
+        return report_jobs(streamed + results) and not missing
+
+
+def _unzip_in_worker(
+    zip_path: str,
+    extract_to: str,
+    jobs: int,
+    passwords: List[bytes],
+    prompt: bool,
+    *args,
+) -> str | None:
+    """unzip_file for a pool worker, which parses the archive itself.
+    Returns ENCRYPTED, without extracting, for an archive only a password
+    prompt can open, and NOT_AN_ARCHIVE for a file that is not one.
+    """
+    try:
+        with stats.measure("open"):
+            archive = open_archive(zip_path)
+    except FileNotFoundError:
+        raise
+    except (pyzipper.BadZipFile, OSError):
+        return NOT_AN_ARCHIVE
+    if prompt and archive.encrypted:
+        return ENCRYPTED
+    unzip_file(zip_path, extract_to, jobs, passwords, prompt, *args)
+    return None
+
+
+def _find_archives(
+    include_patterns: List[str],
+    base: str,
+    output: str,
+    missing: List[str],
+    parse: bool = True,
+) -> Iterator[Tuple[str, str]]:
+    """Yield (zip_path, extract_to) for every valid archive matched. The
+    patterns and paths not found are added to missing.
+    """
+    for zip_path in _find_zip_paths(
+        include_patterns, base, parse=parse, missing=missing
+    ):
+        yield zip_path, get_extraction_path(zip_path, output)
+
+
+def _find_zip_paths(
+    include_patterns: List[str],
+    base: str,
+    invalid: List[str] | None = None,
+    parse: bool = True,
+    missing: List[str] | None = None,
+) -> Iterator[str]:
+    """Yield the path of every valid archive matched. The patterns and
+    paths that are not are added to invalid, and those not found to
+    missing as well. Without parse, archives are left for whoever
+    extracts them to open and validate.
+    """
+    if invalid is None:
+        invalid = []
+    if missing is None:
+        missing = []
     for file_input in include_patterns:
-        for zipped_file in glob.glob(file_input, recursive=False):
+        with stats.measure("discover"):
+            matches = glob.glob(file_input, recursive=False)
+        if not matches:
+            logger.error("Zip file not found: %s", file_input)
+            invalid.append(file_input)
+            missing.append(file_input)
+        for zipped_file in matches:
             zip_path = get_absolute_path(zipped_file, base)
-            if not is_valid_zip(zip_path):
-                continue
-            extract_to = get_extraction_path(zip_path, output)
-            unzip_file(zip_path, extract_to)
+            if not parse or _check_archive(zip_path, invalid, missing):
+                yield zip_path
+
+
+def _check_archive(
+    zip_path: str, invalid: List[str], missing: List[str] | None = None
+) -> bool:
+    """Whether zip_path opens as an archive, adding it to invalid if not
+    (and to missing if it is gone)
+    """
+    try:
+        # Parsed once here, extraction picks it up from the cache
+        with stats.measure("open"):
+            open_archive(zip_path)
+    except FileNotFoundError:
+        logger.error("Zip file not found: %s", zip_path)
+        if missing is not None:
+            missing.append(zip_path)
+    except (pyzipper.BadZipFile, OSError):
+        logger.warning("Not a valid zip file: %s", zip_path)
+    else:
+        return True
+    invalid.append(zip_path)
+    return False
+
+
+def unzip_file(
+    zip_path: str,
+    extract_to: str,
+    jobs: int = 1,
+    passwords: List[bytes] | None = None,
+    prompt: bool = True,
+    include_members: List[str] | None = None,
+    exclude_members: List[str] | None = None,
+    overwrite: str = "always",
+) -> None:
+    archive = open_archive(zip_path)
+    selected = member_filter(include_members, exclude_members)
+    indexes = None
+    if selected:
+        # Decided from the central directory alone: members left out are
+        # never read
+        indexes = [
+            index
+            for index, member in enumerate(archive.members)
+            if selected(member.filename)
+        ]
+        if not indexes:
+            logger.warning("No members of %s match", zip_path)
+            return
+    if overwrite != "always":
+        indexes = _outdated_members(archive, indexes, extract_to, overwrite)
+        if not indexes:
+            logger.info("Already up to date: %s", extract_to)
+            return
+    members = archive.members
+    if indexes is not None:
+        members = [members[index] for index in indexes]
+    password = None
+    if any(member.flag_bits & MASK_ENCRYPTED for member in members):
+        # Settle the password before a single member is written
+        password = _find_password(
+            archive, [] if passwords is None else passwords, prompt
+        )
+        if password is None and not prompt:
+            raise RuntimeError(f"None of the passwords given opens {zip_path}")
+        if password is None:
+            logger.error("Failed to extract %s after 3 attempts", zip_path)
+            return
+    extract_all(archive, extract_to, jobs, password, indexes)
+    if stats.current:
+        stats.current.add_members(members)
+    if overwrite == "if-changed":
+        _restore_mtimes(archive, indexes, extract_to)
+    logger.info("Extracted to: %s", extract_to)
+
+
+def _outdated_members(
+    archive: MappedArchive,
+    indexes: List[int] | None,
+    extract_to: str,
+    overwrite: str,
+) -> List[int]:
+    """Indexes of the members whose files are missing from extract_to or,
+    with overwrite "if-changed", differ from them
+    """
+    members = archive.members
+    if indexes is None:
+        indexes = range(len(members))
+    outdated = []
+    for index in indexes:
+        member = members[index]
+        target = get_member_path(extract_to, member.filename)
+        if member.is_dir() or _is_outdated(member, target, overwrite):
+            outdated.append(index)
+    skipped = len(indexes) - len(outdated)
+    if skipped:
+        logger.info(
+            "Skipping %d member(s) already in %s", skipped, extract_to
+        )
+    return outdated
+
+
+def _is_outdated(
+    member: pyzipper.ZipInfo, target: str, overwrite: str
+) -> bool:
+    try:
+        st = os.stat(target)
+    except FileNotFoundError:
+        return True
+    if overwrite == "never":
+        return False
+    if st.st_size != member.file_size:
+        return True
+    # Zip timestamps have a resolution of two seconds
+    if abs(st.st_mtime - _member_mtime(member)) < 2:
+        return False
+    if getattr(member, "wz_aes_version", None) == WZ_AES_V2:
+        return True  # No CRC-32 to compare with
+    with open(target, "rb") as src:
+        return file_crc(src.fileno(), st.st_size) != member.CRC
+
+
+def _member_mtime(member: pyzipper.ZipInfo) -> float:
+    return time.mktime(member.date_time + (0, 0, -1))
+
+
+def _restore_mtimes(
+    archive: MappedArchive, indexes: List[int] | None, extract_to: str
+) -> None:
+    """Give extracted files the modification time recorded in the
+    archive, so that the next --if-changed run can trust it
+    """
+    members = archive.members
+    if indexes is None:
+        indexes = range(len(members))
+    for index in indexes:
+        member = members[index]
+        if not member.is_dir():
+            mtime = _member_mtime(member)
+            target = get_member_path(extract_to, member.filename)
+            os.utime(target, (mtime, mtime))
+
+
+def _find_password(
+    archive: MappedArchive, passwords: List[bytes], prompt: bool
+) -> bytes | None:
+    """Try the passwords known so far, then prompt for the password of a
+    protected zip. Each candidate is checked against the archive without
+    extracting it, and the one that works moves to the front of passwords.
+    """
+    for password in passwords:
+        if archive.check_password(password):
+            passwords.remove(password)
+            passwords.insert(0, password)
+            return password
+    if not prompt:
+        return None
+    for _ in range(3):
+        password = get_password(True).encode()
+        if archive.check_password(password):
+            passwords.insert(0, password)
+            return password
+        logger.warning("Incorrect password. Try again.")
+    return None
+
+
+def _stream_filter(
+    include_members: List[str],
+    exclude_members: List[str],
+    extract_to: str,
+    overwrite: str,
+) -> Callable[[str], bool] | None:
+    """member_filter for unzip_stream, which can only leave out existing
+    files by name: the size and CRC-32 of a streamed member may only come
+    after its data, so "if-changed" rewrites everything
+    """
+    selected = member_filter(include_members, exclude_members)
+    if overwrite != "never":
+        return selected
+
+    def missing(arcname: str) -> bool:
+        if selected and not selected(arcname):
+            return False
+        return not os.path.exists(get_member_path(extract_to, arcname))
+
+    return missing
+
+
+BATCH_FILES = 256
+BATCH_BYTES = 16 * 1024 * 1024
+
+# Archive shared with each extraction worker process
+_worker_archive = None
+_worker_password = None
+
+
+def extract_all(
+    archive: MappedArchive,
+    extract_to: str,
+    jobs: int = 1,
+    password: bytes | None = None,
+    indexes: List[int] | None = None,
+) -> None:
+    """Extract every member (or those at indexes), spreading the work over
+    `jobs` processes that share the archive's mapping
+    """
+    jobs = resolve_jobs(jobs)
+    members = archive.members
+    if indexes is None:
+        indexes = range(len(members))
+    if jobs <= 1 or len(indexes) < 2:
+        for index in indexes:
+            member = members[index]
+            with stats.measure(None, member.filename):
+                archive.extract(member, extract_to, password)
+        return
+
+    # Create the directory tree once instead of racing for it in workers
+    directories = {extract_to}
+    for index in indexes:
+        member = members[index]
+        target = get_member_path(extract_to, member.filename)
+        if not member.is_dir():
+            target = os.path.dirname(target)
+        directories.add(target)
+    for directory in sorted(directories):
+        os.makedirs(directory, exist_ok=True)
+
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_share_worker_archive,
+        initargs=(archive, password),
+    ) as executor:
+        futures = [
+            stats.submit(executor, _extract_batch, batch, extract_to)
+            for batch in _plan_batches(members, indexes)
+        ]
+        for future in futures:
+            stats.result(future)
+
+
+def _plan_batches(
+    members: List[pyzipper.ZipInfo], indexes: Iterable[int]
+) -> Iterator[List[int]]:
+    """Group the indexes of file members into batches"""
+    batch = []
+    batch_bytes = 0
+    for index in indexes:
+        member = members[index]
+        if member.is_dir():
+            continue
+        batch.append(index)
+        batch_bytes += member.compress_size
+        if len(batch) >= BATCH_FILES or batch_bytes >= BATCH_BYTES:
+            yield batch
+            batch, batch_bytes = [], 0
+    if batch:
+        yield batch
+
+
+def _share_worker_archive(
+    archive: MappedArchive, password: bytes | None
+) -> None:
+    global _worker_archive, _worker_password
+    # Forked workers inherit the parent's mapping and parsed members
+    _worker_archive = archive
+    _worker_password = password
+
+
+def _extract_batch(indexes: List[int], extract_to: str) -> None:
+    for index in indexes:
+        member = _worker_archive.members[index]
+        with stats.measure(None, member.filename):
+            _worker_archive.extract(member, extract_to, _worker_password)
+
+
+def verifier(
+    include_patterns: List[str],
+    *,
+    base: str = ".",
+    jobs: int = 1,
+    password_fd: int | None = None,
+    include_members: List[str] | None = None,
+    exclude_members: List[str] | None = None,
+) -> bool:
+    """Test archives: decode every member as unzip would and check its
+    CRC-32 or AES HMAC, without writing anything. The members of all the
+    archives are spread over one pool of `jobs` processes. Returns whether
+    every archive passed.
+    """
+    base = get_base_path(base)
+    jobs = resolve_jobs(jobs)
+    passwords = [p.encode() for p in read_passwords(password_fd)]
+    prompt = not passwords
+    selected = member_filter(include_members or [], exclude_members or [])
+    start = time.perf_counter()
+    invalid = []
+    # (zip_path, password, batches of member indexes) of each archive
+    plans = []
+    for zip_path in _find_zip_paths(include_patterns, base, invalid):
+        try:
+            archive = open_archive(zip_path)
+            indexes = [
+                index
+                for index, member in enumerate(archive.members)
+                if selected is None or selected(member.filename)
+            ]
+            encrypted = any(
+                archive.members[index].flag_bits & MASK_ENCRYPTED
+                for index in indexes
+            )
+            password = None
+            if encrypted:
+                password = _find_password(archive, passwords, prompt)
+        except (pyzipper.BadZipFile, OSError, EOFError, lzma.LZMAError) as e:
+            # The password check decodes a member, which may be corrupt.
+            # Logged as text: the traceback holds views of the mapping
+            logger.error(
+                "Failed %s: %s: %s", zip_path, type(e).__name__, str(e)
+            )
+            invalid.append(zip_path)
+            continue
+        if encrypted and password is None:
+            logger.error("No password given opens %s", zip_path)
+            invalid.append(zip_path)
+            continue
+        plans.append(
+            (zip_path, password, list(_plan_batches(archive.members, indexes)))
+        )
+
+    if jobs > 1 and sum(len(batches) for _, _, batches in plans) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = [
+                [
+                    executor.submit(_verify_batch, zip_path, batch, password)
+                    for batch in batches
+                ]
+                for zip_path, password, batches in plans
+            ]
+            results = [[f.result() for f in futures] for futures in results]
+    else:
+        results = [
+            [_verify_batch(zip_path, batch, password) for batch in batches]
+            for zip_path, password, batches in plans
+        ]
+    close_archives()
+
+    ok = not invalid
+    total_bytes = total_members = 0
+    for (zip_path, _, _), batches in zip(plans, results):
+        members = failed = 0
+        for checked, size, failures in batches:
+            members += checked
+            total_bytes += size
+            failed += len(failures)
+            for name, error in failures:
+                logger.error("Failed %s: %s: %s", zip_path, name, error)
+        total_members += members
+        if failed:
+            ok = False
+            logger.error(
+                "%s: %d of %d member(s) bad", zip_path, failed, members
+            )
         else:
-            logger.error(f"Zip file not found: {file_input}")
+            logger.info("OK %s: %d member(s)", zip_path, members)
+    seconds = time.perf_counter() - start
+    megabytes = total_bytes / (1024 * 1024)
+    logger.info(
+        "Tested %d member(s) of %d archive(s), %.1f MiB in %.2fs (%.1f MiB/s)",
+        total_members,
+        len(plans),
+        megabytes,
+        seconds,
+        megabytes / max(seconds, 1e-6),
+    )
+    return ok
 
 
-def unzip_file(zip_path: str, extract_to: str) -> None:
-    with pyzipper.AESZipFile(zip_path, "r") as zf:
+def _verify_batch(
+    zip_path: str, indexes: List[int], password: bytes | None
+) -> Tuple[int, int, List[Tuple[str, str]]]:
+    """Verify the members at indexes, returning how many were checked,
+    their total size and the (name, error) of each that failed
+    """
+    # Forked workers find the archive in the cache they inherited
+    archive = open_archive(zip_path)
+    size = 0
+    failures = []
+    for index in indexes:
+        member = archive.members[index]
         try:
-            # Try without password
-            zf.extractall(path=extract_to)
-            logger.info(f"Extracted to: {extract_to}")
-            return
-        except RuntimeError as e:
-            if "encrypted" not in str(e).lower():
-                raise
-
-        # Prompt for password as protected zip
-        for _ in range(3):
-            password = get_password(True)
-            try:
-                zf.setpassword(password.encode())
-                zf.extractall(path=extract_to)
-                logger.info(f"Extracted to: {extract_to}")
-                continue
-            except RuntimeError:
-                logger.warning("Incorrect password. Try again.")
-        logger.error(f"Failed to extract {zip_path} after 3 attempts")
+            archive.verify(member, password)
+        except Exception as e:
+            failures.append((member.filename, f"{type(e).__name__}: {e}"))
+        size += member.file_size
+    return len(indexes), size, failures
@@ -1,11 +1,18 @@
-import fnmatch
 import os
+import stat
+import sys
 import zipfile
 
 from datetime import datetime
 from getpass import getpass
-from typing import Generator, List
-from zipper import logger
+from typing import BinaryIO, Generator, Iterable, Iterator, List, Set, Tuple
+from zipper import logger, stats
+from zipper.matcher import PathMatcher, compile_patterns
+
+FileEntry = Tuple[str, os.stat_result]
+
+# Bytes of a file list read at a time
+FILE_LIST_CHUNK = 64 * 1024
 
 
 def check_new_archive_exists(archive: str) -> bool:
@@ -37,6 +44,16 @@ def get_extraction_path(zip_path: str, output: str) -> str:
     return os.path.abspath(extract_to)
 
 
+def get_member_path(extract_to: str, arcname: str) -> str:
+    """Target path of an archive member, with absolute paths and "." / ".."
+    components dropped the same way pyzipper's extract does
+    """
+    arcname = os.path.splitdrive(arcname.replace("/", os.path.sep))[1]
+    invalid_parts = ("", os.path.curdir, os.path.pardir)
+    parts = [p for p in arcname.split(os.path.sep) if p not in invalid_parts]
+    return os.path.normpath(os.path.join(extract_to, *parts))
+
+
 def get_output_name(item_name: str, timestamp: bool = False) -> str:
     item_name = item_name.replace(".zip", "")
     if timestamp:
@@ -52,12 +69,65 @@ def get_password(prompt: bool = False) -> str:
     return ""
 
 
+# Password for unattended runs, tried before any prompt
+PASSWORD_ENV = "ZIPPER_PASSWORD"
+
+
+def read_passwords(password_fd: int | None = None) -> List[str]:
+    """Passwords given up front: the ZIPPER_PASSWORD environment variable,
+    then one per line read from the password_fd file descriptor
+    """
+    passwords = []
+    if os.environ.get(PASSWORD_ENV):
+        passwords.append(os.environ[PASSWORD_ENV])
+    if password_fd is not None:
+        with os.fdopen(password_fd, encoding="utf-8") as src:
+            for line in src:
+                line = line.rstrip("\r\n")
+                if line and line not in passwords:
+                    passwords.append(line)
+    return passwords
+
+
+def read_file_list(path: str, null: bool = False) -> Iterator[str]:
+    """Paths from a file list (- for stdin), one per line or, with null,
+    separated by NUL characters as `find -print0` writes them. The list
+    is read a chunk at a time as the paths are consumed.
+    """
+    separator = b"\0" if null else b"\n"
+    if path == "-":
+        yield from _split_file_list(sys.stdin.buffer, separator)
+        return
+    with open(path, "rb") as src:
+        yield from _split_file_list(src, separator)
+
+
+def _split_file_list(src: BinaryIO, separator: bytes) -> Iterator[str]:
+    pending = b""
+    while chunk := src.read(FILE_LIST_CHUNK):
+        *names, pending = (pending + chunk).split(separator)
+        for name in names:
+            if separator == b"\n":
+                name = name.rstrip(b"\r")
+            if name:
+                yield os.fsdecode(name)
+    if separator == b"\n":
+        pending = pending.rstrip(b"\r")
+    if pending:
+        yield os.fsdecode(pending)
+
+
+def has_encrypted_members(zip_path: str) -> bool:
+    with zipfile.ZipFile(zip_path) as zf:
+        return any(info.flag_bits & 0x1 for info in zf.infolist())
+
+
 def is_valid_zip(zip_path: str) -> bool:
     if not os.path.exists(zip_path):
-        logger.error(f"Zip file not found: {zip_path}")
+        logger.error("Zip file not found: %s", zip_path)
         return False
     if not zipfile.is_zipfile(zip_path):
-        logger.warning(f"Not a valid zip file: {zip_path}")
+        logger.warning("Not a valid zip file: %s", zip_path)
         return False
     return True
 
@@ -65,23 +135,67 @@ def is_valid_zip(zip_path: str) -> bool:
 def navigate(
     root_path: str, exclude_patterns: List[str]
 ) -> Generator[str, None, None]:
-    if os.path.isfile(root_path):
-        yield os.path.abspath(root_path)
-    elif os.path.isdir(root_path):
-        for root, dirs, files in os.walk(root_path):
-            # Don't walk into excluded subdirectories
-            dirs[:] = [
-                d
-                for d in dirs
-                if not any(
-                    fnmatch.fnmatch(os.path.join(root, d), pattern)
-                    for pattern in exclude_patterns
-                )
-            ]
-            for name in files:
-                full_path = os.path.join(root, name)
-                if not any(
-                    fnmatch.fnmatch(full_path, pattern)
-                    for pattern in exclude_patterns
-                ):
-                    yield os.path.join(root, name)
+    entries = scan(root_path, exclude_patterns)
+    if stats.current:
+        entries = stats.current.iterate("discover", entries)
+    for path, _ in entries:
+        yield path
+
+
+def scan(
+    root_path: str, exclude_patterns: List[str] | PathMatcher
+) -> Generator[FileEntry, None, None]:
+    """Single-pass os.scandir walk yielding (path, stat) for regular files.
+
+    The stat result is the one cached on the DirEntry, so callers don't
+    need to stat again. Excluded directories are pruned before descending
+    and, like os.walk, symlinked directories are not followed.
+    """
+    if isinstance(exclude_patterns, PathMatcher):
+        exclude = exclude_patterns
+    else:
+        exclude = compile_patterns(exclude_patterns)
+    try:
+        root_stat = os.stat(root_path)
+    except OSError:
+        return
+    if stat.S_ISREG(root_stat.st_mode):
+        yield os.path.abspath(root_path), root_stat
+        return
+    if not stat.S_ISDIR(root_stat.st_mode):
+        return
+
+    pending = [os.path.abspath(root_path)]
+    while pending:
+        directory = pending.pop()
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    is_dir = entry.is_dir()
+                    if exclude and exclude.match(entry.path, is_dir):
+                        continue
+                    if is_dir:
+                        if not entry.is_symlink():
+                            subdirs.append(entry.path)
+                    elif entry.is_file():
+                        yield entry.path, entry.stat()
+        except OSError as e:
+            logger.warning("Cannot scan %s: %s", directory, e)
+        # Reversed so subdirectories are walked in listing order
+        pending.extend(reversed(subdirs))
+
+
+def unique_files(
+    entries: Iterable[FileEntry], seen: Set
+) -> Generator[FileEntry, None, None]:
+    """Drop entries whose path is already in `seen`, so files reached
+    through overlapping patterns are only archived once. Hard links are
+    distinct paths and each keeps its own member.
+    """
+    for path, st in entries:
+        path = os.path.normpath(path)
+        if path in seen:
+            continue
+        seen.add(path)
+        yield path, st
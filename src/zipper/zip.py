@@ -1,19 +1,69 @@
-import fnmatch
 import glob
+import itertools
 import os
+import shutil
+import stat
+import sys
+import tempfile
 
-from typing import List
-from zipper import logger
+from collections import deque
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import BinaryIO, Deque, Iterable, Iterator, List, Set, Tuple
+from zipper import VERBOSE, logger, stats
+from zipper.compression import ZIP_AUTO, choose_method, pays_off
+from zipper.fastcopy import file_crc
+from zipper.matcher import PathMatcher, compile_patterns
+from zipper.members import (
+    MASK_ENCRYPTED,
+    READ_SIZE,
+    append_member,
+    can_copy_range,
+    compress_member,
+    compress_members,
+    copy_member,
+    discard_member,
+    new_zipinfo,
+    store_member,
+)
+from zipper.parallel import (
+    DEFLATE_BLOCK_SIZE,
+    Job,
+    ParallelDeflater,
+    report_jobs,
+    resolve_jobs,
+    run_jobs,
+)
 from zipper.utils import (
+    FileEntry,
     check_new_archive_exists,
     get_absolute_path,
     get_base_path,
     get_output_name,
     get_password,
-    navigate,
+    read_file_list,
+    scan,
+    unique_files,
 )
 import pyzipper
 
+# File data the serial pipeline may hold in memory, read ahead or
+# compressed and waiting to be written
+PIPELINE_BUFFER = 64 * 1024 * 1024
+# Small files travel through the pipeline in batches of up to this many
+# files or 1/PIPELINE_BATCHES of the buffer
+PIPELINE_BATCH_FILES = 64
+PIPELINE_BATCHES = 16
+PREFETCH_THREADS = 4
+# Files smaller than this are written directly while nothing is in flight:
+# handing them to the pipeline costs more than reading them from a warm
+# page cache
+DIRECT_WRITE_SIZE = 64 * 1024
+
 
 def zipper(
     include_patterns: List[str],
@@ -23,68 +73,713 @@ def zipper(
     base: str,
     prompt: bool,
     compression: str,
-) -> None:
-    logger.debug("Include Patterns: %s", include_patterns)
-    logger.debug("Exclude patterns: %s", exclude_patterns)
-    base = get_base_path(base)
-    password = get_password(prompt)
-    collected_files = set()
+    jobs: int = 1,
+    update: bool = False,
+    checksum: bool = False,
+    buffer_size: int = PIPELINE_BUFFER,
+    files_from: str | None = None,
+    null: bool = False,
+    stats_format: str | None = None,
+) -> bool:
+    """Zip what the patterns match, into output or else one archive per
+    match. files_from names a file list (- for stdin) whose paths are
+    archived as well, as they are read. stats_format (text or json) asks
+    for a report of where the time went, printed to stderr. Returns
+    whether every archive was written.
+    """
+    with stats.collecting(stats_format):
+        logger.debug("Include Patterns: %s", include_patterns)
+        logger.debug("Exclude patterns: %s", exclude_patterns)
+        base = get_base_path(base)
+        password = get_password(prompt)
+        jobs = resolve_jobs(jobs)
+        exclude = compile_patterns(exclude_patterns, base)
+        if output == "-" and sys.stdout.isatty():
+            logger.error("Refusing to write an archive to a terminal")
+            return False
+        if files_from and not output:
+            logger.error("--files-from needs an --output archive")
+            return False
+        if output:
+            # Everything goes into one archive, streamed as discovered
+            matches = _expand_patterns(
+                include_patterns, exclude, base, prune=True
+            )
+            seen = set()
+            files = (
+                entry
+                for _, match in matches
+                for entry in unique_files(
+                    scan(os.path.abspath(match), exclude), seen
+                )
+            )
+            if files_from:
+                files = itertools.chain(
+                    files, _listed_files(files_from, null, exclude, base)
+                )
+            if stats.current:
+                files = stats.current.iterate("discover", files)
+            if output == "-":
+                output_zip = sys.stdout.buffer
+            else:
+                output_zip = get_output_name(output, False)
+            zip_files(
+                files,
+                output_zip,
+                password,
+                base,
+                compression,
+                jobs,
+                update,
+                checksum,
+                buffer_size,
+            )
+            return True
+
+        # One archive per match: independent jobs for the scheduler
+        matches = _expand_patterns(
+            include_patterns, exclude, base, prune=False
+        )
+        archives = _per_match_archives(matches, exclude, jobs > 1)
+        workers = 1
+        member_jobs = jobs
+        if jobs > 1:
+            archives = list(archives)
+            if len(archives) > 1:
+                # Spread whole archives over the pool, not their members
+                workers, member_jobs = jobs, 1
+        results = run_jobs(
+            (
+                Job(
+                    output_zip,
+                    _total_size(files) if workers > 1 else 0,
+                    zip_files,
+                    (
+                        files,
+                        output_zip,
+                        password,
+                        base,
+                        compression,
+                        member_jobs,
+                        update,
+                        checksum,
+                        buffer_size,
+                    ),
+                )
+                for output_zip, files in archives
+            ),
+            workers,
+        )
+        return report_jobs(results)
+
+
+def _expand_patterns(
+    include_patterns: List[str],
+    exclude: PathMatcher,
+    base: str,
+    prune: bool,
+) -> Iterator[Tuple[str, str]]:
+    """Yield (pattern_path, match) for every match of every pattern.
+
+    With prune set, matches inside an already yielded directory are
+    skipped, since walking that directory covers them.
+    """
+    walked = set()
     for pattern in include_patterns:
         pattern_path = get_absolute_path(pattern, base)
         logger.debug("Checking pattern: %s", pattern_path)
-        for match in glob.glob(pattern_path, recursive=True):
+        for match in _glob(pattern_path, prune):
             full_path = os.path.abspath(match)
-            if any(
-                fnmatch.fnmatch(full_path, pattern)
-                for pattern in exclude_patterns
-            ):
+            if exclude and exclude.match(full_path, os.path.isdir(full_path)):
                 logger.debug("Skipping %s", full_path)
                 continue
-            for item in navigate(full_path, exclude_patterns):
-                collected_files.add(os.path.abspath(item))
-            if (not output) and (not collected_files):
-                logger.warning(f"No files matched for {pattern_path}")
-            elif not output:
-                output_zip = get_output_name(match, False)
-                zip_files(list(collected_files), output_zip, password, base)
-                collected_files = set()
-    if output:
-        output_zip = get_output_name(output, False)
-        zip_files(
-            list(collected_files), output_zip, password, base, compression
-        )
+            if prune:
+                if _inside(full_path, walked):
+                    continue
+                walked.add(full_path)
+            yield pattern_path, match
+
+
+def _glob(pattern_path: str, prune: bool) -> Iterator[str]:
+    if not glob.has_magic(pattern_path):
+        # Nothing to expand, so spare glob its directory listing
+        if os.path.lexists(pattern_path):
+            yield pattern_path
+        return
+    head, tail = os.path.split(pattern_path)
+    if prune and tail == "**" and not glob.has_magic(head):
+        # "dir/**" is dir plus everything below it, which one walk of dir
+        # covers without glob listing the whole tree up front
+        if os.path.isdir(head):
+            yield head
+        return
+    yield from glob.iglob(pattern_path, recursive=True)
+
+
+def _listed_files(
+    files_from: str, null: bool, exclude: PathMatcher, base: str
+) -> Iterator[FileEntry]:
+    """The regular files of a file list, taken as listed: no globbing,
+    walking or deduplication, so memory stays flat however long it is
+    """
+    for name in read_file_list(files_from, null):
+        path = get_absolute_path(name, base)
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            logger.warning("Skipping %s: %s", name, e.strerror)
+            continue
+        if not stat.S_ISREG(st.st_mode):
+            logger.debug("Skipping %s: not a regular file", path)
+            continue
+        if exclude and exclude.match(path, False):
+            logger.debug("Skipping %s", path)
+            continue
+        yield path, st
+
+
+def _inside(path: str, directories: Set[str]) -> bool:
+    """Whether path is within (or is) one of the directories"""
+    while path not in directories:
+        parent = os.path.dirname(path)
+        if parent == path:
+            return False
+        path = parent
+    return True
+
+
+def _per_match_archives(
+    matches: Iterator[Tuple[str, str]],
+    exclude: PathMatcher,
+    materialize: bool,
+) -> Iterator[Tuple[str, Iterable[FileEntry]]]:
+    for pattern_path, match in matches:
+        files = unique_files(scan(os.path.abspath(match), exclude), set())
+        if stats.current:
+            files = stats.current.iterate("discover", files)
+        first = next(files, None)
+        if first is None:
+            logger.warning("No files matched for %s", pattern_path)
+            continue
+        files = itertools.chain([first], files)
+        if materialize:
+            # Pool workers get the whole list, sized for scheduling
+            files = list(files)
+        yield get_output_name(match, False), files
+
+
+def _total_size(files: List[FileEntry]) -> int:
+    return sum(st.st_size for _, st in files)
+
+
+def _with_stat(files: Iterable[str | FileEntry]) -> Iterator[FileEntry]:
+    """Accept plain paths as well as (path, stat) entries from scan"""
+    for item in files:
+        if isinstance(item, str):
+            yield item, os.stat(item)
+        else:
+            yield item
 
 
 def zip_files(
-    files: List[str],
-    output_zip: str,
+    files: Iterable[str | FileEntry],
+    output_zip: str | BinaryIO,
     password: str | None = None,
     base: str = os.getcwd(),
     compression: str = "deflate",
+    jobs: int = 1,
+    update: bool = False,
+    checksum: bool = False,
+    buffer_size: int = PIPELINE_BUFFER,
 ):
-    if check_new_archive_exists(output_zip):
-        logger.warning(f"Archive {output_zip} already exists. Skipping...")
+    """Write files to the archive at output_zip, or stream the archive to
+    a file object such as a pipe; unseekable outputs get data descriptors
+    for files too large to buffer. buffer_size bounds the file data held
+    in memory by a single job.
+    """
+    streaming = not isinstance(output_zip, str)
+    exists = not streaming and check_new_archive_exists(output_zip)
+    if exists and not update:
+        logger.warning("Archive %s already exists. Skipping...", output_zip)
         return
     compression_map = {
         "deflate": pyzipper.ZIP_DEFLATED,
         "store": pyzipper.ZIP_STORED,
         "bzip2": pyzipper.ZIP_BZIP2,
         "lzma": pyzipper.ZIP_LZMA,
+        "auto": ZIP_AUTO,
     }
     compression_method = compression_map.get(
         compression, pyzipper.ZIP_DEFLATED
     )
-    with pyzipper.AESZipFile(
-        output_zip, "w", compression=compression_method
-    ) as zf:
-        if password:
-            message = "AES encrypted zip"
-            zf.setpassword(password.encode())
-            zf.setencryption(pyzipper.WZ_AES, nbits=256)
-        else:
-            message = "zip"
-        for file in files:
-            arcname = os.path.relpath(file, start=base)
-            logger.info(f"[+] Adding: {arcname} ({file})")
-            zf.write(file, arcname)
+    message = "AES encrypted zip" if password else "zip"
+    entries = _with_stat(files)
+    jobs = resolve_jobs(jobs)
+    if exists:
+        _update_archive(
+            entries,
+            output_zip,
+            password,
+            base,
+            compression_method,
+            jobs,
+            checksum,
+            buffer_size,
+        )
+        logger.info("Updated %s: %s", message, output_zip)
+        return
+    with _open_archive(output_zip, compression_method, password) as zf:
+        _write_members(
+            zf, entries, base, compression_method, password, jobs, buffer_size
+        )
+        if stats.current:
+            stats.current.add_members(zf.filelist)
+    if streaming:
+        output_zip.flush()
+        output_zip = getattr(output_zip, "name", "stream")
     logger.info("Created %s: %s", message, output_zip)
+
+
+def _open_archive(
+    output_zip: str | BinaryIO, compression_method: int, password: str | None
+) -> pyzipper.AESZipFile:
+    if compression_method == ZIP_AUTO:
+        compression_method = pyzipper.ZIP_DEFLATED  # Default, rarely used
+    zf = pyzipper.AESZipFile(output_zip, "w", compression=compression_method)
+    if password:
+        zf.setpassword(password.encode())
+        zf.setencryption(pyzipper.WZ_AES, nbits=256)
+    return zf
+
+
+def _write_members(
+    zf: pyzipper.AESZipFile,
+    entries: Iterable[FileEntry],
+    base: str,
+    compression_method: int,
+    password: str | None,
+    jobs: int,
+    buffer_size: int = PIPELINE_BUFFER,
+) -> None:
+    # Stored members are copied by the kernel, workers would only add
+    # a round trip through their memory
+    stored = compression_method == pyzipper.ZIP_STORED and not password
+    if stored and can_copy_range(zf):
+        for file, st in entries:
+            arcname = os.path.relpath(file, start=base)
+            logger.log(VERBOSE, "[+] Adding: %s (%s)", arcname, file)
+            with stats.measure("stream", arcname):
+                _add_file(zf, file, arcname, st, compression_method)
+    elif jobs > 1:
+        _write_parallel(zf, entries, base, compression_method, password, jobs)
+    else:
+        _write_pipelined(
+            zf, entries, base, compression_method, password, buffer_size
+        )
+
+
+def _update_archive(
+    entries: Iterable[FileEntry],
+    output_zip: str,
+    password: str | None,
+    base: str,
+    compression_method: int,
+    jobs: int,
+    checksum: bool,
+    buffer_size: int = PIPELINE_BUFFER,
+) -> None:
+    """Rebuild an existing archive from the files on disk, copying the
+    compressed bytes of unchanged members instead of recompressing them.
+    Members whose files are gone are dropped.
+    """
+    fd, temp_zip = tempfile.mkstemp(
+        suffix=".tmp", dir=os.path.dirname(os.path.abspath(output_zip))
+    )
+    os.close(fd)
+    try:
+        with (
+            pyzipper.AESZipFile(output_zip) as old,
+            _open_archive(temp_zip, compression_method, password) as zf,
+        ):
+            reusable = _password_matches(old, password)
+            if not reusable:
+                logger.warning(
+                    "Password does not match %s, recompressing all files",
+                    output_zip,
+                )
+            changed = _copy_unchanged(
+                zf,
+                old,
+                entries,
+                base,
+                compression_method,
+                password,
+                checksum,
+                reusable,
+            )
+            _write_members(
+                zf,
+                changed,
+                base,
+                compression_method,
+                password,
+                jobs,
+                buffer_size,
+            )
+            if stats.current:
+                stats.current.add_members(zf.filelist)
+            removed = old.NameToInfo.keys() - zf.NameToInfo.keys()
+            for name in sorted(removed):
+                logger.log(VERBOSE, "[-] Removing: %s", name)
+        shutil.copymode(output_zip, temp_zip)
+        os.replace(temp_zip, output_zip)
+    except BaseException:
+        os.remove(temp_zip)
+        raise
+
+
+def _password_matches(
+    zf: pyzipper.AESZipFile, password: str | None
+) -> bool:
+    """Whether encrypted members can be reused under the given password"""
+    encrypted = [
+        zinfo for zinfo in zf.infolist() if zinfo.flag_bits & MASK_ENCRYPTED
+    ]
+    if not password or not encrypted:
+        return True
+    zinfo = min(encrypted, key=lambda zinfo: zinfo.compress_size)
+    try:
+        # Opening checks the password verification value
+        zf.open(zinfo, pwd=password.encode()).close()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _copy_unchanged(
+    zf: pyzipper.AESZipFile,
+    old: pyzipper.AESZipFile,
+    entries: Iterable[FileEntry],
+    base: str,
+    compression_method: int,
+    password: str | None,
+    checksum: bool,
+    reusable: bool,
+) -> Iterator[FileEntry]:
+    """Raw-copy members that are unchanged, yielding the remaining files"""
+    for file, st in entries:
+        arcname = os.path.relpath(file, start=base)
+        zinfo = new_zipinfo(arcname, st)
+        previous = old.NameToInfo.get(zinfo.filename)
+        if (
+            reusable
+            and previous is not None
+            and bool(previous.flag_bits & MASK_ENCRYPTED) == bool(password)
+            and compression_method in (ZIP_AUTO, previous.compress_type)
+            and _is_unchanged(previous, zinfo, file, checksum)
+        ):
+            logger.debug("Unchanged: %s", arcname)
+            copy_member(zf, previous, old.fp)
+            continue
+        yield file, st
+
+
+def _is_unchanged(
+    previous: pyzipper.ZipInfo,
+    current: pyzipper.ZipInfo,
+    file: str,
+    checksum: bool,
+) -> bool:
+    year, month, day, hour, minute, second = current.date_time
+    if (
+        previous.file_size != current.file_size
+        # DOS timestamps have a two second resolution
+        or previous.date_time
+        != (year, month, day, hour, minute, second // 2 * 2)
+        or previous.external_attr != current.external_attr
+    ):
+        return False
+    if not checksum:
+        return True
+    if previous.CRC == 0 and previous.file_size:
+        # AE-2 encrypted members don't record a CRC to compare against
+        return False
+    return _file_crc(file) == previous.CRC
+
+
+def _file_crc(file: str) -> int:
+    with open(file, "rb") as src:
+        return file_crc(src.fileno(), os.fstat(src.fileno()).st_size)
+
+
+def _add_file(
+    zf: pyzipper.AESZipFile,
+    file: str,
+    arcname: str,
+    st: os.stat_result,
+    compression_method: int,
+    deflaters: Executor | None = None,
+    jobs: int = 1,
+) -> None:
+    """Write a file with the given method (or the one picked for it), with
+    deflate blocks spread over the deflaters pool when one is given
+    """
+    auto = compression_method == ZIP_AUTO
+    if auto:
+        compression_method = choose_method(file, st)
+    if compression_method == pyzipper.ZIP_DEFLATED and deflaters:
+        zinfo = _write_deflate_blocks(zf, file, arcname, st, deflaters, jobs)
+    else:
+        zinfo = _write_file(zf, file, arcname, st, compression_method)
+    if (
+        auto
+        and compression_method != pyzipper.ZIP_STORED
+        and not pays_off(zinfo)
+        and zf._seekable
+    ):
+        logger.debug("Storing %s, compression didn't pay off", arcname)
+        discard_member(zf, zinfo)
+        _write_file(zf, file, arcname, st, pyzipper.ZIP_STORED)
+
+
+def _write_file(
+    zf: pyzipper.AESZipFile,
+    file: str,
+    arcname: str,
+    st: os.stat_result,
+    compression_method: int,
+) -> pyzipper.ZipInfo:
+    """zf.write without the stat the walker already made"""
+    if (
+        compression_method == pyzipper.ZIP_STORED
+        and not zf.encryption
+        and can_copy_range(zf)
+    ):
+        return store_member(zf, file, arcname, st)
+    zinfo = new_zipinfo(arcname, st)
+    zinfo.compress_type = compression_method
+    with open(file, "rb") as src, zf.open(zinfo, "w") as dest:
+        shutil.copyfileobj(src, dest, READ_SIZE)
+    return zinfo
+
+
+def _write_pipelined(
+    zf: pyzipper.AESZipFile,
+    entries: Iterable[FileEntry],
+    base: str,
+    compression_method: int,
+    password: str | None,
+    buffer_size: int,
+) -> None:
+    """Write members through three overlapping stages: reader threads
+    load upcoming batches of files, a compressor thread encodes them in
+    memory and this thread appends them in order. At most buffer_size
+    bytes of file data are in flight; files over a quarter of it are
+    streamed on their own. Small files are written directly unless they
+    can join a batch already under way.
+    """
+    pending = deque()
+    # File bytes of the pending batches, kept as they come and go
+    pending_bytes = 0
+    batch = []
+    batch_bytes = 0
+    with (
+        ThreadPoolExecutor(max_workers=PREFETCH_THREADS) as readers,
+        ThreadPoolExecutor(max_workers=1) as compressor,
+    ):
+
+        def submit() -> None:
+            nonlocal pending_bytes
+            # Make room for the batch within the budget first
+            while pending and pending_bytes + batch_bytes > buffer_size:
+                pending_bytes -= _append_encoded(zf, pending)
+            read = _read_files
+            if stats.current:
+                read = stats.current.timed("read", read)
+            data = readers.submit(read, [f for f, _, _ in batch])
+            encoded = compressor.submit(
+                _encode_files, data, batch, compression_method, password
+            )
+            pending.append((batch, batch_bytes, encoded))
+            pending_bytes += batch_bytes
+
+        for file, st in entries:
+            arcname = os.path.relpath(file, start=base)
+            if st.st_size < DIRECT_WRITE_SIZE and not (pending or batch):
+                logger.log(VERBOSE, "[+] Adding: %s (%s)", arcname, file)
+                with stats.measure("stream", arcname):
+                    _add_file(zf, file, arcname, st, compression_method)
+                continue
+            if st.st_size > buffer_size // 4:
+                if batch:
+                    submit()
+                    batch, batch_bytes = [], 0
+                while pending:
+                    pending_bytes -= _append_encoded(zf, pending)
+                logger.log(VERBOSE, "[+] Adding: %s (%s)", arcname, file)
+                with stats.measure("stream", arcname):
+                    _add_file(zf, file, arcname, st, compression_method)
+                continue
+            batch.append((file, arcname, st))
+            batch_bytes += st.st_size
+            if (
+                len(batch) >= PIPELINE_BATCH_FILES
+                or batch_bytes >= buffer_size // PIPELINE_BATCHES
+            ):
+                submit()
+                batch, batch_bytes = [], 0
+            # Write whatever is ready without waiting for the rest
+            while pending and pending[0][2].done():
+                pending_bytes -= _append_encoded(zf, pending)
+        if batch:
+            submit()
+        while pending:
+            pending_bytes -= _append_encoded(zf, pending)
+
+
+def _read_file(file: str) -> bytes:
+    with open(file, "rb") as src:
+        return src.read()
+
+
+def _read_files(files: List[str]) -> List[bytes]:
+    return [_read_file(file) for file in files]
+
+
+def _encode_files(
+    data: Future,
+    batch: List[Tuple[str, str, os.stat_result]],
+    compression_method: int,
+    password: str | None,
+) -> List[Tuple[pyzipper.ZipInfo, bytes]]:
+    encoded = []
+    for (file, arcname, st), raw in zip(batch, data.result()):
+        with stats.measure(None, arcname):
+            encoded.append(
+                compress_member(
+                    file, arcname, compression_method, password, st, raw
+                )
+            )
+    return encoded
+
+
+def _append_encoded(
+    zf: pyzipper.AESZipFile,
+    pending: Deque[Tuple[List[Tuple[str, str, os.stat_result]], int, Future]],
+) -> int:
+    """Append the members of the oldest pending batch, returning its size
+    in file bytes
+    """
+    batch, batch_bytes, encoded = pending.popleft()
+    members = encoded.result()
+    with stats.measure("write"):
+        for (file, arcname, _), (zinfo, payload) in zip(batch, members):
+            logger.log(VERBOSE, "[+] Adding: %s (%s)", arcname, file)
+            append_member(zf, zinfo, payload)
+    return batch_bytes
+
+
+# Compressed members travel back from the workers in memory, so anything
+# larger than this is written by the main process instead
+PARALLEL_MEMBER_LIMIT = 64 * 1024 * 1024
+BATCH_FILES = 64
+BATCH_BYTES = 8 * 1024 * 1024
+
+
+def _plan_batches(
+    entries: Iterable[FileEntry], base: str
+) -> Iterator[Tuple[bool, List[Tuple[str, str, os.stat_result]]]]:
+    """Group files into ordered (inline, [(file, arcname, stat), ...])"""
+    batch = []
+    batch_bytes = 0
+    for file, st in entries:
+        arcname = os.path.relpath(file, start=base)
+        if st.st_size > PARALLEL_MEMBER_LIMIT:
+            if batch:
+                yield False, batch
+                batch, batch_bytes = [], 0
+            yield True, [(file, arcname, st)]
+            continue
+        batch.append((file, arcname, st))
+        batch_bytes += st.st_size
+        if len(batch) >= BATCH_FILES or batch_bytes >= BATCH_BYTES:
+            yield False, batch
+            batch, batch_bytes = [], 0
+    if batch:
+        yield False, batch
+
+
+def _write_parallel(
+    zf: pyzipper.AESZipFile,
+    entries: Iterable[FileEntry],
+    base: str,
+    compression_method: int,
+    password: str | None,
+    jobs: int,
+) -> None:
+    """Compress members in a process pool and append them in order"""
+    pending = deque()
+    with (
+        ProcessPoolExecutor(max_workers=jobs) as executor,
+        ThreadPoolExecutor(max_workers=jobs) as deflaters,
+    ):
+        for inline, batch in _plan_batches(entries, base):
+            if inline:
+                _append_completed(zf, pending, 0)
+                file, arcname, st = batch[0]
+                logger.log(VERBOSE, "[+] Adding: %s (%s)", arcname, file)
+                with stats.measure("stream", arcname):
+                    _add_file(
+                        zf,
+                        file,
+                        arcname,
+                        st,
+                        compression_method,
+                        deflaters,
+                        jobs,
+                    )
+                continue
+            future = stats.submit(
+                executor, compress_members, batch, compression_method, password
+            )
+            pending.append((batch, future))
+            # Bound the number of compressed batches held in memory
+            _append_completed(zf, pending, jobs * 2)
+        _append_completed(zf, pending, 0)
+
+
+def _append_completed(
+    zf: pyzipper.AESZipFile,
+    pending: Deque[Tuple[List[Tuple[str, str, os.stat_result]], Future]],
+    limit: int,
+) -> None:
+    while len(pending) > limit:
+        batch, future = pending.popleft()
+        members = stats.result(future)
+        with stats.measure("write"):
+            for (file, arcname, _), (zinfo, payload) in zip(batch, members):
+                logger.log(VERBOSE, "[+] Adding: %s (%s)", arcname, file)
+                append_member(zf, zinfo, payload)
+
+
+def _write_deflate_blocks(
+    zf: pyzipper.AESZipFile,
+    file: str,
+    arcname: str,
+    st: os.stat_result,
+    executor: Executor,
+    jobs: int,
+) -> pyzipper.ZipInfo:
+    """Write one large file as a single deflate member whose blocks are
+    compressed concurrently
+    """
+    zinfo = new_zipinfo(arcname, st)
+    zinfo.compress_type = pyzipper.ZIP_DEFLATED
+    with open(file, "rb") as src, zf.open(zinfo, "w") as dest:
+        # The write handle still tracks CRC-32, sizes and AES encryption;
+        # only the compressor producing the deflate stream is swapped
+        dest._compressor = ParallelDeflater(
+            executor, DEFLATE_BLOCK_SIZE, jobs * 2
+        )
+        shutil.copyfileobj(src, dest, DEFLATE_BLOCK_SIZE)
+    return zinfo
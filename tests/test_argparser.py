@@ -26,20 +26,23 @@ def main():
 def mock_run(monkeypatch):
     mock_zipper = Mock()
     mock_unzipper = Mock()
+    mock_verifier = Mock()
 
     # Create fake module zipper.zip - for __main__ tests
     zip_module = ModuleType("zipper.zip")
     zip_module.zipper = mock_zipper
-    sys.modules["zipper.zip"] = zip_module
+    monkeypatch.setitem(sys.modules, "zipper.zip", zip_module)
 
     # Create fake module zipper.unzip - for __main__ tests
     unzip_module = ModuleType("zipper.unzip")
     unzip_module.unzipper = mock_unzipper
-    sys.modules["zipper.unzip"] = unzip_module
+    unzip_module.verifier = mock_verifier
+    monkeypatch.setitem(sys.modules, "zipper.unzip", unzip_module)
 
     # Patch where they're used — not where they're defined!
     monkeypatch.setattr("zipper.argparser.zipper", mock_zipper)
     monkeypatch.setattr("zipper.argparser.unzipper", mock_unzipper)
+    monkeypatch.setattr("zipper.argparser.verifier", mock_verifier)
 
     # Only import run after monkeypatching
     # from zipper.argparser import main
@@ -48,6 +51,7 @@ def mock_run(monkeypatch):
         # main=main,
         zipper=mock_zipper,
         unzipper=mock_unzipper,
+        verifier=mock_verifier,
     )
 
 
@@ -62,6 +66,13 @@ def test_check_zip_single_input(main, mock_run):
         base=".",
         prompt=False,
         compression="deflate",
+        jobs=1,
+        update=False,
+        checksum=False,
+        buffer_size=64 * 1024 * 1024,
+        files_from=None,
+        null=False,
+        stats_format=None,
     )
     mock_run.unzipper.assert_not_called()
 
@@ -84,6 +95,13 @@ def test_check_zip_multiple_input(main, mock_run):
         base=".",
         prompt=False,
         compression="deflate",
+        jobs=1,
+        update=False,
+        checksum=False,
+        buffer_size=64 * 1024 * 1024,
+        files_from=None,
+        null=False,
+        stats_format=None,
     )
     mock_run.unzipper.assert_not_called()
 
@@ -99,6 +117,13 @@ def test_check_zip_with_excludes(main, mock_run):
         base=".",
         prompt=False,
         compression="deflate",
+        jobs=1,
+        update=False,
+        checksum=False,
+        buffer_size=64 * 1024 * 1024,
+        files_from=None,
+        null=False,
+        stats_format=None,
     )
     mock_run.unzipper.assert_not_called()
 
@@ -114,6 +139,13 @@ def test_check_zip_with_multi_excludes(main, mock_run):
         base=".",
         prompt=False,
         compression="deflate",
+        jobs=1,
+        update=False,
+        checksum=False,
+        buffer_size=64 * 1024 * 1024,
+        files_from=None,
+        null=False,
+        stats_format=None,
     )
     mock_run.unzipper.assert_not_called()
 
@@ -129,6 +161,13 @@ def test_check_zip_with_excludes_and_base(main, mock_run):
         base="/tmp",
         prompt=False,
         compression="deflate",
+        jobs=1,
+        update=False,
+        checksum=False,
+        buffer_size=64 * 1024 * 1024,
+        files_from=None,
+        null=False,
+        stats_format=None,
     )
     mock_run.unzipper.assert_not_called()
 
@@ -146,6 +185,13 @@ def test_check_zip_with_compression_and_output(main, mock_run):
         base=".",
         prompt=False,
         compression="lzma",
+        jobs=1,
+        update=False,
+        checksum=False,
+        buffer_size=64 * 1024 * 1024,
+        files_from=None,
+        null=False,
+        stats_format=None,
     )
     mock_run.unzipper.assert_not_called()
 
@@ -155,7 +201,15 @@ def test_check_unzip_with_output(main, mock_run):
     sys.argv = shlex.split(command)
     main()
     mock_run.unzipper.assert_called_once_with(
-        ["file1.zip", "file2.zip"], output="/tmp/temp", base="."
+        ["file1.zip", "file2.zip"],
+        output="/tmp/temp",
+        base=".",
+        jobs=1,
+        password_fd=None,
+        include_members=[],
+        exclude_members=[],
+        overwrite="always",
+        stats_format=None,
     )
     mock_run.zipper.assert_not_called()
 
@@ -166,7 +220,15 @@ def test_main_guard(mock_run):
     main_path = pathlib.Path(zipper.__file__).parent / "argparser.py"
     runpy.run_path(str(main_path), run_name="__main__")
     mock_run.unzipper.assert_called_once_with(
-        ["file1.zip", "file2.zip"], output="temp", base="/tmp"
+        ["file1.zip", "file2.zip"],
+        output="temp",
+        base="/tmp",
+        jobs=1,
+        password_fd=None,
+        include_members=[],
+        exclude_members=[],
+        overwrite="always",
+        stats_format=None,
     )
     mock_run.zipper.assert_not_called()
 
@@ -183,6 +245,13 @@ def test_check_zip_with_multi_excludes_split(main, mock_run):
         base=".",
         prompt=False,
         compression="deflate",
+        jobs=1,
+        update=False,
+        checksum=False,
+        buffer_size=64 * 1024 * 1024,
+        files_from=None,
+        null=False,
+        stats_format=None,
     )
     mock_run.unzipper.assert_not_called()
 
@@ -202,5 +271,133 @@ def test_check_zip_with_distributed_input(main, mock_run):
         base=".",
         prompt=False,
         compression="deflate",
+        jobs=1,
+        update=False,
+        checksum=False,
+        buffer_size=64 * 1024 * 1024,
+        files_from=None,
+        null=False,
+        stats_format=None,
     )
     mock_run.unzipper.assert_not_called()
+
+
+def test_check_jobs(main, mock_run):
+    sys.argv = shlex.split("zipper.py zip file1.txt --jobs 4")
+    main()
+    assert mock_run.zipper.call_args.kwargs["jobs"] == 4
+
+    sys.argv = shlex.split("zipper.py unzip file1.zip --jobs 0")
+    main()
+    assert mock_run.unzipper.call_args.kwargs["jobs"] == 0
+
+
+def test_check_update(main, mock_run):
+    sys.argv = shlex.split("zipper.py zip file1.txt -o a.zip --update --checksum")
+    main()
+    assert mock_run.zipper.call_args.kwargs["update"] is True
+    assert mock_run.zipper.call_args.kwargs["checksum"] is True
+
+
+def test_check_buffer_size(main, mock_run):
+    sys.argv = shlex.split("zipper.py zip file1.txt --buffer-size 8")
+    main()
+    assert mock_run.zipper.call_args.kwargs["buffer_size"] == 8 * 1024 * 1024
+
+
+def test_check_files_from(main, mock_run):
+    sys.argv = shlex.split("zipper.py zip --files-from - --null -o a.zip")
+    main()
+    kwargs = mock_run.zipper.call_args.kwargs
+    assert mock_run.zipper.call_args.args == ([],)
+    assert kwargs["files_from"] == "-"
+    assert kwargs["null"] is True
+
+
+def test_check_stats(main, mock_run):
+    sys.argv = shlex.split("zipper.py zip file1.txt --stats=json")
+    main()
+    assert mock_run.zipper.call_args.kwargs["stats_format"] == "json"
+
+    sys.argv = shlex.split("zipper.py unzip file1.zip --stats")
+    main()
+    assert mock_run.unzipper.call_args.kwargs["stats_format"] == "text"
+
+
+def test_check_auto_compression(main, mock_run):
+    sys.argv = shlex.split("zipper.py zip file1.txt --compression auto")
+    main()
+    assert mock_run.zipper.call_args.kwargs["compression"] == "auto"
+
+
+def test_check_password_fd(main, mock_run):
+    sys.argv = shlex.split("zipper.py unzip file1.zip --password-fd 3")
+    main()
+    assert mock_run.unzipper.call_args.kwargs["password_fd"] == 3
+
+
+def test_check_unzip_member_patterns(main, mock_run):
+    sys.argv = shlex.split(
+        "zipper.py unzip a.zip --include 'conf/*' --exclude '*.bak'"
+    )
+    main()
+    assert mock_run.unzipper.call_args.kwargs["include_members"] == ["conf/*"]
+    assert mock_run.unzipper.call_args.kwargs["exclude_members"] == ["*.bak"]
+
+
+def test_check_unzip_overwrite(main, mock_run):
+    sys.argv = shlex.split("zipper.py unzip a.zip --skip-existing")
+    main()
+    assert mock_run.unzipper.call_args.kwargs["overwrite"] == "never"
+
+    sys.argv = shlex.split("zipper.py unzip a.zip --if-changed")
+    main()
+    assert mock_run.unzipper.call_args.kwargs["overwrite"] == "if-changed"
+
+    sys.argv = shlex.split("zipper.py unzip a.zip --if-changed --skip-existing")
+    with pytest.raises(SystemExit):
+        main()
+
+
+def test_check_list(main, monkeypatch):
+    mock_lister = Mock()
+    monkeypatch.setattr("zipper.argparser.lister", mock_lister)
+    sys.argv = shlex.split("zipper.py list a.zip --include 'conf/*' --index")
+    main()
+    mock_lister.assert_called_once_with(
+        ["a.zip"],
+        base=".",
+        include_members=["conf/*"],
+        exclude_members=[],
+        index=True,
+    )
+
+
+def test_check_test(main, mock_run):
+    mock_run.verifier.return_value = False
+    sys.argv = shlex.split("zipper.py test a.zip b.zip --jobs 0")
+    with pytest.raises(SystemExit) as excinfo:
+        main()
+    assert excinfo.value.code == 1
+    mock_run.verifier.assert_called_once_with(
+        ["a.zip", "b.zip"],
+        base=".",
+        jobs=0,
+        password_fd=None,
+        include_members=[],
+        exclude_members=[],
+    )
+
+
+def test_failed_zip_or_unzip_exits_non_zero(main, mock_run):
+    mock_run.zipper.return_value = False
+    sys.argv = shlex.split("zipper.py zip a b")
+    with pytest.raises(SystemExit) as excinfo:
+        main()
+    assert excinfo.value.code == 1
+
+    mock_run.unzipper.return_value = False
+    sys.argv = shlex.split("zipper.py unzip missing.zip")
+    with pytest.raises(SystemExit) as excinfo:
+        main()
+    assert excinfo.value.code == 1
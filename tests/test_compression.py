@@ -0,0 +1,42 @@
+import os
+
+import pyzipper
+from zipper.compression import choose_method, entropy, pays_off
+
+
+def test_entropy():
+    assert entropy(b"") == 0.0
+    assert entropy(b"aaaa") == 0.0
+    assert entropy(b"ab" * 10) == 1.0
+    assert entropy(bytes(range(256))) == 8.0
+
+
+def test_choose_method_by_extension(tmp_path):
+    photo = tmp_path / "photo.JPG"
+    photo.write_text("plain text in disguise " * 10)
+
+    assert choose_method(str(photo), photo.stat()) == pyzipper.ZIP_STORED
+
+
+def test_choose_method_by_sample(tmp_path):
+    text = tmp_path / "log.txt"
+    text.write_text("INFO request served in 12ms\n" * 100)
+    noise = tmp_path / "blob.dat"
+    noise.write_bytes(os.urandom(16 * 1024))
+    empty = tmp_path / "empty.txt"
+    empty.write_text("")
+
+    assert choose_method(str(text), text.stat()) == pyzipper.ZIP_DEFLATED
+    assert choose_method(str(noise), noise.stat()) == pyzipper.ZIP_STORED
+    assert choose_method(str(empty), empty.stat()) == pyzipper.ZIP_STORED
+
+
+def test_pays_off():
+    zinfo = pyzipper.ZipInfo("a")
+    zinfo.file_size = 100
+    zinfo.compress_size = 100
+    assert not pays_off(zinfo)
+
+    zinfo.flag_bits |= 0x1  # AES adds its own overhead to the stored size
+    zinfo.compress_size = 120
+    assert pays_off(zinfo)
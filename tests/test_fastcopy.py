@@ -0,0 +1,65 @@
+import errno
+import os
+import zlib
+
+import pytest
+from zipper.fastcopy import copy_range, file_crc
+
+
+def test_copy_range_copies_between_offsets(tmp_path):
+    data = os.urandom(100_000)
+    src = tmp_path / "src.bin"
+    dst = tmp_path / "dst.bin"
+    src.write_bytes(data)
+    dst.write_bytes(b"header")
+
+    with open(src, "rb") as s, open(dst, "r+b") as d:
+        copy_range(s.fileno(), d.fileno(), 90_000, 10_000, 6)
+
+    assert dst.read_bytes() == b"header" + data[10_000:]
+
+
+def test_copy_range_falls_back_when_unsupported(tmp_path, monkeypatch):
+    def unsupported(*args):
+        raise OSError(errno.EXDEV, "cross-device")
+
+    monkeypatch.setattr("os.copy_file_range", unsupported, raising=False)
+    monkeypatch.setattr("os.sendfile", unsupported, raising=False)
+    data = os.urandom(3 * 1024 * 1024 + 5)
+    src = tmp_path / "src.bin"
+    dst = tmp_path / "dst.bin"
+    src.write_bytes(data)
+
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        copy_range(s.fileno(), d.fileno(), len(data))
+
+    assert dst.read_bytes() == data
+
+
+def test_copy_range_short_source(tmp_path):
+    src = tmp_path / "src.bin"
+    src.write_bytes(b"short")
+
+    with open(src, "rb") as s, open(tmp_path / "dst.bin", "wb") as d:
+        with pytest.raises(EOFError):
+            copy_range(s.fileno(), d.fileno(), 10)
+
+
+@pytest.mark.parametrize("offset", [0, 1, 70_001])
+def test_file_crc_matches_zlib(tmp_path, offset):
+    data = os.urandom(200_000)
+    path = tmp_path / "data.bin"
+    path.write_bytes(data)
+
+    with open(path, "rb") as f:
+        crc = file_crc(f.fileno(), 100_000, offset)
+
+    assert crc == zlib.crc32(data[offset : offset + 100_000])
+
+
+def test_file_crc_empty(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+
+    with open(path, "rb") as f:
+        assert file_crc(f.fileno(), 0) == 0
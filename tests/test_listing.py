@@ -0,0 +1,119 @@
+import os
+import zipfile
+
+import pyzipper
+from zipper.listing import INDEX_SUFFIX, format_listing, lister, list_members
+from zipper.reader import close_archives
+
+
+def _make_zip(path):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("conf/app.yml", b"key: value\n" * 100)
+        zf.writestr("conf/old.bak", b"old")
+        zf.writestr(
+            "data.bin", os.urandom(100), compress_type=zipfile.ZIP_STORED
+        )
+    return str(path)
+
+
+def test_list_members(tmp_path):
+    zip_path = _make_zip(tmp_path / "a.zip")
+
+    entries = list_members(zip_path)
+
+    assert [e.name for e in entries] == [
+        "conf/app.yml",
+        "conf/old.bak",
+        "data.bin",
+    ]
+    assert entries[0].size == 1100
+    assert entries[2].method == pyzipper.ZIP_STORED
+    assert not os.path.exists(zip_path + INDEX_SUFFIX)
+
+
+def test_list_members_patterns(tmp_path):
+    zip_path = _make_zip(tmp_path / "a.zip")
+
+    entries = list_members(zip_path, ["conf"], ["*.bak"])
+
+    assert [e.name for e in entries] == ["conf/app.yml"]
+
+
+def test_format_listing(tmp_path):
+    zip_path = _make_zip(tmp_path / "a.zip")
+
+    listing = format_listing(zip_path, list_members(zip_path))
+
+    lines = listing.splitlines()
+    assert lines[0] == f"Archive: {zip_path}"
+    columns = lines[3].split()
+    assert columns[0] == "1100"
+    assert columns[2:4] == ["98%", "Deflate"]
+    assert lines[3].endswith("conf/app.yml")
+    assert lines[5].split()[3] == "Stored"
+    assert lines[-1].split()[0] == "1203"
+    assert lines[-1].endswith("3 file(s)")
+
+
+def test_format_listing_encrypted(tmp_path):
+    zip_path = str(tmp_path / "a.zip")
+    with pyzipper.AESZipFile(
+        zip_path, "w", compression=pyzipper.ZIP_DEFLATED
+    ) as zf:
+        zf.setpassword(b"pw")
+        zf.setencryption(pyzipper.WZ_AES)
+        zf.writestr("a.txt", b"secret")
+
+    listing = format_listing(zip_path, list_members(zip_path))
+
+    assert "Deflate+AES" in listing
+
+
+def test_index_is_reused(tmp_path, monkeypatch):
+    zip_path = _make_zip(tmp_path / "a.zip")
+    expected = list_members(zip_path, index=True)
+    close_archives()
+    assert os.path.exists(zip_path + INDEX_SUFFIX)
+
+    def fail(path):
+        raise AssertionError("central directory read again")
+
+    monkeypatch.setattr("zipper.listing.open_archive", fail)
+
+    assert list_members(zip_path) == expected
+    assert list_members(zip_path, ["conf/app.yml"]) == expected[:1]
+    assert list_members(zip_path, ["conf/"]) == expected[:2]
+    assert list_members(zip_path, ["*.bin"]) == expected[2:]
+
+
+def test_index_is_only_written_when_asked(tmp_path):
+    zip_path = _make_zip(tmp_path / "a.zip")
+
+    list_members(zip_path)
+
+    assert os.listdir(tmp_path) == ["a.zip"]
+
+
+def test_stale_index_is_ignored(tmp_path):
+    zip_path = _make_zip(tmp_path / "a.zip")
+    list_members(zip_path, index=True)
+    close_archives()
+    with zipfile.ZipFile(zip_path, "a") as zf:
+        zf.writestr("new.txt", b"new")
+
+    entries = list_members(zip_path)
+
+    assert entries[-1].name == "new.txt"
+
+
+def test_lister(tmp_path, monkeypatch, capsys, caplog):
+    monkeypatch.chdir(tmp_path)
+    _make_zip(tmp_path / "a.zip")
+    (tmp_path / "b.zip").write_bytes(b"not a zip")
+
+    lister(["*.zip"], base=str(tmp_path), exclude_members=["conf"])
+
+    out = capsys.readouterr().out
+    assert "data.bin" in out
+    assert "conf/app.yml" not in out
+    assert "Not a valid zip file" in caplog.text
@@ -0,0 +1,76 @@
+import logging
+import logging.handlers
+import os
+import subprocess
+import sys
+
+import pytest
+import zipper
+from zipper import VERBOSE, logger, setup_logging, stop_logging
+
+
+@pytest.fixture(autouse=True)
+def reset_logger():
+    yield
+    stop_logging()
+    logger.setLevel(logging.NOTSET)
+
+
+def test_import_configures_nothing():
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import logging, zipper; "
+            "print(logging.getLogger().handlers, zipper.logger.handlers)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={"PYTHONPATH": os.path.dirname(zipper.__path__[0])},
+    ).stdout
+    assert output.strip() == "[] []"
+
+
+@pytest.mark.parametrize(
+    "verbosity, level",
+    [
+        (-3, logging.ERROR),
+        (-1, logging.WARNING),
+        (0, logging.INFO),
+        (1, VERBOSE),
+        (2, logging.DEBUG),
+        (5, logging.DEBUG),
+    ],
+)
+def test_setup_logging_levels(verbosity, level):
+    setup_logging(verbosity)
+    setup_logging(verbosity)  # Replaces its handler instead of adding one
+
+    assert logger.level == level
+    assert len(logger.handlers) == 1
+
+
+def test_per_file_lines_need_verbose(capsys):
+    setup_logging()
+    logger.log(VERBOSE, "[+] Adding: %s", "hidden.txt")
+    logger.info("Created zip")
+    setup_logging(1)
+    logger.log(VERBOSE, "[+] Adding: %s", "shown.txt")
+
+    err = capsys.readouterr().err
+    assert "hidden.txt" not in err
+    assert "Created zip" in err
+    assert "VERBOSE" in err and "shown.txt" in err
+
+
+def test_setup_logging_queue(monkeypatch, capsys):
+    monkeypatch.setitem(zipper.CONFIG, "log_queue", True)
+    setup_logging()
+    assert isinstance(logger.handlers[0], logging.handlers.QueueHandler)
+
+    logger.warning("queued %s", "record")
+    stop_logging()
+
+    assert "queued record" in capsys.readouterr().err
+    assert not logger.handlers
@@ -1,7 +1,13 @@
+import os
 import pathlib
 import runpy
+import shlex
+import subprocess
 import sys
 import types
+from unittest.mock import Mock
+
+import pytest
 import zipper
 from zipper.main import run
 
@@ -71,3 +77,111 @@ def test_main_guard(monkeypatch):
     runpy.run_path(str(main_path), run_name="__main__")
 
     assert called.get("ran") is True
+
+
+def test_auto_parser_follows_terminal(monkeypatch):
+    monkeypatch.setitem(zipper.CONFIG, "preferred_parser", "auto")
+    monkeypatch.setitem(
+        sys.modules, "zipper.argparser", types.SimpleNamespace(main=lambda: "ARGPARSE")
+    )
+    monkeypatch.setitem(
+        sys.modules,
+        "zipper.typer_parser",
+        types.SimpleNamespace(app=lambda: "TYPER"),
+    )
+    monkeypatch.setattr("zipper.preprocessor.typer_preprocessor", lambda: None)
+    monkeypatch.setattr("sys.stdin.isatty", lambda: False, raising=False)
+    monkeypatch.setattr("sys.stdout.isatty", lambda: True, raising=False)
+
+    assert run() == "ARGPARSE"
+
+    monkeypatch.setattr("sys.stdin.isatty", lambda: True, raising=False)
+
+    assert run() == "TYPER"
+
+
+@pytest.mark.parametrize(
+    "command, function",
+    [
+        ("zip -e *.log src -o out.zip --jobs 2 -v", "zipper"),
+        ("zip src --exclude *.log --output out.zip", "zipper"),
+        ("unzip a.zip -i *.txt -e *.log -o out b.zip", "unzipper"),
+        ("test a.zip -i *.txt -e *.log", "verifier"),
+        ("list a.zip -i *.txt b.zip -e *.log", "lister"),
+    ],
+)
+def test_parsers_agree(monkeypatch, command, function):
+    # "auto" switches parsers with the terminal, so both must read the
+    # same command line the same way
+    calls = []
+    for parser in ("argparse", "typer"):
+        module = "argparser" if parser == "argparse" else "typer_parser"
+        mock = Mock(return_value=True)
+        monkeypatch.setattr(f"zipper.{module}.{function}", mock)
+        monkeypatch.setitem(zipper.CONFIG, "preferred_parser", parser)
+        monkeypatch.setattr(sys, "argv", ["zipper", *shlex.split(command)])
+        try:
+            run()
+        except SystemExit as e:
+            assert not e.code
+        calls.append(mock.call_args)
+
+    assert calls[0] is not None
+    assert calls[0] == calls[1]
+
+
+@pytest.mark.parametrize("parser", ["argparse", "typer"])
+@pytest.mark.parametrize(
+    "command, stats_format",
+    [
+        ("zip src --stats json", "json"),
+        ("zip --stats=json src", "json"),
+        ("zip --stats text src", "text"),
+        ("zip --stats src", "text"),
+        ("zip src", None),
+    ],
+)
+def test_stats_value_with_or_without_equals(
+    monkeypatch, parser, command, stats_format
+):
+    module = "argparser" if parser == "argparse" else "typer_parser"
+    mock = Mock()
+    monkeypatch.setattr(f"zipper.{module}.zipper", mock)
+    monkeypatch.setitem(zipper.CONFIG, "preferred_parser", parser)
+    monkeypatch.setattr(sys, "argv", ["zipper", *shlex.split(command)])
+    try:
+        run()
+    except SystemExit as e:
+        assert not e.code
+
+    assert mock.call_args.args[0] == ["src"]
+    assert mock.call_args.kwargs["stats_format"] == stats_format
+
+
+def test_startup_loads_no_engine(tmp_path):
+    # What a script pays to start zipper: no typer, click or rich, and no
+    # pyzipper or pycryptodomex before a command touches an archive
+    src = pathlib.Path(zipper.__file__).parent.parent
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys; sys.argv = ['zipper', 'zip', '--help']\n"
+            "from zipper.main import run\n"
+            "try:\n"
+            "    run()\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "print(' '.join(sorted(sys.modules)), file=sys.stderr)",
+        ],
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": str(src)},
+    )
+
+    assert "--output" in result.stdout
+    loaded = set(result.stderr.split())
+    heavy = {"typer", "click", "rich", "pyzipper", "Cryptodome", "zipper.zip"}
+    assert not heavy & loaded
@@ -0,0 +1,107 @@
+import os
+from zipper.matcher import compile_member_patterns, compile_patterns
+from zipper.utils import scan
+
+
+def test_name_patterns_match_at_any_depth(tmp_path):
+    matcher = compile_patterns(["*.pyc", "node_modules", "cache*"])
+
+    assert matcher.match(str(tmp_path / "a" / "b" / "mod.pyc"))
+    assert matcher.match(str(tmp_path / "node_modules"), is_dir=True)
+    assert matcher.match(str(tmp_path / "cache.db"))
+    assert not matcher.match(str(tmp_path / "node_modules.txt"))
+    assert not matcher.match(str(tmp_path / "mod.py"))
+
+
+def test_slashed_patterns_are_anchored_at_base(tmp_path):
+    matcher = compile_patterns(["build/out", "docs/*.tmp"], str(tmp_path))
+
+    assert matcher.match(str(tmp_path / "build" / "out"))
+    assert matcher.match(str(tmp_path / "docs" / "a.tmp"))
+    assert not matcher.match(str(tmp_path / "src" / "build" / "out"))
+
+
+def test_anchored_patterns_are_normalised(tmp_path):
+    matcher = compile_patterns(
+        ["./data/sub", "data//other", "logs/x/../today/", "./*.tmp"],
+        str(tmp_path),
+    )
+
+    assert matcher.match(str(tmp_path / "data" / "sub"))
+    assert matcher.match(str(tmp_path / "data" / "other"))
+    assert matcher.match(str(tmp_path / "logs" / "today"), is_dir=True)
+    assert not matcher.match(str(tmp_path / "logs" / "today"))
+    assert matcher.match(str(tmp_path / "a.tmp"))
+    assert not matcher.match(str(tmp_path / "src" / "data" / "sub"))
+
+def test_wildcard_and_absolute_patterns_match_whole_path(tmp_path):
+    matcher = compile_patterns(
+        ["**/exclude.txt", "*/logs/*", str(tmp_path / "skip")]
+    )
+
+    assert matcher.match(str(tmp_path / "x" / "exclude.txt"))
+    assert matcher.match(str(tmp_path / "logs" / "today.log"))
+    assert matcher.match(str(tmp_path / "skip"), is_dir=True)
+    assert not matcher.match(str(tmp_path / "keep" / "include.txt"))
+
+
+def test_directory_only_patterns(tmp_path):
+    matcher = compile_patterns(["build/", "tmp/"], str(tmp_path))
+
+    assert matcher.match(str(tmp_path / "build"), is_dir=True)
+    assert not matcher.match(str(tmp_path / "build"))
+    assert matcher.match(str(tmp_path / "a" / "tmp"), is_dir=True)
+
+
+def test_regex_patterns_are_combined(tmp_path):
+    matcher = compile_patterns([f"file[{i}]?.log" for i in range(10)])
+
+    assert matcher.match(str(tmp_path / "file3a.log"))
+    assert not matcher.match(str(tmp_path / "fileXa.log"))
+
+
+def test_many_patterns(tmp_path):
+    patterns = [f"dir{i}/" for i in range(400)]
+    patterns += [f"*.ext{i}" for i in range(400)]
+    matcher = compile_patterns(patterns, str(tmp_path))
+
+    assert matcher.match(str(tmp_path / "dir399"), is_dir=True)
+    assert matcher.match(str(tmp_path / "a.ext123"))
+    assert not matcher.match(str(tmp_path / "a.ext400"))
+
+
+def test_empty_matcher_is_falsy():
+    assert not compile_patterns([])
+    assert compile_patterns(["*.tmp"])
+
+
+def test_scan_prunes_excluded_directories(tmp_path, monkeypatch):
+    (tmp_path / "keep").mkdir()
+    (tmp_path / "keep" / "a.txt").write_text("data")
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "b.txt").write_text("data")
+    scanned = []
+    real_scandir = os.scandir
+
+    def tracking_scandir(path):
+        scanned.append(path)
+        return real_scandir(path)
+
+    monkeypatch.setattr("os.scandir", tracking_scandir)
+    matcher = compile_patterns(["build/"], str(tmp_path))
+
+    result = [path for path, _ in scan(str(tmp_path), matcher)]
+    assert result == [str(tmp_path / "keep" / "a.txt")]
+    assert str(tmp_path / "build") not in scanned
+
+
+def test_member_patterns_match_members_and_their_directories():
+    matcher = compile_member_patterns(["conf/app.yml", "*.log", "cache/"])
+
+    assert matcher.match_member("conf/app.yml")
+    assert not matcher.match_member("sub/conf/app.yml")
+    assert matcher.match_member("deep/dir/run.log")
+    assert matcher.match_member("cache/")
+    assert matcher.match_member("cache/a/b.bin")
+    assert not matcher.match_member("cache")  # A file, not the directory
+    assert not matcher.match_member("conf/other.yml")
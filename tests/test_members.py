@@ -0,0 +1,69 @@
+import io
+import os
+import zipfile
+
+import pyzipper
+from zipper.compression import ZIP_AUTO
+from zipper.members import append_member, compress_member, compress_members
+
+
+def test_compress_member_round_trip(tmp_path):
+    file_path = tmp_path / "data.txt"
+    file_path.write_text("hello world " * 100)
+
+    zinfo, payload = compress_member(
+        str(file_path), "data.txt", pyzipper.ZIP_DEFLATED, None
+    )
+
+    assert zinfo.file_size == 1200
+    assert zinfo.compress_size == len(payload) < 1200
+
+    buffer = io.BytesIO()
+    with pyzipper.AESZipFile(buffer, "w") as zf:
+        append_member(zf, zinfo, payload)
+    with zipfile.ZipFile(buffer) as zf:
+        assert zf.testzip() is None
+        assert zf.read("data.txt") == b"hello world " * 100
+
+
+def test_compress_member_encrypted(tmp_path):
+    file_path = tmp_path / "secret.txt"
+    file_path.write_text("top secret")
+
+    zinfo, payload = compress_member(
+        str(file_path), "secret.txt", pyzipper.ZIP_LZMA, "pw"
+    )
+
+    buffer = io.BytesIO()
+    with pyzipper.AESZipFile(buffer, "w") as zf:
+        append_member(zf, zinfo, payload)
+    with pyzipper.AESZipFile(buffer) as zf:
+        zf.setpassword(b"pw")
+        assert zf.getinfo("secret.txt").is_encrypted
+        assert zf.read("secret.txt") == b"top secret"
+
+
+def test_compress_members_batch(tmp_path):
+    batch = []
+    for name in ["a.txt", "b.txt"]:
+        (tmp_path / name).write_text(name)
+        batch.append((str(tmp_path / name), name, (tmp_path / name).stat()))
+
+    results = compress_members(batch, pyzipper.ZIP_STORED, None)
+
+    assert [zinfo.filename for zinfo, _ in results] == ["a.txt", "b.txt"]
+    assert [payload for _, payload in results] == [b"a.txt", b"b.txt"]
+
+
+def test_compress_member_auto_stores_incompressible(tmp_path, monkeypatch):
+    file_path = tmp_path / "random.bin"
+    file_path.write_bytes(os.urandom(2048))
+    monkeypatch.setattr(
+        "zipper.members.choose_method",
+        lambda file, st, sample=None: pyzipper.ZIP_DEFLATED,
+    )
+
+    zinfo, payload = compress_member(str(file_path), "random.bin", ZIP_AUTO, None)
+
+    assert zinfo.compress_type == pyzipper.ZIP_STORED
+    assert payload == file_path.read_bytes()
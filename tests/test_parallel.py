@@ -0,0 +1,85 @@
+import os
+
+from zipper.parallel import resolve_jobs
+
+
+def test_resolve_jobs_explicit():
+    assert resolve_jobs(3) == 3
+
+
+def test_resolve_jobs_all_cpus(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    assert resolve_jobs(0) == 8
+
+
+def test_parallel_deflater_produces_single_stream():
+    import random
+    import zlib
+    from concurrent.futures import ThreadPoolExecutor
+    from zipper.parallel import ParallelDeflater
+
+    rng = random.Random(0)
+    data = b"".join(
+        rng.choice([b"alpha ", b"beta ", b"gamma "]) for _ in range(20000)
+    ) + rng.randbytes(5000)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        deflater = ParallelDeflater(executor, block_size=4096, window=2)
+        stream = b"".join(
+            deflater.compress(data[i : i + 1000])
+            for i in range(0, len(data), 1000)
+        )
+        stream += deflater.flush()
+
+    decompressor = zlib.decompressobj(-15)
+    assert decompressor.decompress(stream) == data
+    assert decompressor.eof
+    assert len(stream) < len(data)
+
+
+def test_parallel_deflater_empty_input():
+    import zlib
+    from concurrent.futures import ThreadPoolExecutor
+    from zipper.parallel import ParallelDeflater
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        stream = ParallelDeflater(executor).flush()
+    assert zlib.decompress(stream, -15) == b""
+
+
+def _succeed(value):
+    return value
+
+
+def _fail(message):
+    raise ValueError(message)
+
+
+def test_run_jobs_isolates_failures_largest_first():
+    from zipper.parallel import Job, run_jobs
+
+    jobs = [
+        Job("small", 1, _succeed, (1,)),
+        Job("broken", 5, _fail, ("boom",)),
+        Job("large", 10, _succeed, (2,)),
+    ]
+
+    serial = run_jobs(jobs, 1)
+    assert [result.name for result in serial] == ["small", "broken", "large"]
+    assert serial[1].error == "ValueError: boom"
+
+    pooled = run_jobs(jobs, 2)
+    errors = {result.name: result.error for result in pooled}
+    assert errors == {"small": None, "broken": "ValueError: boom", "large": None}
+
+
+def test_report_jobs_logs_failures_and_summary(caplog):
+    from zipper.parallel import JobResult, report_jobs
+
+    caplog.set_level("INFO")
+    assert not report_jobs(
+        [JobResult("a.zip", None, 0.1), JobResult("b.zip", "bad", 0.2)]
+    )
+    assert report_jobs([JobResult("a.zip", None, 0.1)])
+    assert "Failed b.zip: bad" in caplog.text
+    assert "Processed 2 archive(s): 1 succeeded, 1 failed" in caplog.text
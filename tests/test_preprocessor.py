@@ -38,3 +38,41 @@ def test_argparse_preprocessor():
     argparse_preprocessor()
     op = f"zipper zip file1*.txt newfolder* readme.md --exclude **/__pycache__ **/.git .gitignore"
     assert sys.argv == shlex.split(op)
+
+def test_preprocessors_leave_short_options_in_place():
+    cmd = "zipper unzip a.zip --include conf/* -v - --jobs -1 -qq"
+    sys.argv = shlex.split(cmd)
+    typer_preprocessor()
+    op = f"zipper unzip a.zip -v - -qq --include conf/{STAR} --jobs -1"
+    assert sys.argv == shlex.split(op)
+
+    sys.argv = shlex.split(cmd)
+    argparse_preprocessor()
+    op = "zipper unzip a.zip -v - -qq --include conf/* --jobs -1"
+    assert sys.argv == shlex.split(op)
+
+
+def test_preprocessors_fill_optional_values():
+    for preprocessor in (typer_preprocessor, argparse_preprocessor):
+        sys.argv = shlex.split("zipper unzip --stats a.zip --stats=json")
+        preprocessor()
+        assert sys.argv == shlex.split(
+            "zipper unzip a.zip --stats=text --stats=json"
+        )
+
+        sys.argv = shlex.split("zipper zip --stats json *.txt --jobs 2")
+        preprocessor()
+        assert sys.argv == shlex.split("zipper zip *.txt --stats=json --jobs 2")
+
+
+def test_preprocessors_spell_out_short_options():
+    cmd = "zipper zip -e *.log src -o - --exclude *.tmp"
+    sys.argv = shlex.split(cmd)
+    typer_preprocessor()
+    op = f"zipper zip src --exclude {STAR}.log --output - --exclude {STAR}.tmp"
+    assert sys.argv == shlex.split(op)
+
+    sys.argv = shlex.split(cmd)
+    argparse_preprocessor()
+    op = "zipper zip src --exclude *.log *.tmp --output -"
+    assert sys.argv == shlex.split(op)
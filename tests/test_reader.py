@@ -0,0 +1,172 @@
+import os
+import pickle
+import zipfile
+
+import pytest
+import pyzipper
+import zipper.reader as zipper_reader
+from zipper.reader import MappedArchive, close_archives, open_archive
+
+
+def test_mapped_archive_reads_central_directory(tmp_path):
+    zip_file = tmp_path / "test.zip"
+    with zipfile.ZipFile(zip_file, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("dir/", "")
+        zf.writestr("dir/a.txt", "alpha " * 100)
+        zf.writestr("ünicode.txt", "beta", zipfile.ZIP_STORED)
+
+    with zipfile.ZipFile(zip_file) as zf, MappedArchive(str(zip_file)) as archive:
+        expected = zf.infolist()
+        assert [m.filename for m in archive.members] == zf.namelist()
+        for member, info in zip(archive.members, expected):
+            assert member.CRC == info.CRC
+            assert member.compress_type == info.compress_type
+            assert member.file_size == info.file_size
+            assert member.header_offset == info.header_offset
+            assert member.date_time == info.date_time
+        stored = archive.members[2]
+        assert bytes(archive.view[archive.data_range(stored)]) == b"beta"
+
+
+def test_mapped_archive_rejects_non_zip(tmp_path):
+    path = tmp_path / "not.zip"
+    path.write_bytes(b"plain text, no archive")
+    empty = tmp_path / "empty.zip"
+    empty.write_bytes(b"")
+
+    with pytest.raises(pyzipper.BadZipFile):
+        MappedArchive(str(path))
+    with pytest.raises(pyzipper.BadZipFile):
+        MappedArchive(str(empty))
+
+
+def test_mapped_archive_extracts_aes(tmp_path):
+    zip_file = tmp_path / "secret.zip"
+    with pyzipper.AESZipFile(
+        zip_file, "w", compression=pyzipper.ZIP_DEFLATED
+    ) as zf:
+        zf.setpassword(b"pw")
+        zf.setencryption(pyzipper.WZ_AES)
+        zf.writestr("a.txt", "hidden " * 100)
+
+    with MappedArchive(str(zip_file)) as archive:
+        member = archive.members[0]
+        with pytest.raises(RuntimeError, match="encrypted"):
+            archive.extract(member, str(tmp_path / "out"))
+        with pytest.raises(RuntimeError):
+            archive.extract(member, str(tmp_path / "out"), b"wrong")
+        archive.extract(member, str(tmp_path / "out"), b"pw")
+
+    assert (tmp_path / "out" / "a.txt").read_text() == "hidden " * 100
+
+
+def test_check_password(tmp_path):
+    zip_file = tmp_path / "secret.zip"
+    with pyzipper.AESZipFile(
+        zip_file, "w", compression=pyzipper.ZIP_DEFLATED
+    ) as zf:
+        zf.setpassword(b"pw")
+        zf.setencryption(pyzipper.WZ_AES)
+        zf.writestr("a.txt", "hidden " * 100)
+    plain = tmp_path / "plain.zip"
+    with zipfile.ZipFile(plain, "w") as zf:
+        zf.writestr("a.txt", "data")
+
+    with MappedArchive(str(zip_file)) as archive:
+        assert archive.encrypted
+        assert archive.check_password(b"pw")
+        assert not archive.check_password(b"wrong")
+        assert not archive.check_password(None)
+    with MappedArchive(str(plain)) as archive:
+        assert not archive.encrypted
+        assert archive.check_password(None)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "plain.zip",
+        "secret.zip",
+    ]
+
+
+def test_check_password_fails_on_a_bad_hmac(tmp_path):
+    zip_file = tmp_path / "secret.zip"
+    with pyzipper.AESZipFile(zip_file, "w") as zf:
+        zf.setpassword(b"pw")
+        zf.setencryption(pyzipper.WZ_AES)
+        zf.writestr("a.txt", "hidden " * 100)
+    with MappedArchive(str(zip_file)) as archive:
+        data_range = archive.data_range(archive.members[0])
+    # Flip a byte of the encrypted data, past the salt and verifier
+    with open(zip_file, "r+b") as f:
+        f.seek(data_range.start + 40)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+    with MappedArchive(str(zip_file)) as archive:
+        assert not archive.check_password(b"pw")
+
+
+def test_mapped_archive_falls_back_for_zipcrypto(tmp_path):
+    # The stdlib cannot write ZipCrypto, so flag a stored member by hand
+    # and check that pyzipper, not the mapped decoder, handles it
+    zip_file = tmp_path / "legacy.zip"
+    with zipfile.ZipFile(zip_file, "w") as zf:
+        zf.writestr("a.txt", "data")
+
+    with MappedArchive(str(zip_file)) as archive:
+        archive.members[0].flag_bits |= 0x1
+        with pytest.raises(RuntimeError, match="password required"):
+            archive.extract(archive.members[0], str(tmp_path / "out"))
+
+
+def test_mapped_archive_pickles_by_path(tmp_path):
+    zip_file = tmp_path / "test.zip"
+    with zipfile.ZipFile(zip_file, "w") as zf:
+        zf.writestr("a.txt", "data")
+
+    with MappedArchive(str(zip_file)) as archive:
+        with pickle.loads(pickle.dumps(archive)) as copy:
+            assert copy.path == archive.path
+            assert [m.filename for m in copy.members] == ["a.txt"]
+
+
+def test_open_archive_caches_until_file_changes(tmp_path):
+    zip_file = tmp_path / "test.zip"
+    with zipfile.ZipFile(zip_file, "w") as zf:
+        zf.writestr("a.txt", "data")
+
+    first = open_archive(str(zip_file))
+    assert open_archive(str(zip_file)) is first
+
+    with zipfile.ZipFile(zip_file, "a") as zf:
+        zf.writestr("b.txt", "more data")
+    second = open_archive(str(zip_file))
+
+    assert second is not first
+    assert first.view is None  # Closed
+    assert [m.filename for m in second.members] == ["a.txt", "b.txt"]
+    close_archives()
+    assert second.view is None
+
+
+def test_open_archive_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(zipper_reader, "ARCHIVE_CACHE_SIZE", 2)
+    paths = []
+    for name in "abc":
+        path = tmp_path / f"{name}.zip"
+        with zipfile.ZipFile(path, "w") as zf:
+            zf.writestr(f"{name}.txt", name)
+        paths.append(str(path))
+
+    a = open_archive(paths[0])
+    b = open_archive(paths[1])
+    open_archive(paths[0])  # Most recently used again
+    open_archive(paths[2])
+
+    assert b.view is None
+    assert open_archive(paths[0]) is a
+    close_archives()
+
+
+def test_open_archive_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        open_archive(os.path.join(tmp_path, "missing.zip"))
@@ -0,0 +1,197 @@
+import json
+import os
+import pickle
+import shlex
+import subprocess
+import sys
+import zipfile
+
+import pytest
+from zipper import stats
+from zipper.unzip import unzipper
+from zipper.zip import zipper
+
+
+@pytest.fixture(autouse=True)
+def not_collecting():
+    yield
+    stats.disable()
+
+
+def test_stats_stages_and_slowest_files():
+    collected = stats.Stats(slowest=2)
+
+    assert collected.timed("read", len)(b"abc") == 3
+    assert list(collected.iterate("discover", "ab")) == ["a", "b"]
+    with collected.measure("write", "a.txt"):
+        pass
+    for name, seconds in [("b.txt", 3.0), ("c.txt", 1.0), ("d.txt", 2.0)]:
+        collected.add_file(name, seconds)
+
+    report = collected.report()
+    assert report["stages"]["read"]["calls"] == 1
+    # One call per item, and the one that ends the iteration
+    assert report["stages"]["discover"]["calls"] == 3
+    assert report["stages"]["write"]["calls"] == 1
+    assert [entry["name"] for entry in report["slowest"]] == [
+        "b.txt",
+        "d.txt",
+    ]
+
+
+def test_stats_counts_members_by_method():
+    deflated = zipfile.ZipInfo("a.txt")
+    deflated.compress_type = zipfile.ZIP_DEFLATED
+    deflated.file_size, deflated.compress_size = 1000, 250
+    stored = zipfile.ZipInfo("b.jpg")
+    stored.file_size = stored.compress_size = 500
+    collected = stats.Stats()
+
+    collected.add_members([deflated, stored, zipfile.ZipInfo("dir/")])
+
+    report = collected.report()
+    assert report["files"] == 2
+    assert report["size"] == 1500
+    assert report["compressed"] == 750
+    assert report["methods"]["Deflate"] == {
+        "files": 1,
+        "size": 1000,
+        "compressed": 250,
+        "ratio": 0.25,
+    }
+    assert report["methods"]["Stored"]["ratio"] == 1.0
+    assert "Deflate" in stats.format_report(report)
+
+
+def test_stats_merge_what_workers_send_back():
+    worker = stats.Stats(slowest=2)
+    worker.add("compress", 1.0, 0.5)
+    worker.add_file("a.txt", 2.0)
+    deflated = zipfile.ZipInfo("a.txt")
+    deflated.compress_type = zipfile.ZIP_DEFLATED
+    deflated.file_size, deflated.compress_size = 100, 40
+    worker.add_members([deflated])
+    collected = stats.Stats(slowest=2)
+    collected.add("compress", 1.0, 0.25)
+    collected.add_file("b.txt", 1.0)
+
+    collected.merge(pickle.loads(pickle.dumps(worker)))
+
+    report = collected.report()
+    assert report["stages"]["compress"] == {
+        "wall": 2.0,
+        "cpu": 0.75,
+        "calls": 2,
+    }
+    assert report["methods"]["Deflate"]["files"] == 1
+    assert [entry["name"] for entry in report["slowest"]] == [
+        "a.txt",
+        "b.txt",
+    ]
+
+
+def test_stats_cpu_counts_child_processes():
+    collected = stats.Stats()
+    before = os.times()
+
+    subprocess.run(
+        [sys.executable, "-c", "sum(range(3 * 10**6))"], check=True
+    )
+
+    after = os.times()
+    children = (
+        after.children_user
+        + after.children_system
+        - before.children_user
+        - before.children_system
+    )
+    assert collected.report()["cpu"] >= children > 0
+
+
+def test_measure_is_a_no_op_when_not_collecting():
+    assert stats.current is None
+    assert stats.measure("read") is stats.measure("write", "a.txt")
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_zipper_and_unzipper_report_stats(
+    tmp_path, monkeypatch, capsys, jobs
+):
+    src = tmp_path / "src"
+    src.mkdir()
+    for index in range(5):
+        (src / f"{index}.txt").write_text("stats " * 1000)
+    archive = tmp_path / "out.zip"
+    monkeypatch.setattr("zipper.zip.get_password", lambda prompt: "secret")
+    monkeypatch.setenv("ZIPPER_PASSWORD", "secret")
+    # Through the pipeline, which times reading and compressing apart
+    monkeypatch.setattr("zipper.zip.DIRECT_WRITE_SIZE", 0)
+
+    zipper(
+        include_patterns=["src"],
+        exclude_patterns=[],
+        output=str(archive),
+        base=str(tmp_path),
+        prompt=True,
+        compression="deflate",
+        jobs=jobs,
+        stats_format="json",
+    )
+
+    report = json.loads(capsys.readouterr().err)
+    assert report["files"] == 5
+    assert report["size"] == 5 * 6000
+    assert report["methods"]["Deflate"]["files"] == 5
+    # With jobs, read to encrypt come from the workers
+    assert {"discover", "read", "compress", "encrypt", "write"} <= report[
+        "stages"
+    ].keys()
+    assert len(report["slowest"]) == 5
+    assert stats.current is None
+
+    unzipper(
+        [str(archive)],
+        output=str(tmp_path / "out"),
+        jobs=jobs,
+        stats_format="text",
+    )
+
+    text = capsys.readouterr().err
+    assert "5 file(s), 30000 bytes" in text
+    assert "decrypt" in text
+    assert "decompress" in text
+    assert "Slowest files:" in text
+
+
+def test_batch_jobs_report_worker_stats(tmp_path, monkeypatch, capsys):
+    from zipper.argparser import main
+
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+        for index in range(4):
+            (tmp_path / name / f"{index}.txt").write_text("batch " * 12000)
+    monkeypatch.chdir(tmp_path)
+
+    monkeypatch.setattr(
+        sys, "argv", shlex.split("zipper zip a b c -q --jobs 2 --stats json")
+    )
+    main()
+
+    report = json.loads(capsys.readouterr().err)
+    assert report["files"] == 12
+    assert report["size"] == 12 * 72000
+    assert {"read", "compress", "write"} <= report["stages"].keys()
+    assert len(report["slowest"]) == 10
+
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        shlex.split("zipper unzip *.zip -q -o out --jobs 2 --stats json"),
+    )
+    main()
+
+    report = json.loads(capsys.readouterr().err)
+    assert report["files"] == 12
+    assert report["size"] == 12 * 72000
+    assert {"open", "decompress"} <= report["stages"].keys()
+    assert len(report["slowest"]) == 10
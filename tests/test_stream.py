@@ -0,0 +1,190 @@
+import io
+import os
+import zipfile
+
+import pytest
+import pyzipper
+from zipper.stream import unzip_stream
+from zipper.unzip import unzipper
+from zipper.zip import zip_files
+
+
+class Pipe(io.RawIOBase):
+    """Unseekable file object, writable on one end and readable on the
+    other, that hands out at most `chunk` bytes per read
+    """
+
+    def __init__(self, data=b"", chunk=7):
+        self.data = bytearray(data)
+        self.chunk = chunk
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.data += data
+        return len(data)
+
+    def readinto(self, buffer):
+        size = min(len(buffer), len(self.data), self.chunk)
+        buffer[:size] = self.data[:size]
+        del self.data[:size]
+        return size
+
+
+def _make_tree(tmp_path):
+    src = tmp_path / "src"
+    (src / "sub").mkdir(parents=True)
+    files = {
+        "text.txt": b"streamed text " * 500,
+        "sub/random.bin": os.urandom(3000),
+        "empty.txt": b"",
+        "tiny.txt": b"PK\x07\x08 looks like a descriptor",
+    }
+    for name, data in files.items():
+        (src / name).write_bytes(data)
+    return src, files
+
+
+def _check_tree(extract_to, files):
+    for name, data in files.items():
+        assert (extract_to / name).read_bytes() == data
+
+
+@pytest.mark.parametrize("compression", ["deflate", "store", "bzip2", "lzma"])
+@pytest.mark.parametrize("password", [None, "pw"])
+def test_unzip_stream_data_descriptors(tmp_path, compression, password):
+    src, files = _make_tree(tmp_path)
+    pipe = Pipe()
+    zip_files(
+        files=[str(src / name) for name in files],
+        output_zip=pipe,
+        password=password,
+        base=str(src),
+        compression=compression,
+    )
+    out = tmp_path / "out"
+
+    unzip_stream(pipe, str(out), [password.encode()] if password else None)
+
+    _check_tree(out, files)
+
+
+def test_unzip_stream_known_sizes(tmp_path):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("dir/", b"")
+        zf.writestr("dir/a.txt", b"alpha " * 100)
+        zf.writestr("b.txt", b"beta", compress_type=zipfile.ZIP_STORED)
+    out = tmp_path / "out"
+
+    unzip_stream(Pipe(buffer.getvalue(), chunk=1000), str(out))
+
+    assert (out / "dir").is_dir()
+    assert (out / "dir" / "a.txt").read_bytes() == b"alpha " * 100
+    assert (out / "b.txt").read_bytes() == b"beta"
+
+
+def test_unzip_stream_prompts_for_password(tmp_path, monkeypatch):
+    buffer = io.BytesIO()
+    with pyzipper.AESZipFile(buffer, "w", encryption=pyzipper.WZ_AES) as zf:
+        zf.setpassword(b"secret")
+        zf.writestr("a.txt", b"hidden")
+    answers = iter(["wrong", "secret"])
+    monkeypatch.setattr("zipper.stream.get_password", lambda _: next(answers))
+
+    unzip_stream(Pipe(buffer.getvalue()), str(tmp_path))
+
+    assert (tmp_path / "a.txt").read_bytes() == b"hidden"
+
+
+def test_unzip_stream_tries_every_password(tmp_path, monkeypatch):
+    buffer = io.BytesIO()
+    with pyzipper.AESZipFile(buffer, "w", encryption=pyzipper.WZ_AES) as zf:
+        zf.setpassword(b"secret")
+        zf.writestr("a.txt", b"hidden")
+    prompts = []
+    monkeypatch.setattr("zipper.stream.get_password", prompts.append)
+    passwords = [b"wrong", b"secret"]
+
+    unzip_stream(Pipe(buffer.getvalue()), str(tmp_path), passwords, False)
+
+    assert (tmp_path / "a.txt").read_bytes() == b"hidden"
+    assert passwords == [b"secret", b"wrong"]
+    with pytest.raises(RuntimeError, match="None of the passwords given"):
+        unzip_stream(Pipe(buffer.getvalue()), str(tmp_path), [b"no"], False)
+    assert not prompts
+
+
+def test_unzip_stream_detects_corruption(tmp_path):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr("a.txt", b"original data")
+    data = buffer.getvalue().replace(b"original", b"modified")
+
+    with pytest.raises(pyzipper.BadZipFile, match="CRC"):
+        unzip_stream(Pipe(data), str(tmp_path))
+
+
+def test_unzip_stream_truncated(tmp_path):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("a.bin", os.urandom(1000))
+    data = buffer.getvalue()
+
+    with pytest.raises(EOFError, match="middle of a member"):
+        unzip_stream(Pipe(data[:500]), str(tmp_path))
+    with pytest.raises(EOFError, match="central directory"):
+        unzip_stream(Pipe(data[: data.index(b"PK\x01\x02")]), str(tmp_path))
+
+
+def test_unzipper_reads_stdin(tmp_path, monkeypatch):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("a.txt", b"from stdin")
+    monkeypatch.setattr(
+        "sys.stdin", io.TextIOWrapper(io.BufferedReader(Pipe(buffer.getvalue())))
+    )
+
+    unzipper(["-"], output=str(tmp_path / "out"))
+
+    assert (tmp_path / "out" / "a.txt").read_bytes() == b"from stdin"
+
+
+def test_unzipper_stdin_never_prompts_when_unattended(tmp_path, monkeypatch):
+    buffer = io.BytesIO()
+    with pyzipper.AESZipFile(buffer, "w", encryption=pyzipper.WZ_AES) as zf:
+        zf.setpassword(b"secret")
+        zf.writestr("a.txt", b"hidden")
+    monkeypatch.setattr(
+        "sys.stdin", io.TextIOWrapper(io.BufferedReader(Pipe(buffer.getvalue())))
+    )
+    prompts = []
+    monkeypatch.setattr("zipper.stream.get_password", prompts.append)
+    monkeypatch.setenv("ZIPPER_PASSWORD", "wrong")
+
+    assert not unzipper(["-"], output=str(tmp_path / "out"))
+    assert not (tmp_path / "out" / "a.txt").exists()
+    assert not prompts
+
+
+def test_unzip_stream_selected_members(tmp_path):
+    src, files = _make_tree(tmp_path)
+    pipe = Pipe()
+    zip_files(
+        files=[str(src / name) for name in files],
+        output_zip=pipe,
+        base=str(src),
+    )
+    out = tmp_path / "out"
+
+    unzip_stream(pipe, str(out), selected=lambda name: name.startswith("sub/"))
+
+    assert [str(p.relative_to(out)) for p in out.rglob("*")] == [
+        "sub",
+        "sub/random.bin",
+    ]
+    assert (out / "sub" / "random.bin").read_bytes() == files["sub/random.bin"]
@@ -29,20 +29,23 @@ def app():
 def mock_run(monkeypatch):
     mock_zipper = Mock()
     mock_unzipper = Mock()
+    mock_verifier = Mock()
 
     # Create fake module zipper.zip - for __main__ tests
     zip_module = ModuleType("zipper.zip")
     zip_module.zipper = mock_zipper
-    sys.modules["zipper.zip"] = zip_module
+    monkeypatch.setitem(sys.modules, "zipper.zip", zip_module)
 
     # Create fake module zipper.unzip - for __main__ tests
     unzip_module = ModuleType("zipper.unzip")
     unzip_module.unzipper = mock_unzipper
-    sys.modules["zipper.unzip"] = unzip_module
+    unzip_module.verifier = mock_verifier
+    monkeypatch.setitem(sys.modules, "zipper.unzip", unzip_module)
 
     # Patch where they're used — not where they're defined!
     monkeypatch.setattr("zipper.typer_parser.zipper", mock_zipper)
     monkeypatch.setattr("zipper.typer_parser.unzipper", mock_unzipper)
+    monkeypatch.setattr("zipper.typer_parser.verifier", mock_verifier)
 
     # Only import run after monkeypatching
     # from zipper.typer_parser import app
@@ -51,6 +54,7 @@ def mock_run(monkeypatch):
         # app=app,
         zipper=mock_zipper,
         unzipper=mock_unzipper,
+        verifier=mock_verifier,
     )
 
 
@@ -64,6 +68,13 @@ def test_check_zip_single_input(app, mock_run):
         base=".",
         prompt=False,
         compression="deflate",
+        jobs=1,
+        update=False,
+        checksum=False,
+        buffer_size=64 * 1024 * 1024,
+        files_from=None,
+        null=False,
+        stats_format=None,
     )
     mock_run.unzipper.assert_not_called()
 
@@ -78,6 +89,13 @@ def test_check_zip_with_multi_excludes_split(app, mock_run):
         base=".",
         prompt=False,
         compression="deflate",
+        jobs=1,
+        update=False,
+        checksum=False,
+        buffer_size=64 * 1024 * 1024,
+        files_from=None,
+        null=False,
+        stats_format=None,
     )
     mock_run.unzipper.assert_not_called()
 
@@ -92,6 +110,13 @@ def test_check_zip_with_distributed_input(app, mock_run):
         base=".",
         prompt=False,
         compression="deflate",
+        jobs=1,
+        update=False,
+        checksum=False,
+        buffer_size=64 * 1024 * 1024,
+        files_from=None,
+        null=False,
+        stats_format=None,
     )
     mock_run.unzipper.assert_not_called()
 
@@ -114,7 +139,15 @@ def test_main_guard_zip(mock_run):
 
     assert excinfo.value.code == 0
     mock_run.unzipper.assert_called_once_with(
-        ["file1.zip", "file2.zip"], output="temp", base="/tmp"
+        ["file1.zip", "file2.zip"],
+        output="temp",
+        base="/tmp",
+        jobs=1,
+        password_fd=None,
+        include_members=[],
+        exclude_members=[],
+        overwrite="always",
+        stats_format=None,
     )
     mock_run.zipper.assert_not_called()
 
@@ -137,5 +170,127 @@ def test_main_guard_unzip(mock_run):
         base="/tmp",
         prompt=False,
         compression="lzma",
+        jobs=1,
+        update=False,
+        checksum=False,
+        buffer_size=64 * 1024 * 1024,
+        files_from=None,
+        null=False,
+        stats_format=None,
     )
     mock_run.unzipper.assert_not_called()
+
+
+def test_check_jobs(app, mock_run):
+    runner.invoke(app, shlex.split("zip file1.txt --jobs 4"))
+    assert mock_run.zipper.call_args.kwargs["jobs"] == 4
+
+    runner.invoke(app, shlex.split("unzip file1.zip --jobs 0"))
+    assert mock_run.unzipper.call_args.kwargs["jobs"] == 0
+
+
+def test_check_update(app, mock_run):
+    runner.invoke(app, shlex.split("zip file1.txt --output a.zip --update"))
+    assert mock_run.zipper.call_args.kwargs["update"] is True
+    assert mock_run.zipper.call_args.kwargs["checksum"] is False
+
+
+def test_check_buffer_size(app, mock_run):
+    runner.invoke(app, shlex.split("zip file1.txt --buffer-size 8"))
+    assert mock_run.zipper.call_args.kwargs["buffer_size"] == 8 * 1024 * 1024
+
+
+def test_check_files_from(app, mock_run):
+    result = runner.invoke(
+        app, shlex.split("zip --files-from 'list*.txt' --output a.zip")
+    )
+    assert result.exit_code == 0
+    kwargs = mock_run.zipper.call_args.kwargs
+    assert mock_run.zipper.call_args.args == ([],)
+    assert kwargs["files_from"] == "list*.txt"
+    assert kwargs["null"] is False
+
+    result = runner.invoke(app, ["zip", "--output", "a.zip"])
+    assert result.exit_code != 0
+
+
+def test_check_stats(app, mock_run):
+    runner.invoke(app, shlex.split("zip file1.txt --stats=json"))
+    assert mock_run.zipper.call_args.kwargs["stats_format"] == "json"
+
+    runner.invoke(app, shlex.split("unzip file1.zip --stats text"))
+    assert mock_run.unzipper.call_args.kwargs["stats_format"] == "text"
+
+    result = runner.invoke(app, shlex.split("unzip file1.zip --stats xml"))
+    assert result.exit_code != 0
+    assert mock_run.unzipper.call_count == 1
+
+
+def test_check_auto_compression(app, mock_run):
+    runner.invoke(app, shlex.split("zip file1.txt --compression auto"))
+    assert mock_run.zipper.call_args.kwargs["compression"] == "auto"
+
+
+def test_check_password_fd(app, mock_run):
+    runner.invoke(app, shlex.split("unzip file1.zip --password-fd 3"))
+    assert mock_run.unzipper.call_args.kwargs["password_fd"] == 3
+
+
+def test_check_unzip_member_patterns(app, mock_run):
+    runner.invoke(
+        app, shlex.split("unzip a.zip --include 'conf/*' --exclude '*.bak'")
+    )
+    assert mock_run.unzipper.call_args.kwargs["include_members"] == ["conf/*"]
+    assert mock_run.unzipper.call_args.kwargs["exclude_members"] == ["*.bak"]
+
+
+def test_check_unzip_overwrite(app, mock_run):
+    runner.invoke(app, shlex.split("unzip a.zip --skip-existing"))
+    assert mock_run.unzipper.call_args.kwargs["overwrite"] == "never"
+
+    runner.invoke(app, shlex.split("unzip a.zip --if-changed"))
+    assert mock_run.unzipper.call_args.kwargs["overwrite"] == "if-changed"
+
+    result = runner.invoke(
+        app, shlex.split("unzip a.zip --if-changed --skip-existing")
+    )
+    assert result.exit_code != 0
+
+
+def test_check_list(app, monkeypatch):
+    mock_lister = Mock()
+    monkeypatch.setattr("zipper.typer_parser.lister", mock_lister)
+    runner.invoke(app, shlex.split("list a.zip --exclude '*.bak'"))
+    mock_lister.assert_called_once_with(
+        ["a.zip"],
+        base=".",
+        include_members=[],
+        exclude_members=["*.bak"],
+        index=False,
+    )
+
+
+def test_check_test(app, mock_run):
+    mock_run.verifier.return_value = True
+    result = runner.invoke(app, shlex.split("test a.zip --include 'conf/*'"))
+    assert result.exit_code == 0
+    mock_run.verifier.assert_called_once_with(
+        ["a.zip"],
+        base=".",
+        jobs=1,
+        password_fd=None,
+        include_members=["conf/*"],
+        exclude_members=[],
+    )
+
+    mock_run.verifier.return_value = False
+    result = runner.invoke(app, shlex.split("test a.zip"))
+    assert result.exit_code == 1
+
+
+def test_failed_zip_or_unzip_exits_non_zero(app, mock_run):
+    mock_run.zipper.return_value = False
+    assert runner.invoke(app, shlex.split("zip a b")).exit_code == 1
+
+    mock_run.unzipper.return_value = False
+    assert runner.invoke(app, shlex.split("unzip missing.zip")).exit_code == 1
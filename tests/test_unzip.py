@@ -1,7 +1,11 @@
+import os
+import zipfile
+
 import pytest
 import pyzipper
 from pathlib import Path
-from zipper.unzip import unzipper
+from zipper.reader import MappedArchive
+from zipper.unzip import extract_all, unzipper, verifier
 
 
 def create_test_zip(zip_path: Path, contents: dict, password: str = None):
@@ -21,7 +25,7 @@ def test_unzipper_extracts_zip(tmp_path):
     output_dir = tmp_path / "out"
     output_dir.mkdir()
 
-    unzipper([str(zip_file)], output=str(output_dir))
+    assert unzipper([str(zip_file)], output=str(output_dir))
 
     extracted = list(output_dir.glob("**/*"))
     extracted_files = [f.name for f in extracted if f.is_file()]
@@ -78,23 +82,476 @@ def test_unzipper_skips_invalid_zip(tmp_path, caplog):
 
 def test_unzipper_missing_zip(tmp_path, caplog):
     missing_zip = tmp_path / "missing.zip"
-    unzipper([str(missing_zip)], output=str(tmp_path))
+    assert not unzipper([str(missing_zip)], output=str(tmp_path))
     assert f"Zip file not found: {missing_zip}" in caplog.text
 
 
-def test_unzipper_other_runtime_error(monkeypatch, tmp_path):
+def test_unzipper_other_runtime_error(monkeypatch, tmp_path, caplog):
     zip_path = tmp_path / "corrupted.zip"
     output_dir = tmp_path / "out"
     output_dir.mkdir()
 
-    # Create a dummy valid zip so pyzipper opens it, but force extractall to break
+    # Create a dummy valid zip so it opens, but force extraction to break
     create_test_zip(zip_path, {"file.txt": "data"})
 
-    # monkeypatch extractall to raise non-password-related RuntimeError
-    def bad_extractall(self, path=None):
+    # monkeypatch extract to raise non-password-related RuntimeError
+    def bad_extract(self, member, extract_to, password=None):
         raise RuntimeError("disk full or some other error")
 
-    monkeypatch.setattr("pyzipper.AESZipFile.extractall", bad_extractall)
+    monkeypatch.setattr("zipper.reader.MappedArchive.extract", bad_extract)
+
+    # Reported per archive instead of aborting the batch, and failed
+    assert not unzipper([str(zip_path)], output=str(output_dir))
+    assert "RuntimeError: disk full" in caplog.text
+
+
+def test_unzipper_parallel_extraction(tmp_path):
+    zip_file = tmp_path / "tree.zip"
+    contents = {f"dir{i % 3}/sub/file{i}.txt": f"data {i}" for i in range(30)}
+    contents["empty/"] = ""
+    create_test_zip(zip_file, contents)
+    output_dir = tmp_path / "out"
+
+    unzipper([str(zip_file)], output=str(output_dir), jobs=3)
+
+    for name, data in contents.items():
+        if name.endswith("/"):
+            assert (output_dir / name).is_dir()
+        else:
+            assert (output_dir / name).read_text() == data
+
+
+def test_unzipper_parallel_encrypted(monkeypatch, tmp_path):
+    zip_file = tmp_path / "protected.zip"
+    output_dir = tmp_path / "output"
+    contents = {"a.txt": "alpha", "b/b.txt": "beta"}
+    create_test_zip(zip_file, contents, password="pw")
+    monkeypatch.setattr("zipper.unzip.get_password", lambda prompt: "pw")
+
+    unzipper([str(zip_file)], output=str(output_dir), jobs=2)
+
+    assert (output_dir / "a.txt").read_text() == "alpha"
+    assert (output_dir / "b" / "b.txt").read_text() == "beta"
+
+
+def test_unzipper_batch_continues_after_failure(monkeypatch, tmp_path, caplog):
+    good = tmp_path / "good.zip"
+    bad = tmp_path / "bad.zip"
+    locked = tmp_path / "locked.zip"
+    create_test_zip(good, {"good.txt": "fine"})
+    create_test_zip(bad, {"bad.txt": "x" * 1000})
+    create_test_zip(locked, {"locked.txt": "secret"}, password="pw")
+    monkeypatch.setattr("zipper.unzip.get_password", lambda prompt: "pw")
+
+    original = MappedArchive.extract
+
+    def flaky_extract(self, member, extract_to, password=None):
+        if self.path.endswith("bad.zip"):
+            raise RuntimeError("disk full")
+        return original(self, member, extract_to, password)
+
+    monkeypatch.setattr("zipper.reader.MappedArchive.extract", flaky_extract)
+
+    caplog.set_level("INFO")
+    assert not unzipper([str(tmp_path / "*.zip")], jobs=2)
+
+    assert (tmp_path / "good" / "good.txt").read_text() == "fine"
+    assert (tmp_path / "locked" / "locked.txt").read_text() == "secret"
+    assert f"Failed {bad}: RuntimeError: disk full" in caplog.text
+    assert "Processed 3 archive(s): 2 succeeded, 1 failed" in caplog.text
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_unzipper_batch_skips_what_is_not_an_archive(
+    monkeypatch, tmp_path, caplog, jobs
+):
+    create_test_zip(tmp_path / "a.zip", {"a.txt": "alpha"})
+    create_test_zip(tmp_path / "b.zip", {"b.txt": "beta"})
+    (tmp_path / "notes.txt").write_text("not a zip")
+    (tmp_path / "folder").mkdir()
+    monkeypatch.chdir(tmp_path)
+
+    caplog.set_level("INFO")
+    assert unzipper(["*"], output=str(tmp_path / "out"), jobs=jobs)
+
+    assert (tmp_path / "out" / "a.txt").read_text() == "alpha"
+    assert (tmp_path / "out" / "b.txt").read_text() == "beta"
+    assert f"Not a valid zip file: {tmp_path / 'notes.txt'}" in caplog.text
+    assert f"Not a valid zip file: {tmp_path / 'folder'}" in caplog.text
+    assert "Failed" not in caplog.text
+
+
+def test_unzipper_batch_parses_each_archive_once(monkeypatch, tmp_path):
+    for index in range(4):
+        create_test_zip(tmp_path / f"{index}.zip", {f"{index}.txt": "data"})
+    parsed = tmp_path / "parsed.log"
+    original = MappedArchive.__init__
+
+    def logged_init(self, path):
+        # Appended to a file, as the workers are other processes
+        with open(parsed, "a") as log:
+            log.write(os.path.basename(path) + "\n")
+        original(self, path)
+
+    monkeypatch.setattr("zipper.reader.ARCHIVE_CACHE_SIZE", 2)
+    monkeypatch.setattr("zipper.reader.MappedArchive.__init__", logged_init)
+
+    unzipper([str(tmp_path / "*.zip")], jobs=2)
+
+    assert sorted(parsed.read_text().split()) == [
+        f"{index}.zip" for index in range(4)
+    ]
+    for index in range(4):
+        assert (tmp_path / str(index) / f"{index}.txt").read_text() == "data"
+
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_extract_all_mixed_members(tmp_path, jobs):
+    zip_file = tmp_path / "mixed.zip"
+    with zipfile.ZipFile(zip_file, "w") as zf:
+        zf.writestr("stored/a.txt", "stored " * 100, zipfile.ZIP_STORED)
+        zf.writestr("empty.txt", "", zipfile.ZIP_STORED)
+        zf.writestr("deflated.txt", "deflated " * 100, zipfile.ZIP_DEFLATED)
+        zf.writestr("bzip2.txt", "bzip2 " * 100, zipfile.ZIP_BZIP2)
+        zf.writestr("lzma.txt", "lzma " * 100, zipfile.ZIP_LZMA)
+        zf.writestr("dir/", "")
+    output_dir = tmp_path / "out"
+
+    with MappedArchive(str(zip_file)) as archive:
+        extract_all(archive, str(output_dir), jobs)
+
+    assert (output_dir / "stored" / "a.txt").read_text() == "stored " * 100
+    assert (output_dir / "empty.txt").read_text() == ""
+    assert (output_dir / "deflated.txt").read_text() == "deflated " * 100
+    assert (output_dir / "bzip2.txt").read_text() == "bzip2 " * 100
+    assert (output_dir / "lzma.txt").read_text() == "lzma " * 100
+    assert (output_dir / "dir").is_dir()
+
+
+@pytest.mark.parametrize("compression", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+def test_extract_all_bad_crc(tmp_path, compression):
+    zip_file = tmp_path / "corrupt.zip"
+    with zipfile.ZipFile(zip_file, "w", compression) as zf:
+        zf.writestr("a.txt", "original data")
+    with zipfile.ZipFile(zip_file) as zf:
+        info = zf.getinfo("a.txt")
+    data = bytearray(zip_file.read_bytes())
+    # Corrupt the CRC-32 recorded in the central directory
+    cd = data.index(b"PK\x01\x02")
+    data[cd + 16 : cd + 20] = (info.CRC ^ 1).to_bytes(4, "little")
+    zip_file.write_bytes(bytes(data))
+
+    with MappedArchive(str(zip_file)) as archive:
+        with pytest.raises(pyzipper.BadZipFile, match="CRC"):
+            extract_all(archive, str(tmp_path / "out"))
+
+
+def test_unzipper_parses_each_archive_once(monkeypatch, tmp_path):
+    zip_file = tmp_path / "test.zip"
+    create_test_zip(zip_file, {"a.txt": "alpha"})
+    opened = []
+    original_init = MappedArchive.__init__
+
+    def tracking_init(self, path):
+        opened.append(path)
+        original_init(self, path)
+
+    monkeypatch.setattr(MappedArchive, "__init__", tracking_init)
+
+    unzipper([str(zip_file)], output=str(tmp_path / "out"))
+
+    assert opened == [str(zip_file)]
+    assert (tmp_path / "out" / "a.txt").read_text() == "alpha"
+
+
+def test_unzipper_checks_password_before_extracting(monkeypatch, tmp_path):
+    zip_file = tmp_path / "protected.zip"
+    create_test_zip(
+        zip_file, {"big.txt": "x" * 100_000, "small.txt": "s"}, password="pw"
+    )
+    answers = ["wrong", "pw"]
+    monkeypatch.setattr(
+        "zipper.unzip.get_password", lambda prompt: answers.pop(0)
+    )
+    extracted = []
+    original = MappedArchive.extract
+
+    def tracking_extract(self, member, extract_to, password=None):
+        extracted.append((member.filename, password))
+        return original(self, member, extract_to, password)
+
+    monkeypatch.setattr(MappedArchive, "extract", tracking_extract)
+    output_dir = tmp_path / "out"
+
+    unzipper([str(zip_file)], output=str(output_dir))
+
+    # No extraction attempt with a wrong password, nor a second prompt
+    # once the right one was given
+    assert answers == []
+    assert extracted == [("big.txt", b"pw"), ("small.txt", b"pw")]
+    assert (output_dir / "big.txt").read_text() == "x" * 100_000
+
+
+def test_unzipper_reuses_password_across_archives(monkeypatch, tmp_path):
+    for name in ("a", "b", "c"):
+        create_test_zip(tmp_path / f"{name}.zip", {f"{name}.txt": name}, "pw")
+    monkeypatch.delenv("ZIPPER_PASSWORD", raising=False)
+    prompts = []
+
+    def get_password(prompt):
+        prompts.append(prompt)
+        return "pw"
+
+    monkeypatch.setattr("zipper.unzip.get_password", get_password)
+
+    unzipper([str(tmp_path / "*.zip")])
+
+    assert len(prompts) == 1
+    for name in ("a", "b", "c"):
+        assert (tmp_path / name / f"{name}.txt").read_text() == name
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_unzipper_unattended_passwords(monkeypatch, tmp_path, caplog, jobs):
+    create_test_zip(tmp_path / "a.zip", {"a.txt": "a"}, "first")
+    create_test_zip(tmp_path / "b.zip", {"b.txt": "b"}, "second")
+    create_test_zip(tmp_path / "c.zip", {"c.txt": "c"}, "unknown")
+    monkeypatch.setenv("ZIPPER_PASSWORD", "first")
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"second\n")
+    os.close(write_fd)
+
+    def get_password(prompt):
+        raise AssertionError("Unattended runs must not prompt")
+
+    monkeypatch.setattr("zipper.unzip.get_password", get_password)
+
+    unzipper([str(tmp_path / "*.zip")], jobs=jobs, password_fd=read_fd)
+
+    assert (tmp_path / "a" / "a.txt").read_text() == "a"
+    assert (tmp_path / "b" / "b.txt").read_text() == "b"
+    assert not (tmp_path / "c" / "c.txt").exists()
+    assert "None of the passwords given opens" in caplog.text
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_unzipper_extracts_selected_members(monkeypatch, tmp_path, jobs):
+    zip_file = tmp_path / "bundle.zip"
+    create_test_zip(
+        zip_file,
+        {
+            "conf/app.yml": "app",
+            "conf/app.yml.bak": "old",
+            "conf/db.yml": "db",
+            "data/big.bin": "x" * 10_000,
+        },
+    )
+    extracted = []
+    original = MappedArchive.extract
+
+    def tracking_extract(self, member, extract_to, password=None):
+        extracted.append(member.filename)
+        return original(self, member, extract_to, password)
+
+    monkeypatch.setattr(MappedArchive, "extract", tracking_extract)
+    output_dir = tmp_path / "out"
+
+    unzipper(
+        [str(zip_file)],
+        output=str(output_dir),
+        jobs=jobs,
+        include_members=["conf/"],
+        exclude_members=["*.bak"],
+    )
+
+    assert sorted(
+        str(p.relative_to(output_dir)) for p in output_dir.rglob("*.*")
+    ) == ["conf/app.yml", "conf/db.yml"]
+    if jobs == 1:
+        assert extracted == ["conf/app.yml", "conf/db.yml"]
+
+
+def test_unzipper_selection_skips_password_for_plain_members(
+    monkeypatch, tmp_path, caplog
+):
+    zip_file = tmp_path / "mixed.zip"
+    create_test_zip(zip_file, {"secret.txt": "hidden"}, password="pw")
+    with zipfile.ZipFile(zip_file, "a") as zf:
+        zf.writestr("readme.txt", "public")
+    monkeypatch.delenv("ZIPPER_PASSWORD", raising=False)
+
+    def get_password(prompt):
+        raise AssertionError("No encrypted member was selected")
+
+    monkeypatch.setattr("zipper.unzip.get_password", get_password)
+    output_dir = tmp_path / "out"
+
+    unzipper(
+        [str(zip_file)],
+        output=str(output_dir),
+        include_members=["*.txt"],
+        exclude_members=["secret.txt"],
+    )
+    unzipper([str(zip_file)], output=str(output_dir), include_members=["none"])
+
+    assert [p.name for p in output_dir.iterdir()] == ["readme.txt"]
+    assert f"No members of {zip_file} match" in caplog.text
+
+
+def _tracked_extract(monkeypatch):
+    extracted = []
+    original = MappedArchive.extract
+
+    def tracking_extract(self, member, extract_to, password=None):
+        extracted.append(member.filename)
+        return original(self, member, extract_to, password)
+
+    monkeypatch.setattr(MappedArchive, "extract", tracking_extract)
+    return extracted
+
+
+def test_unzipper_skip_existing(monkeypatch, tmp_path):
+    zip_file = tmp_path / "bundle.zip"
+    create_test_zip(zip_file, {"a.txt": "new a", "b.txt": "new b"})
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    (output_dir / "a.txt").write_text("local a")
+    extracted = _tracked_extract(monkeypatch)
+
+    unzipper([str(zip_file)], output=str(output_dir), overwrite="never")
+
+    assert extracted == ["b.txt"]
+    assert (output_dir / "a.txt").read_text() == "local a"
+    assert (output_dir / "b.txt").read_text() == "new b"
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_unzipper_if_changed(monkeypatch, tmp_path, jobs):
+    zip_file = tmp_path / "bundle.zip"
+    contents = {
+        "same.txt": "same",
+        "edited.txt": "original",
+        "resized.txt": "short",
+        "missing.txt": "missing",
+    }
+    with zipfile.ZipFile(zip_file, "w") as zf:
+        for name, data in contents.items():
+            zf.writestr(zipfile.ZipInfo(name, (2020, 1, 1, 12, 0, 0)), data)
+    output_dir = tmp_path / "out"
+    unzipper([str(zip_file)], output=str(output_dir), overwrite="if-changed")
+
+    (output_dir / "edited.txt").write_text("ORIGINAL")  # Same size
+    (output_dir / "resized.txt").write_text("much longer")
+    (output_dir / "missing.txt").unlink()
+    extracted = _tracked_extract(monkeypatch)
+
+    unzipper(
+        [str(zip_file)],
+        output=str(output_dir),
+        jobs=jobs,
+        overwrite="if-changed",
+    )
+
+    for name, data in contents.items():
+        assert (output_dir / name).read_text() == data
+    if jobs == 1:
+        assert sorted(extracted) == [
+            "edited.txt",
+            "missing.txt",
+            "resized.txt",
+        ]
+
+
+def test_unzipper_if_changed_uses_crc_when_mtime_differs(
+    monkeypatch, tmp_path, caplog
+):
+    zip_file = tmp_path / "bundle.zip"
+    create_test_zip(zip_file, {"a.txt": "alpha"})
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    (output_dir / "a.txt").write_text("alpha")  # Today's mtime
+    extracted = _tracked_extract(monkeypatch)
+    caplog.set_level("INFO")
+
+    unzipper([str(zip_file)], output=str(output_dir), overwrite="if-changed")
+
+    assert extracted == []
+    assert "Already up to date" in caplog.text
+
+
+def _corrupt_zip(zip_file):
+    with zipfile.ZipFile(zip_file, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr("good.txt", "good data")
+        zf.writestr("bad.txt", "original data")
+        zf.writestr("lzma.txt", "lzma " * 100, zipfile.ZIP_LZMA)
+    zip_file.write_bytes(
+        zip_file.read_bytes().replace(b"original", b"modified")
+    )
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_verifier_passes_good_archives(monkeypatch, tmp_path, caplog, jobs):
+    caplog.set_level("INFO")
+    create_test_zip(tmp_path / "a.zip", {"a.txt": "a" * 1000, "d/": ""})
+    create_test_zip(tmp_path / "b.zip", {"b.txt": "b"}, "secret")
+    monkeypatch.setenv("ZIPPER_PASSWORD", "secret")
+    monkeypatch.chdir(tmp_path)
+    before = sorted(tmp_path.rglob("*"))
+
+    assert verifier(["*.zip"], base=str(tmp_path), jobs=jobs)
+
+    assert sorted(tmp_path.rglob("*")) == before
+    assert f"OK {tmp_path / 'a.zip'}: 1 member(s)" in caplog.text
+    assert "Tested 2 member(s) of 2 archive(s)" in caplog.text
+    assert "Extracting" not in caplog.text
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_verifier_reports_bad_members(tmp_path, caplog, jobs):
+    caplog.set_level("INFO")
+    _corrupt_zip(tmp_path / "bad.zip")
+    create_test_zip(tmp_path / "good.zip", {"a.txt": "a"})
+
+    assert not verifier([str(tmp_path / "*.zip")], jobs=jobs)
+
+    bad = tmp_path / "bad.zip"
+    assert f"Failed {bad}: bad.txt: BadZipFile: Bad CRC-32" in caplog.text
+    assert f"{bad}: 1 of 3 member(s) bad" in caplog.text
+    assert f"OK {tmp_path / 'good.zip'}" in caplog.text
+
+
+@pytest.mark.parametrize(
+    "compression", [pyzipper.ZIP_DEFLATED, pyzipper.ZIP_BZIP2, pyzipper.ZIP_LZMA]
+)
+def test_verifier_goes_on_past_a_corrupt_encrypted_member(
+    monkeypatch, tmp_path, caplog, compression
+):
+    caplog.set_level("INFO")
+    bad = tmp_path / "bad.zip"
+    with pyzipper.AESZipFile(
+        bad, "w", compression=compression, encryption=pyzipper.WZ_AES
+    ) as zf:
+        zf.setpassword(b"secret")
+        zf.writestr("a.txt", os.urandom(200) + b"a" * 5000)
+    with MappedArchive(str(bad)) as archive:
+        data_range = archive.data_range(archive.members[0])
+    data = bytearray(bad.read_bytes())
+    data[data_range.start + 40] ^= 0xFF
+    bad.write_bytes(data)
+    create_test_zip(tmp_path / "good.zip", {"b.txt": "b"}, "secret")
+    monkeypatch.setenv("ZIPPER_PASSWORD", "secret")
+
+    assert not verifier([str(tmp_path / "*.zip")])
+
+    assert f"OK {tmp_path / 'good.zip'}: 1 member(s)" in caplog.text
+
+
+def test_verifier_fails_unreadable_archives(monkeypatch, tmp_path):
+    (tmp_path / "a.zip").write_bytes(b"not a zip")
+    create_test_zip(tmp_path / "b.zip", {"b.txt": "b"}, "secret")
+    monkeypatch.setenv("ZIPPER_PASSWORD", "wrong")
 
-    with pytest.raises(RuntimeError, match="disk full"):
-        unzipper([str(zip_path)], output=str(output_dir))
+    assert not verifier([str(tmp_path / "a.zip")])
+    assert not verifier([str(tmp_path / "b.zip")])
+    assert not verifier([str(tmp_path / "missing.zip")])
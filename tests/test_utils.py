@@ -1,15 +1,25 @@
 import os
+import subprocess
+import sys
 import zipfile
 from datetime import datetime
+
+import zipper
 from zipper.utils import (
     check_new_archive_exists,
     get_absolute_path,
     get_base_path,
     get_extraction_path,
+    get_member_path,
     get_output_name,
     get_password,
+    has_encrypted_members,
     is_valid_zip,
     navigate,
+    read_file_list,
+    read_passwords,
+    scan,
+    unique_files,
 )
 
 
@@ -194,3 +204,115 @@ def test_navigate_exclude_directory(tmp_path):
     result = list(navigate(str(tmp_path), exclude_patterns=[str(skip_dir)]))
     assert any("keep" in p for p in result)
     assert all("skip" not in p for p in result)
+
+
+def test_get_member_path_strips_unsafe_parts(tmp_path):
+    base = str(tmp_path)
+    assert get_member_path(base, "a/b.txt") == os.path.join(base, "a", "b.txt")
+    assert get_member_path(base, "/etc/passwd") == os.path.join(
+        base, "etc", "passwd"
+    )
+    assert get_member_path(base, "../../x/./y") == os.path.join(base, "x", "y")
+
+
+def test_has_encrypted_members(tmp_path):
+    import pyzipper
+
+    plain = tmp_path / "plain.zip"
+    locked = tmp_path / "locked.zip"
+    with zipfile.ZipFile(plain, "w") as zf:
+        zf.writestr("a.txt", "a")
+    with pyzipper.AESZipFile(locked, "w", encryption=pyzipper.WZ_AES) as zf:
+        zf.setpassword(b"pw")
+        zf.writestr("a.txt", "a")
+
+    assert has_encrypted_members(str(plain)) is False
+    assert has_encrypted_members(str(locked)) is True
+
+
+def test_scan_reuses_entry_stat(tmp_path):
+    file_path = tmp_path / "file.txt"
+    file_path.write_text("hello")
+
+    [(path, st)] = list(scan(str(tmp_path), exclude_patterns=[]))
+    assert path == str(file_path)
+    assert st.st_size == 5
+
+
+def test_scan_does_not_follow_symlinked_directories(tmp_path):
+    real = tmp_path / "real"
+    real.mkdir()
+    (real / "a.txt").write_text("data")
+    (tmp_path / "link").symlink_to(real, target_is_directory=True)
+
+    result = [path for path, _ in scan(str(tmp_path), exclude_patterns=[])]
+    assert result == [str(real / "a.txt")]
+
+
+def test_unique_files_keeps_hard_links(tmp_path):
+    original = tmp_path / "original.txt"
+    original.write_text("data")
+    os.link(original, tmp_path / "linked.txt")
+
+    seen = set()
+    entries = list(unique_files(scan(str(tmp_path), []), seen))
+    assert sorted(path for path, _ in entries) == [
+        str(tmp_path / "linked.txt"),
+        str(original),
+    ]
+    # Reached again through an overlapping pattern
+    assert list(unique_files(scan(str(original), []), seen)) == []
+
+
+def test_read_passwords(monkeypatch):
+    monkeypatch.setenv("ZIPPER_PASSWORD", "from env")
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"first\r\n\nsecond pw\nfrom env\n")
+    os.close(write_fd)
+
+    assert read_passwords(read_fd) == ["from env", "first", "second pw"]
+
+
+def test_read_passwords_none_given(monkeypatch):
+    monkeypatch.delenv("ZIPPER_PASSWORD", raising=False)
+
+    assert read_passwords() == []
+
+
+def test_read_file_list(tmp_path, monkeypatch):
+    monkeypatch.setattr("zipper.utils.FILE_LIST_CHUNK", 4)
+    lines = tmp_path / "list.txt"
+    lines.write_bytes(b"a.txt\r\nsub/with space.txt\n\nlast")
+    nul = tmp_path / "list.bin"
+    nul.write_bytes(b"new\nline.txt\0b.txt\0")
+
+    assert list(read_file_list(str(lines))) == [
+        "a.txt",
+        "sub/with space.txt",
+        "last",
+    ]
+    assert list(read_file_list(str(nul), null=True)) == [
+        "new\nline.txt",
+        "b.txt",
+    ]
+
+
+def test_utils_loads_no_engine():
+    # The file helpers, --stats timing included, come without pyzipper
+    src = os.path.dirname(os.path.dirname(os.path.abspath(zipper.__file__)))
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, zipper.utils\n"
+            "print(' '.join(sorted(sys.modules)))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": src},
+    )
+
+    loaded = set(result.stdout.split())
+    assert "zipper.stats" in loaded
+    assert not {"pyzipper", "Cryptodome", "zipper.compression"} & loaded
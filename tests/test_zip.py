@@ -1,8 +1,12 @@
+import io
 import os
 import zipfile
+import pytest
 import pyzipper
 from pathlib import Path
 from zipper.zip import zipper, zip_files  # adjust as per actual location
+import zipper.members as zipper_members
+import zipper.zip as zipper_zip
 
 
 def test_zip_files_creates_zip(tmp_path):
@@ -58,7 +62,8 @@ def test_zipper_creates_zip(monkeypatch, tmp_path):
     monkeypatch.setattr("zipper.zip.get_base_path", lambda base: str(tmp_path))
     monkeypatch.setattr("zipper.zip.get_absolute_path", lambda p, b: os.path.join(b, p))
     monkeypatch.setattr(
-        "zipper.zip.navigate", lambda p, ex: [p] if "ignore" not in p else []
+        "zipper.zip.scan",
+        lambda p, ex: [(p, os.stat(p))] if "ignore" not in p else [],
     )
     monkeypatch.setattr("zipper.zip.check_new_archive_exists", lambda path: False)
 
@@ -109,7 +114,7 @@ def test_zipper_creates_individual_archives_when_output_missing(monkeypatch, tmp
     monkeypatch.setattr("zipper.zip.get_base_path", lambda base: str(tmp_path))
     monkeypatch.setattr("zipper.zip.get_absolute_path", lambda p, b: os.path.join(b, p))
     monkeypatch.setattr("zipper.zip.check_new_archive_exists", lambda path: False)
-    monkeypatch.setattr("zipper.zip.navigate", lambda p, ex: [p])
+    monkeypatch.setattr("zipper.zip.scan", lambda p, ex: [(p, os.stat(p))])
 
     # Track output zips via monkeypatched get_output_name
     def mock_get_output_name(path, timestamp=False):
@@ -140,7 +145,7 @@ def test_zipper_logs_warning_when_no_files(monkeypatch, tmp_path, caplog):
     monkeypatch.setattr("zipper.zip.get_base_path", lambda base: str(tmp_path))
     monkeypatch.setattr("zipper.zip.get_absolute_path", lambda p, b: os.path.join(b, p))
     monkeypatch.setattr("zipper.zip.check_new_archive_exists", lambda path: False)
-    monkeypatch.setattr("zipper.zip.navigate", lambda p, ex: [])  # No files matched
+    monkeypatch.setattr("zipper.zip.scan", lambda p, ex: [])  # No files matched
 
     zipper(
         include_patterns=[str(empty_dir)],
@@ -152,3 +157,528 @@ def test_zipper_logs_warning_when_no_files(monkeypatch, tmp_path, caplog):
     )
 
     assert "No files matched for" in caplog.text
+
+
+def test_zip_files_parallel_round_trip(tmp_path):
+    from zipper.unzip import unzip_file
+
+    src = tmp_path / "src"
+    src.mkdir()
+    files = []
+    for i in range(20):
+        path = src / f"file{i}.txt"
+        path.write_text(f"line {i}\n" * (i * 50))
+        files.append(str(path))
+
+    for compression in ["deflate", "bzip2", "lzma", "store"]:
+        output_zip = tmp_path / f"{compression}.zip"
+        zip_files(
+            files=files,
+            output_zip=str(output_zip),
+            password=None,
+            base=str(src),
+            compression=compression,
+            jobs=2,
+        )
+        extract_to = tmp_path / compression
+        unzip_file(str(output_zip), str(extract_to))
+        for file in files:
+            name = os.path.basename(file)
+            assert (extract_to / name).read_text() == Path(file).read_text()
+
+
+def test_zip_files_parallel_with_password(tmp_path):
+    file_path = tmp_path / "secret.txt"
+    file_path.write_text("confidential " * 100)
+    output_zip = tmp_path / "secret.zip"
+
+    zip_files(
+        files=[str(file_path)],
+        output_zip=str(output_zip),
+        password="s3cr3t",
+        base=str(tmp_path),
+        jobs=2,
+    )
+
+    with pyzipper.AESZipFile(output_zip, "r") as zf:
+        assert zf.getinfo("secret.txt").is_encrypted
+        zf.setpassword(b"s3cr3t")
+        assert zf.read("secret.txt") == b"confidential " * 100
+
+
+def test_zip_files_parallel_writes_large_files_inline(monkeypatch, tmp_path):
+    small = tmp_path / "small.txt"
+    large = tmp_path / "large.txt"
+    tail = tmp_path / "tail.txt"
+    small.write_text("small")
+    large.write_text("large" * 100)
+    tail.write_text("tail")
+    output_zip = tmp_path / "mixed.zip"
+    monkeypatch.setattr("zipper.zip.PARALLEL_MEMBER_LIMIT", 100)
+    monkeypatch.setattr("zipper.zip.BATCH_FILES", 1)
+
+    zip_files(
+        files=[str(small), str(large), str(tail)],
+        output_zip=str(output_zip),
+        base=str(tmp_path),
+        jobs=2,
+    )
+
+    with zipfile.ZipFile(output_zip, "r") as zf:
+        assert zf.namelist() == ["small.txt", "large.txt", "tail.txt"]
+        assert zf.read("large.txt") == b"large" * 100
+
+
+@pytest.mark.parametrize("password", [None, "pw"])
+def test_zip_files_pipeline_keeps_order_within_budget(
+    monkeypatch, tmp_path, password
+):
+    sizes = [400, 0, 400, 3000, 400, 400, 400, 400, 400]
+    files = []
+    for i, size in enumerate(sizes):
+        file = tmp_path / f"file{i}.txt"
+        file.write_bytes(b"%d" % i * size)
+        files.append(str(file))
+    output_zip = tmp_path / "pipeline.zip"
+    reads = []
+    buffered = []
+    read_file = zipper_zip._read_file
+    append_member = zipper_zip.append_member
+
+    def tracking_read_file(file):
+        reads.append(file)
+        buffered.append(os.path.getsize(file))
+        return read_file(file)
+
+    def tracking_append_member(zf, zinfo, payload):
+        buffered.append(-zinfo.file_size)
+        assert sum(buffered) <= 2000
+        append_member(zf, zinfo, payload)
+
+    monkeypatch.setattr("zipper.zip._read_file", tracking_read_file)
+    monkeypatch.setattr("zipper.zip.append_member", tracking_append_member)
+    monkeypatch.setattr("zipper.zip.DIRECT_WRITE_SIZE", 0)
+
+    zip_files(
+        files=files,
+        output_zip=str(output_zip),
+        password=password,
+        base=str(tmp_path),
+        buffer_size=2000,
+    )
+
+    # Over a quarter of the budget, the 3000 byte file is streamed alone
+    assert sorted(reads) == sorted(files[:3] + files[4:])
+    with pyzipper.AESZipFile(output_zip) as zf:
+        zf.setpassword(b"pw")
+        assert zf.namelist() == [os.path.basename(f) for f in files]
+        for i, size in enumerate(sizes):
+            assert zf.read(f"file{i}.txt") == b"%d" % i * size
+
+
+def test_zip_files_writes_small_files_directly(monkeypatch, tmp_path):
+    files = []
+    for i in range(3):
+        file = tmp_path / f"file{i}.txt"
+        file.write_bytes(b"small" * 100)
+        files.append(str(file))
+    reads = []
+    monkeypatch.setattr("zipper.zip._read_file", reads.append)
+
+    zip_files(
+        files=files,
+        output_zip=str(tmp_path / "small.zip"),
+        base=str(tmp_path),
+    )
+
+    assert reads == []
+    with zipfile.ZipFile(tmp_path / "small.zip") as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ["file0.txt", "file1.txt", "file2.txt"]
+
+
+def test_zip_files_pipeline_reports_unreadable_file(monkeypatch, tmp_path):
+    monkeypatch.setattr("zipper.zip.DIRECT_WRITE_SIZE", 0)
+    present = tmp_path / "present.txt"
+    present.write_text("here")
+    missing = tmp_path / "missing.txt"
+    missing.write_text("soon gone")
+    entries = [(str(present), present.stat()), (str(missing), missing.stat())]
+    missing.unlink()
+
+    with pytest.raises(FileNotFoundError):
+        zip_files(
+            files=entries,
+            output_zip=str(tmp_path / "out.zip"),
+            base=str(tmp_path),
+        )
+
+
+def test_zip_files_parallel_deflates_large_member_in_blocks(
+    monkeypatch, tmp_path
+):
+    large = tmp_path / "dump.sql"
+    data = b"".join(b"INSERT INTO t VALUES (%d);\n" % i for i in range(5000))
+    large.write_bytes(data)
+    output_zip = tmp_path / "dump.zip"
+    monkeypatch.setattr("zipper.zip.PARALLEL_MEMBER_LIMIT", 1024)
+    monkeypatch.setattr("zipper.zip.DEFLATE_BLOCK_SIZE", 4096)
+
+    zip_files(
+        files=[str(large)],
+        output_zip=str(output_zip),
+        password="pw",
+        base=str(tmp_path),
+        jobs=2,
+    )
+
+    with pyzipper.AESZipFile(output_zip, "r") as zf:
+        zf.setpassword(b"pw")
+        info = zf.getinfo("dump.sql")
+        assert info.compress_type == pyzipper.ZIP_DEFLATED
+        assert info.compress_size < len(data)
+        assert zf.read("dump.sql") == data
+
+
+def test_zipper_batch_archives_in_parallel(tmp_path):
+    for name in ["one", "two", "three"]:
+        folder = tmp_path / name
+        folder.mkdir()
+        (folder / f"{name}.txt").write_text(name * (len(name) * 100))
+
+    assert zipper(
+        include_patterns=["*"],
+        exclude_patterns=[],
+        output="",
+        base=str(tmp_path),
+        prompt=False,
+        compression="deflate",
+        jobs=2,
+    )
+
+    for name in ["one", "two", "three"]:
+        with zipfile.ZipFile(tmp_path / f"{name}.zip") as zf:
+            assert zf.read(f"{name}/{name}.txt") == name.encode() * (
+                len(name) * 100
+            )
+
+
+def test_zipper_output_skips_overlapping_matches(tmp_path):
+    folder = tmp_path / "docs"
+    folder.mkdir()
+    (folder / "a.txt").write_text("alpha")
+    (folder / "b.txt").write_text("beta")
+    # A hard link is a file of its own, not an overlapping match
+    os.link(folder / "b.txt", folder / "c.txt")
+    output = tmp_path / "out.zip"
+
+    zipper(
+        include_patterns=["docs", "docs/*.txt", "docs/**"],
+        exclude_patterns=[],
+        output=str(output),
+        base=str(tmp_path),
+        prompt=False,
+        compression="deflate",
+    )
+
+    with zipfile.ZipFile(output) as zf:
+        assert sorted(zf.namelist()) == [
+            "docs/a.txt",
+            "docs/b.txt",
+            "docs/c.txt",
+        ]
+        assert zf.read("docs/c.txt") == b"beta"
+
+
+def _archive_tree(tmp_path, **kwargs):
+    zip_files(
+        files=sorted(str(p) for p in (tmp_path / "src").iterdir()),
+        output_zip=str(tmp_path / "backup.zip"),
+        base=str(tmp_path / "src"),
+        **kwargs,
+    )
+
+
+def test_zip_files_update_copies_unchanged_members(monkeypatch, tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "same.txt").write_text("same " * 100)
+    (src / "changed.txt").write_text("old")
+    (src / "deleted.txt").write_text("gone soon")
+    _archive_tree(tmp_path)
+
+    (src / "changed.txt").write_text("new contents")
+    (src / "deleted.txt").unlink()
+    (src / "added.txt").write_text("added")
+    compressed = []
+    add_file = zipper_zip._add_file
+
+    def tracking_add_file(zf, file, arcname, *args):
+        compressed.append(arcname)
+        return add_file(zf, file, arcname, *args)
+
+    monkeypatch.setattr("zipper.zip._add_file", tracking_add_file)
+    _archive_tree(tmp_path, update=True)
+
+    assert sorted(compressed) == ["added.txt", "changed.txt"]
+    with zipfile.ZipFile(tmp_path / "backup.zip") as zf:
+        assert zf.testzip() is None
+        assert sorted(zf.namelist()) == ["added.txt", "changed.txt", "same.txt"]
+        assert zf.read("same.txt") == b"same " * 100
+        assert zf.read("changed.txt") == b"new contents"
+
+
+def test_zip_files_update_checksum_detects_same_size_edit(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    target = src / "data.txt"
+    target.write_text("aaaa")
+    _archive_tree(tmp_path)
+    st = target.stat()
+    target.write_text("bbbb")
+    os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    _archive_tree(tmp_path, update=True)
+    with zipfile.ZipFile(tmp_path / "backup.zip") as zf:
+        assert zf.read("data.txt") == b"aaaa"  # looks unchanged
+
+    _archive_tree(tmp_path, update=True, checksum=True)
+    with zipfile.ZipFile(tmp_path / "backup.zip") as zf:
+        assert zf.read("data.txt") == b"bbbb"
+
+
+def test_zip_files_update_encrypted(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.txt").write_text("alpha " * 50)
+    (src / "b.txt").write_text("beta")
+    _archive_tree(tmp_path, password="pw", compression="lzma")
+    (src / "b.txt").write_text("beta, updated")
+
+    _archive_tree(tmp_path, password="pw", compression="lzma", update=True)
+
+    with pyzipper.AESZipFile(tmp_path / "backup.zip") as zf:
+        zf.setpassword(b"pw")
+        assert zf.read("a.txt") == b"alpha " * 50
+        assert zf.read("b.txt") == b"beta, updated"
+
+
+def test_zip_files_update_with_other_password_recompresses(tmp_path, caplog):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.txt").write_text("alpha")
+    _archive_tree(tmp_path, password="old")
+
+    _archive_tree(tmp_path, password="new", update=True)
+
+    assert "Password does not match" in caplog.text
+    with pyzipper.AESZipFile(tmp_path / "backup.zip") as zf:
+        zf.setpassword(b"new")
+        assert zf.read("a.txt") == b"alpha"
+
+
+def test_zip_files_auto_compression(tmp_path):
+    text = tmp_path / "notes.txt"
+    text.write_text("compress me " * 1000)
+    photo = tmp_path / "photo.jpg"
+    photo.write_bytes(b"\xff\xd8" + b"jpeg" * 100)
+    noise = tmp_path / "noise.bin"
+    noise.write_bytes(os.urandom(64 * 1024))
+    output_zip = tmp_path / "auto.zip"
+
+    zip_files(
+        files=[str(text), str(photo), str(noise)],
+        output_zip=str(output_zip),
+        base=str(tmp_path),
+        compression="auto",
+    )
+
+    with zipfile.ZipFile(output_zip) as zf:
+        assert zf.getinfo("notes.txt").compress_type == zipfile.ZIP_DEFLATED
+        assert zf.getinfo("photo.jpg").compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo("noise.bin").compress_type == zipfile.ZIP_STORED
+        assert zf.testzip() is None
+
+
+def test_zip_files_auto_stores_when_compression_does_not_pay_off(
+    monkeypatch, tmp_path
+):
+    noise = tmp_path / "noise.dat"
+    noise.write_bytes(os.urandom(4096))
+    output_zip = tmp_path / "auto.zip"
+    # Defeat the entropy sample so the runtime fallback has to kick in
+    monkeypatch.setattr(
+        "zipper.members.choose_method",
+        lambda file, st, sample=None: zipfile.ZIP_DEFLATED,
+    )
+
+    zip_files(
+        files=[str(noise)],
+        output_zip=str(output_zip),
+        password="pw",
+        base=str(tmp_path),
+        compression="auto",
+    )
+
+    with pyzipper.AESZipFile(output_zip) as zf:
+        zf.setpassword(b"pw")
+        assert [info.compress_type for info in zf.infolist()] == [
+            zipfile.ZIP_STORED
+        ]
+        assert zf.read("noise.dat") == noise.read_bytes()
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_zip_files_store_copies_by_kernel(monkeypatch, tmp_path, jobs):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "big.bin").write_bytes(os.urandom(300_000))
+    (src / "empty.txt").write_bytes(b"")
+    (src / "text.txt").write_text("text " * 100)
+    copies = []
+    copy_range = zipper_members.copy_range
+
+    def tracking_copy_range(src_fd, dst_fd, count, *args):
+        copies.append(count)
+        return copy_range(src_fd, dst_fd, count, *args)
+
+    monkeypatch.setattr("zipper.members.copy_range", tracking_copy_range)
+    _archive_tree(tmp_path, compression="store", jobs=jobs)
+
+    assert sorted(copies) == [0, 500, 300_000]
+    with zipfile.ZipFile(tmp_path / "backup.zip") as zf:
+        assert zf.testzip() is None
+        for info in zf.infolist():
+            assert info.compress_type == zipfile.ZIP_STORED
+            assert zf.read(info) == (src / info.filename).read_bytes()
+
+
+def test_zip_files_store_with_password_encrypts(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "secret.txt").write_text("secret " * 50)
+
+    _archive_tree(tmp_path, compression="store", password="pw")
+
+    with pyzipper.AESZipFile(tmp_path / "backup.zip") as zf:
+        zf.setpassword(b"pw")
+        assert zf.getinfo("secret.txt").flag_bits & 0x1
+        assert zf.read("secret.txt") == b"secret " * 50
+
+
+class Unseekable(io.RawIOBase):
+    """A pipe-like sink: no tell, no seek"""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_zip_files_streams_to_unseekable_output(tmp_path, jobs):
+    files = []
+    for i in range(5):
+        file = tmp_path / f"file{i}.txt"
+        file.write_text(f"contents {i} " * 200)
+        files.append(str(file))
+    sink = Unseekable()
+
+    zip_files(
+        files=files,
+        output_zip=sink,
+        password="pw",
+        base=str(tmp_path),
+        jobs=jobs,
+    )
+
+    sink.buffer.seek(0)
+    with pyzipper.AESZipFile(sink.buffer) as zf:
+        zf.setpassword(b"pw")
+        for i in range(5):
+            assert zf.read(f"file{i}.txt") == f"contents {i} ".encode() * 200
+
+
+def test_zip_files_stream_uses_data_descriptors(tmp_path):
+    file = tmp_path / "big.txt"
+    file.write_text("data " * 10000)
+    sink = Unseekable()
+
+    # Too large to buffer, so it is compressed as it is written
+    zip_files(
+        files=[str(file)],
+        output_zip=sink,
+        base=str(tmp_path),
+        buffer_size=4096,
+    )
+
+    with zipfile.ZipFile(io.BytesIO(sink.buffer.getvalue())) as zf:
+        info = zf.getinfo("big.txt")
+        assert info.flag_bits & 0x08
+        assert zf.read("big.txt") == b"data " * 10000
+
+
+def test_zipper_output_to_stdout(monkeypatch, tmp_path):
+    (tmp_path / "a.txt").write_text("alpha")
+    sink = Unseekable()
+    monkeypatch.setattr("sys.stdout", io.TextIOWrapper(sink))
+
+    zipper(
+        include_patterns=["a.txt"],
+        exclude_patterns=[],
+        output="-",
+        base=str(tmp_path),
+        prompt=False,
+        compression="deflate",
+    )
+
+    with zipfile.ZipFile(io.BytesIO(sink.buffer.getvalue())) as zf:
+        assert zf.read("a.txt") == b"alpha"
+    assert not list(tmp_path.glob("*.zip"))
+
+
+def test_zipper_files_from(monkeypatch, tmp_path, caplog):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "a*.txt").write_text("alpha")
+    (tmp_path / "b.txt").write_text("beta")
+    (tmp_path / "c.txt").write_text("gamma")
+    listing = b"sub/a*.txt\0sub\0missing.txt\0b.txt\0"
+    monkeypatch.setattr(
+        "sys.stdin", io.TextIOWrapper(io.BufferedReader(io.BytesIO(listing)))
+    )
+    output = tmp_path / "out.zip"
+
+    zipper(
+        include_patterns=["c.txt"],
+        exclude_patterns=[],
+        output=str(output),
+        base=str(tmp_path),
+        prompt=False,
+        compression="deflate",
+        files_from="-",
+        null=True,
+    )
+
+    with zipfile.ZipFile(output) as zf:
+        # Listed paths are taken literally, directories are not walked
+        assert zf.namelist() == ["c.txt", "sub/a*.txt", "b.txt"]
+    assert "Skipping missing.txt" in caplog.text
+
+
+def test_zipper_files_from_needs_output(tmp_path, caplog):
+    assert not zipper(
+        include_patterns=[],
+        exclude_patterns=[],
+        output="",
+        base=str(tmp_path),
+        prompt=False,
+        compression="deflate",
+        files_from="-",
+    )
+
+    assert "--files-from needs an --output archive" in caplog.text
+    assert not list(tmp_path.iterdir())